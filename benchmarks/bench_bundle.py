@@ -0,0 +1,45 @@
+"""Benchmark of get_bundle with and without batched routing for wide bundles.
+
+    python benchmarks/bench_bundle.py 64 256 1024
+
+routes N ports on a 10 um pitch to N ports on a 3 um pitch 2 mm away
+and reports the route time, number of cells and GDS size.
+"""
+import sys
+import time
+
+import gdsfactory as gf
+from gdsfactory.config import CONFIG
+
+
+def bench(n: int, batched: bool) -> None:
+    ports1 = [
+        gf.Port(f"a{i}", midpoint=(i * 10, 0), width=0.5, orientation=90)
+        for i in range(n)
+    ]
+    ports2 = [
+        gf.Port(
+            f"b{i}", midpoint=(500 + 3 * i + i % 7, 2000), width=0.5, orientation=270
+        )
+        for i in range(n)
+    ]
+
+    t0 = time.perf_counter()
+    routes = gf.routing.get_bundle(ports1, ports2, separation=3, batched=batched)
+    t1 = time.perf_counter()
+
+    c = gf.Component(f"bundle_{n}_{batched}")
+    for route in routes:
+        c.add(route.references)
+    gdspath = c.write_gds(CONFIG["build_directory"] / f"{c.name}.gds")
+    print(
+        f"{n:>6} routes  batched={batched!s:<5}  {t1 - t0:8.3f} s  "
+        f"{len(c.get_dependencies(recursive=True)):>6} cells  "
+        f"{gdspath.stat().st_size / 1e3:8.0f} KB"
+    )
+
+
+if __name__ == "__main__":
+    for n in [int(arg) for arg in sys.argv[1:]] or [64, 256, 1024]:
+        for batched in [False, True]:
+            bench(n, batched)
@@ -0,0 +1,36 @@
+"""Micro-benchmark of the @cell decorator cache hit and miss latency.
+
+    python benchmarks/bench_cell.py
+
+"""
+import timeit
+
+import gdsfactory as gf
+
+
+def bench(factory, number: int = 1000, repeat: int = 5, **kwargs) -> None:
+    factory(**kwargs)  # warm up the cache
+
+    hit = min(
+        timeit.repeat(lambda: factory(**kwargs), number=number, repeat=repeat)
+    )
+    miss = min(
+        timeit.repeat(
+            lambda: factory(cache=False, **kwargs),
+            number=max(number // 100, 1),
+            repeat=repeat,
+        )
+    )
+    hit_us = hit / number * 1e6
+    miss_us = miss / max(number // 100, 1) * 1e6
+    print(
+        f"{factory.__name__:>10} {kwargs!s:<25} "
+        f"hit {hit_us:10.1f} us   miss {miss_us:10.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    bench(gf.components.straight)
+    bench(gf.components.straight, length=3.2, width=0.6)
+    bench(gf.components.mzi)
+    bench(gf.components.mzi, delta_length=25.0)
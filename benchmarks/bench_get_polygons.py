@@ -0,0 +1,53 @@
+"""Benchmark of bbox and get_polygons on a hierarchy with repeated cells.
+
+    python benchmarks/bench_get_polygons.py 1000 10000 50000
+
+places N references to a few cells (each referencing other cells) and
+reports the time of the first and of a repeated bbox, get_polygons and
+flatten, against the gdspy hierarchy walk (depth=10**6 skips the cache).
+"""
+import sys
+import time
+
+import numpy as np
+
+import gdsfactory as gf
+
+
+def timeit(function) -> float:
+    t0 = time.perf_counter()
+    function()
+    return time.perf_counter() - t0
+
+
+def bench(n: int) -> None:
+    rng = np.random.default_rng(0)
+    cells = [
+        gf.components.mzi(),
+        gf.components.ring_single(),
+        gf.components.mmi2x2(),
+    ]
+    c = gf.Component(f"design_{n}")
+    for i in range(n):
+        ref = c << cells[i % len(cells)]
+        ref.rotate(90 * (i % 4))
+        ref.move(tuple(rng.uniform(0, 20e3, 2)))
+    c.lock()
+
+    gdspy_time = timeit(lambda: c.get_polygons(by_spec=True, depth=10 ** 6))
+    cold = timeit(lambda: c.get_polygons(by_spec=True))
+    warm = timeit(lambda: c.get_polygons(by_spec=True))
+    bbox_cold = timeit(lambda: c.bbox)
+    bbox_warm = timeit(lambda: c.bbox)
+    flatten = timeit(c.flatten)
+    print(
+        f"{n:>6} refs  get_polygons gdspy {gdspy_time:7.3f} s "
+        f"first {cold:7.3f} s  repeated {warm:7.3f} s  "
+        f"bbox first {1e3 * bbox_cold:8.2f} ms repeated {1e3 * bbox_warm:6.3f} ms  "
+        f"flatten {flatten:7.3f} s"
+    )
+
+
+if __name__ == "__main__":
+    for n in [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]:
+        bench(n)
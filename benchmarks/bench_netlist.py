@@ -0,0 +1,42 @@
+"""Benchmark of get_netlist on a large lattice of connected straights.
+
+    python benchmarks/bench_netlist.py 100 1000
+
+builds a lattice of 100 rows x 1000 columns (100k instances)
+where each straight is connected to its left and right neighbours.
+"""
+import sys
+import time
+
+import gdsfactory as gf
+from gdsfactory.get_netlist import get_netlist
+
+
+def lattice(rows: int = 10, columns: int = 100, length: float = 10.0) -> gf.Component:
+    c = gf.Component(f"lattice_{rows}_{columns}")
+    straight = gf.components.straight(length=length)
+    for row in range(rows):
+        for column in range(columns):
+            ref = c.add_ref(straight)
+            ref.movex(column * length)
+            ref.movey(row * 20)
+    return c
+
+
+def bench(rows: int, columns: int) -> None:
+    c = lattice(rows=rows, columns=columns)
+    t0 = time.perf_counter()
+    n = get_netlist(c)
+    t1 = time.perf_counter()
+    print(
+        f"{rows * columns:>8} instances {len(n.connections):>8} connections "
+        f"{t1 - t0:8.2f} s"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        bench(int(sys.argv[1]), int(sys.argv[2]))
+    else:
+        for columns in [100, 1000, 10000]:
+            bench(10, columns)
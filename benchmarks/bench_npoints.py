@@ -0,0 +1,53 @@
+"""Benchmark of bends with a fixed number of points against npoints=None.
+
+    python benchmarks/bench_npoints.py
+
+builds a grid of euler and circular bends with radii from 5 to 500 um and
+a bundle of routes, with npoints=720 (default) and npoints=None (fewest
+points within gf.path.MAX_ERROR_NM), and reports the number of vertices,
+the GDS size and the time of a boolean XOR with a shifted copy.
+"""
+import time
+
+import gdsfactory as gf
+from gdsfactory.config import CONFIG
+
+radii = [5, 10, 10, 10, 20, 50, 500]
+
+
+def chip(npoints) -> gf.Component:
+    c = gf.Component(f"chip_npoints_{npoints}")
+    for i, radius in enumerate(radii):
+        bends = [gf.components.bend_euler, gf.components.bend_circular]
+        for j, bend in enumerate(bends):
+            ref = c << bend(radius=radius, npoints=npoints)
+            ref.move((i * 1100, j * 1100))
+
+    ports1 = [gf.Port(f"a{i}", (i * 10, -500), 0.5, 90) for i in range(64)]
+    ports2 = [gf.Port(f"b{i}", (1000 + 5 * i, -300), 0.5, 270) for i in range(64)]
+    bend = gf.partial(gf.components.bend_euler, npoints=npoints)
+    for route in gf.routing.get_bundle(ports1, ports2, bend=bend):
+        c.add(route.references)
+    return c
+
+
+def bench(npoints) -> None:
+    gf.clear_cache()
+    c = chip(npoints)
+    vertices = sum(len(polygon) for polygon in c.get_polygons())
+    gdspath = c.write_gds(CONFIG["build_directory"] / f"{c.name}.gds")
+
+    shifted = gf.Component(f"{c.name}_shifted")
+    shifted.add_ref(c).move((0.05, 0.05))
+    t0 = time.perf_counter()
+    gf.geometry.boolean(c, shifted, operation="xor", layer=(1, 0))
+    t1 = time.perf_counter()
+    print(
+        f"npoints={npoints!s:<5}  {vertices:>8} vertices  "
+        f"{gdspath.stat().st_size / 1e3:8.0f} KB  boolean {t1 - t0:6.3f} s"
+    )
+
+
+if __name__ == "__main__":
+    for npoints in [720, None]:
+        bench(npoints)
@@ -0,0 +1,50 @@
+"""Benchmark of the pack engine on random rectangles.
+
+    python benchmarks/bench_pack.py 100 1000 10000 50000
+
+packs N random rectangles into a single bin with each algorithm and reports
+the wall time and the packing density (rectangle area / bin area).
+MaxRects scales superlinearly, so it is only run up to 1000 rectangles.
+"""
+import sys
+import time
+
+import numpy as np
+
+from gdsfactory.pack import _pack_single_bin
+
+max_maxrects = 1000
+
+
+def bench(n: int, algorithm: str, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(500, 20000, size=(n, 2)).tolist()
+    rect_dict = {i: tuple(size) for i, size in enumerate(sizes)}
+
+    t0 = time.perf_counter()
+    packed, unpacked = _pack_single_bin(
+        rect_dict,
+        aspect_ratio=(1, 1),
+        max_size=(np.inf, np.inf),
+        sort_by_area=True,
+        density=1.1,
+        algorithm=algorithm,
+    )
+    dt = time.perf_counter() - t0
+
+    rects = np.array(list(packed.values()))
+    width = (rects[:, 0] + rects[:, 2]).max()
+    height = (rects[:, 1] + rects[:, 3]).max()
+    density = (rects[:, 2] * rects[:, 3]).sum() / (width * height)
+    print(
+        f"{n:>6} rectangles  {algorithm:<8}  {dt:8.3f} s  "
+        f"density {density:.3f}  {len(unpacked)} unpacked"
+    )
+
+
+if __name__ == "__main__":
+    for n in [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000, 50000]:
+        for algorithm in ["maxrects", "skyline"]:
+            if algorithm == "maxrects" and n > max_maxrects:
+                continue
+            bench(n, algorithm)
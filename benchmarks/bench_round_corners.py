@@ -0,0 +1,72 @@
+"""Benchmark of round_corners against the loop implementation it replaced.
+
+    python benchmarks/bench_round_corners.py 100 1000 5000
+
+rounds random manhattan routes with N corners with both implementations,
+checks that they return the same Route and reports the time of each.
+Random routes have a different length for each straight, so the cold time
+(creating every straight) is dominated by the straight cells.
+"""
+import sys
+import time
+from typing import Tuple
+
+import numpy as np
+from round_corners_loop import round_corners_loop
+
+import gdsfactory as gf
+from gdsfactory.routing.manhattan import round_corners
+from gdsfactory.tests.test_round_corners import get_random_points
+from gdsfactory.types import Route
+
+settings = {
+    "strip": {},
+    "auto_widen": dict(cross_section=gf.cross_section.strip_auto_widen),
+    "wire": dict(
+        bend=gf.components.wire_corner, cross_section=gf.cross_section.metal3
+    ),
+}
+
+
+def assert_same_route(route1: Route, route2: Route) -> None:
+    assert route1.length == route2.length, (route1.length, route2.length)
+    for port1, port2 in zip(route1.ports, route2.ports):
+        assert np.allclose(port1.midpoint, port2.midpoint)
+        assert port1.orientation == port2.orientation
+    assert len(route1.references) == len(route2.references)
+    for ref1, ref2 in zip(route1.references, route2.references):
+        assert ref1.parent.name == ref2.parent.name
+        assert np.allclose(ref1.origin, ref2.origin)
+        assert np.isclose(ref1.rotation % 360, ref2.rotation % 360)
+        assert bool(ref1.x_reflection) == bool(ref2.x_reflection)
+
+
+def timeit(function, points: np.ndarray, name: str) -> Tuple[Route, float, float]:
+    """Returns the route and the time with only the bends and tapers cached (cold)
+    and with all the straights already cached (warm)."""
+    gf.clear_cache()
+    function(points[:4], **settings[name])
+    t0 = time.perf_counter()
+    function(points, **settings[name])
+    t1 = time.perf_counter()
+    route = function(points, **settings[name])
+    return route, t1 - t0, time.perf_counter() - t1
+
+
+def bench(n: int, name: str) -> None:
+    points = get_random_points(n)
+    route1, cold1, warm1 = timeit(round_corners_loop, points, name)
+    route2, cold2, warm2 = timeit(round_corners, points, name)
+
+    assert_same_route(route1, route2)
+    print(
+        f"{n:>6} corners  {name:<10}  "
+        f"cold {cold1:7.3f} s -> {cold2:7.3f} s  "
+        f"warm {warm1:7.3f} s -> {warm2:7.3f} s ({warm1 / warm2:4.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    for n in [int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000]:
+        for name in settings:
+            bench(n, name)
@@ -0,0 +1,68 @@
+"""Benchmark of get_route_astar routes per second against obstacle count.
+
+    python benchmarks/bench_route_astar.py
+
+Places random rectangles on a 2 x 2 mm chip and routes pairs of straights
+about 300 um apart, reusing the same obstacle index for all the routes.
+"""
+import time
+
+import numpy as np
+
+import gdsfactory as gf
+from gdsfactory.routing.get_route_astar import ObstacleIndex, get_route_astar
+from gdsfactory.routing.manhattan import RouteError
+
+
+def chip(
+    obstacles: int, routes: int = 50, size: float = 2000.0, seed: int = 0
+) -> gf.Component:
+    """Returns a chip with random obstacles and pairs of straights to route."""
+    rng = np.random.default_rng(seed)
+    c = gf.Component(f"chip_{obstacles}_{routes}")
+    straight = gf.components.straight()
+    rectangle = gf.components.rectangle(size=(20, 20), layer=(2, 0))
+
+    starts = rng.uniform(100, size - 400, size=(routes, 2))
+    ends = starts + rng.uniform([250, -150], [350, 150], size=(routes, 2))
+    for start, end in zip(starts, ends):
+        left = c.add_ref(straight, alias=f"left_{len(c.aliases) // 2}")
+        left.move(start - (10, 0))
+        right = c.add_ref(straight, alias=f"right_{len(c.aliases) // 2}")
+        right.move(end)
+
+    ports = np.concatenate([starts, ends])
+    for xy in rng.uniform(0, size, size=(obstacles, 2)):
+        if np.min(np.abs(ports - xy - 10).max(axis=1)) > 40:
+            ref = c.add_ref(rectangle)
+            ref.move(xy)
+    return c
+
+
+def bench(obstacles: int, routes: int = 50) -> None:
+    c = chip(obstacles, routes=routes)
+
+    t0 = time.perf_counter()
+    index = ObstacleIndex.from_component(c)
+    t1 = time.perf_counter()
+    failed = 0
+    for i in range(routes):
+        try:
+            get_route_astar(
+                c,
+                c.aliases[f"left_{i}"].ports["o2"],
+                c.aliases[f"right_{i}"].ports["o1"],
+                obstacles=index,
+            )
+        except RouteError:
+            failed += 1
+    t2 = time.perf_counter()
+    print(
+        f"{len(index):>6} obstacles  index {(t1 - t0) * 1e3:8.1f} ms  "
+        f"{routes / (t2 - t1):8.1f} routes/s  {failed} failed"
+    )
+
+
+if __name__ == "__main__":
+    for obstacles in [250, 500, 1000, 2000]:
+        bench(obstacles)
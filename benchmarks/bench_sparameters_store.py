@@ -0,0 +1,50 @@
+"""Benchmark of loading stored Sparameters for circuit simulations.
+
+    python benchmarks/bench_sparameters_store.py 1000 5000
+
+stores N 4-port results with 200 wavelengths and reports the time to load all
+of them in a new SparametersStore, against reading the same results from CSV.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import gdsfactory as gf
+from gdsfactory.simulation.sparameters_store import Sparameters, SparametersStore
+
+
+def bench(n: int) -> None:
+    dirpath = Path(tempfile.mkdtemp())
+    store = SparametersStore(dirpath / "store")
+    rng = np.random.default_rng(0)
+    c = gf.components.mmi2x2()
+    wavelengths = np.linspace(1.5, 1.6, 200)
+    ports = ("o1", "o2", "o3", "o4")
+    csvpaths = []
+    for i in range(n):
+        s = rng.normal(size=(200, 4, 4)) + 1j * rng.normal(size=(200, 4, 4))
+        sp = Sparameters(wavelengths=wavelengths, ports=ports, s=s)
+        store.put(sp, component=c, tool="meep", resolution=i)
+        csvpath = dirpath / f"{i}.csv"
+        sp.to_dataframe().to_csv(csvpath, index=False)
+        csvpaths.append(csvpath)
+
+    t0 = time.perf_counter()
+    results = SparametersStore(dirpath / "store").load()
+    store_time = time.perf_counter() - t0
+    assert len(results) == n
+
+    t0 = time.perf_counter()
+    for csvpath in csvpaths:
+        pd.read_csv(csvpath)
+    csv_time = time.perf_counter() - t0
+    print(f"{n:>6} results  store {store_time:6.3f} s  CSV {csv_time:6.3f} s")
+
+
+if __name__ == "__main__":
+    for n in [int(arg) for arg in sys.argv[1:]] or [1000, 5000]:
+        bench(n)
@@ -0,0 +1,65 @@
+"""Benchmark of Component region queries against a brute force search.
+
+    python benchmarks/bench_spatial_index.py 1000 10000 50000
+
+places N references at random on a 20 x 20 mm reticle and reports the time to
+build the index and to query a 500 um window, for the references and for the
+flattened polygons on the waveguide layer.
+"""
+import sys
+import time
+
+import numpy as np
+
+import gdsfactory as gf
+
+window = ((10e3, 10e3), (10.5e3, 10.5e3))
+
+
+def bench(n: int) -> None:
+    rng = np.random.default_rng(0)
+    cells = [gf.components.mmi1x2(), gf.components.bend_euler(), gf.components.ring()]
+    c = gf.Component(f"reticle_{n}")
+    for i in range(n):
+        ref = c << cells[i % len(cells)]
+        ref.move(tuple(rng.uniform(0, 20e3, 2)))
+    c.lock()
+
+    (xmin, ymin), (xmax, ymax) = window
+    t0 = time.perf_counter()
+    references = [
+        ref
+        for ref in c.references
+        if ref.xmin <= xmax and ref.xmax >= xmin and ref.ymin <= ymax
+        if ref.ymax >= ymin
+    ]
+    t1 = time.perf_counter()
+    polygons = [
+        polygon
+        for polygon in c.get_polygons(by_spec=gf.LAYER.WG)
+        if (polygon.min(axis=0) <= window[1]).all()
+        if (polygon.max(axis=0) >= window[0]).all()
+    ]
+    t2 = time.perf_counter()
+
+    c.get_references_in_bbox(window)
+    t3 = time.perf_counter()
+    assert c.get_references_in_bbox(window) == references
+    t4 = time.perf_counter()
+    c.get_polygons_in_bbox(window, layers=[gf.LAYER.WG])
+    t5 = time.perf_counter()
+    assert len(c.get_polygons_in_bbox(window, layers=[gf.LAYER.WG])) == len(polygons)
+    t6 = time.perf_counter()
+
+    print(
+        f"{n:>6} refs  "
+        f"references {1e3 * (t1 - t0):8.2f} ms -> build {1e3 * (t3 - t2):8.2f} ms "
+        f"query {1e3 * (t4 - t3):6.3f} ms  "
+        f"polygons {1e3 * (t2 - t1):8.2f} ms -> build {1e3 * (t5 - t4):8.2f} ms "
+        f"query {1e3 * (t6 - t5):6.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    for n in [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]:
+        bench(n)
@@ -0,0 +1,317 @@
+"""round_corners before it was vectorized, to benchmark and compare against.
+
+benchmarks/bench_round_corners.py checks that both return the same Route.
+"""
+from typing import Callable, List, Optional
+
+import numpy as np
+
+import gdsfactory as gf
+from gdsfactory.component import Component
+from gdsfactory.components.bend_euler import bend_euler
+from gdsfactory.components.bend_s import bend_s
+from gdsfactory.components.straight import straight as straight_function
+from gdsfactory.components.taper import taper as taper_function
+from gdsfactory.cross_section import strip
+from gdsfactory.routing.manhattan import (
+    TOLERANCE,
+    RouteError,
+    _get_bend_ports,
+    _get_bend_reference_parameters,
+    _get_straight_ports,
+    _is_horizontal,
+    _is_vertical,
+    gen_sref,
+    get_route_error,
+    get_straight_distance,
+    remove_flat_angles,
+)
+from gdsfactory.snap import snap_to_grid
+from gdsfactory.types import ComponentFactory, Coordinates, CrossSectionFactory, Route
+
+
+def round_corners_loop(
+    points: Coordinates,
+    straight: ComponentFactory = straight_function,
+    bend: ComponentFactory = bend_euler,
+    bend_s_factory: Optional[ComponentFactory] = bend_s,
+    taper: Optional[ComponentFactory] = None,
+    straight_fall_back_no_taper: Optional[ComponentFactory] = None,
+    mirror_straight: bool = False,
+    straight_ports: Optional[List[str]] = None,
+    cross_section: CrossSectionFactory = strip,
+    on_route_error: Callable = get_route_error,
+    with_point_markers: bool = False,
+    snap_to_grid_nm: Optional[int] = 1,
+    **kwargs,
+) -> Route:
+    """Returns Route, walking the points one segment at a time.
+
+    - references list with rounded straight route from a list of manhattan points.
+    - ports: Tuple of ports
+    - length: route length (float)
+
+    Args:
+        points: manhattan route defined by waypoints
+        bend90: the bend to use for 90Deg turns
+        straight: the straight library to use to generate straight portions
+        taper: taper for straight portions. If None, no tapering
+        straight_fall_back_no_taper: in case there is no space for two tapers
+        mirror_straight: mirror_straight waveguide
+        straight_ports: port names for straights. If None finds them automatically.
+        cross_section:
+        on_route_error: function to run when route fails
+        with_point_markers: add route points markers (easy for debugging)
+        snap_to_grid_nm: nm to snap to grid
+        kwargs: cross_section settings
+    """
+    x = cross_section(**kwargs)
+    points = (
+        gf.snap.snap_to_grid(points, nm=snap_to_grid_nm) if snap_to_grid_nm else points
+    )
+
+    auto_widen = x.info.get("auto_widen", False)
+    auto_widen_minimum_length = x.info.get("auto_widen_minimum_length", 200.0)
+    taper_length = x.info.get("taper_length", 10.0)
+    width = x.info.get("width", 2.0)
+    width_wide = x.info.get("width_wide", None)
+    references = []
+    bend90 = bend(cross_section=cross_section, **kwargs) if callable(bend) else bend
+    # bsx = bsy = _get_bend_size(bend90)
+    taper = taper or taper_function(
+        cross_section=cross_section,
+        width1=width,
+        width2=width_wide,
+        length=taper_length,
+    )
+    taper = taper(cross_section=cross_section, **kwargs) if callable(taper) else taper
+
+    # If there is a taper, make sure its length is known
+    if taper and isinstance(taper, Component):
+        if "length" not in taper.info:
+            _taper_ports = list(taper.ports.values())
+            taper.info["length"] = _taper_ports[-1].x - _taper_ports[0].x
+
+    straight_fall_back_no_taper = straight_fall_back_no_taper or straight
+
+    # Remove any flat angle, otherwise the algorithm won't work
+    points = remove_flat_angles(points)
+    points = np.array(points)
+
+    straight_sections = []  # (p0, angle, length)
+    p0_straight = points[0]
+    p1 = points[1]
+
+    total_length = 0  # Keep track of the total path length
+
+    if not bend90.info.get("length"):
+        raise ValueError(f"bend {bend90} needs to have bend.info['length'] defined")
+
+    bend_length = bend90.info["length"]
+
+    dp = p1 - p0_straight
+    bend_orientation = None
+    if _is_vertical(p0_straight, p1):
+        if dp[1] > 0:
+            bend_orientation = 90
+        elif dp[1] < 0:
+            bend_orientation = 270
+    elif _is_horizontal(p0_straight, p1):
+        if dp[0] > 0:
+            bend_orientation = 0
+        elif dp[0] < 0:
+            bend_orientation = 180
+
+    if bend_orientation is None:
+        return on_route_error(points=points, cross_section=x)
+
+    layer = x.info["layer"]
+    try:
+        pname_west, pname_north = [
+            p.name for p in _get_bend_ports(bend=bend90, layer=layer)
+        ]
+    except ValueError as exc:
+        raise ValueError(
+            f"Did not find 2 ports on layer {layer}. Got {list(bend90.ports.values())}"
+        ) from exc
+    n_o_bends = points.shape[0] - 2
+    total_length += n_o_bends * bend_length
+
+    previous_port_point = points[0]
+    bend_points = [previous_port_point]
+
+    # Add bend sections and record straight-section information
+    for i in range(1, points.shape[0] - 1):
+        bend_origin, rotation, x_reflection = _get_bend_reference_parameters(
+            points[i - 1], points[i], points[i + 1], bend90, x.info["layer"]
+        )
+        bend_ref = gen_sref(bend90, rotation, x_reflection, pname_west, bend_origin)
+        references.append(bend_ref)
+
+        dx_points = points[i][0] - points[i - 1][0]
+        dy_points = points[i][1] - points[i - 1][1]
+
+        if abs(dx_points) < TOLERANCE:
+            matching_ports = [
+                port
+                for port in bend_ref.ports.values()
+                if np.isclose(port.x, points[i][0])
+            ]
+
+        if abs(dy_points) < TOLERANCE:
+            matching_ports = [
+                port
+                for port in bend_ref.ports.values()
+                if np.isclose(port.y, points[i][1])
+            ]
+
+        if matching_ports:
+            next_port = matching_ports[0]
+            other_port_name = set(bend_ref.ports.keys()) - {next_port.name}
+            other_port = bend_ref.ports[list(other_port_name)[0]]
+            bend_points.append(next_port.midpoint)
+            bend_points.append(other_port.midpoint)
+            previous_port_point = other_port.midpoint
+
+        try:
+            straight_sections += [
+                (
+                    p0_straight,
+                    bend_orientation,
+                    get_straight_distance(p0_straight, bend_origin),
+                )
+            ]
+        except RouteError:
+            on_route_error(
+                points=(p0_straight, bend_origin),
+                cross_section=x,
+                references=references,
+            )
+
+        p0_straight = bend_ref.ports[pname_north].midpoint
+        bend_orientation = bend_ref.ports[pname_north].orientation
+
+    bend_points.append(points[-1])
+
+    try:
+        straight_sections += [
+            (
+                p0_straight,
+                bend_orientation,
+                get_straight_distance(p0_straight, points[-1]),
+            )
+        ]
+    except RouteError:
+        on_route_error(
+            points=(p0_straight, points[-1]),
+            cross_section=x,
+            references=references,
+        )
+
+    # with_point_markers=True
+    # print()
+    # for i, point in enumerate(points):
+    #     print(i, point)
+    # print()
+    # for i, point in enumerate(bend_points):
+    #     print(i, point)
+
+    # ensure bend connectivity
+    for i, point in enumerate(points[:-1]):
+        sx = np.sign(points[i + 1][0] - point[0])
+        sy = np.sign(points[i + 1][1] - point[1])
+        bsx = np.sign(bend_points[2 * i + 1][0] - bend_points[2 * i][0])
+        bsy = np.sign(bend_points[2 * i + 1][1] - bend_points[2 * i][1])
+        if bsx * sx == -1 or bsy * sy == -1:
+            return on_route_error(points=points, cross_section=x, references=references)
+
+    wg_refs = []
+    for straight_origin, angle, length in straight_sections:
+        with_taper = False
+        # wg_width = list(bend90.ports.values())[0].width
+        length = snap_to_grid(length)
+        total_length += length
+
+        if auto_widen and length > auto_widen_minimum_length and width_wide:
+            # Taper starts where straight would have started
+            with_taper = True
+            length = length - 2 * taper_length
+            taper_origin = straight_origin
+
+            pname_west, pname_east = [
+                p.name for p in _get_straight_ports(taper, layer=x.info["layer"])
+            ]
+            taper_ref = taper.ref(
+                position=taper_origin, port_id=pname_west, rotation=angle
+            )
+
+            references.append(taper_ref)
+            wg_refs += [taper_ref]
+
+            # Update start straight position
+            straight_origin = taper_ref.ports[pname_east].midpoint
+
+            # Straight waveguide
+            kwargs_wide = kwargs.copy()
+            kwargs_wide.update(width=width_wide)
+            cross_section_wide = gf.partial(cross_section, **kwargs_wide)
+            wg = straight(length=length, cross_section=cross_section_wide)
+        else:
+            wg = straight_fall_back_no_taper(
+                length=length, cross_section=cross_section, **kwargs
+            )
+
+        if straight_ports is None:
+            straight_ports = [
+                p.name for p in _get_straight_ports(wg, layer=x.info["layer"])
+            ]
+        pname_west, pname_east = straight_ports
+
+        wg_ref = wg.ref()
+        wg_ref.move(wg.ports[pname_west], (0, 0))
+        if mirror_straight:
+            wg_ref.reflect_v(list(wg_ref.ports.values())[0].name)
+
+        wg_ref.rotate(angle)
+        wg_ref.move(straight_origin)
+
+        if length > 0:
+            references.append(wg_ref)
+            wg_refs += [wg_ref]
+
+        port_index_out = 1
+        if with_taper:
+            # Second taper:
+            # Origin at end of straight waveguide, starting from east side of taper
+
+            taper_origin = wg_ref.ports[pname_east]
+            pname_west, pname_east = [
+                p.name for p in _get_straight_ports(taper, layer=x.info["layer"])
+            ]
+
+            taper_ref = taper.ref(
+                position=taper_origin,
+                port_id=pname_east,
+                rotation=angle + 180,
+                v_mirror=True,
+            )
+            # references += [
+            #     gf.Label(
+            #         text=f"a{angle}",
+            #         position=taper_ref.center,
+            #         layer=2,
+            #         texttype=0,
+            #     )
+            # ]
+            references.append(taper_ref)
+            wg_refs += [taper_ref]
+            port_index_out = 0
+
+    if with_point_markers:
+        route = get_route_error(points, cross_section=x)
+        references += route.references
+
+    port_input = list(wg_refs[0].ports.values())[0]
+    port_output = list(wg_refs[-1].ports.values())[port_index_out]
+    length = snap_to_grid(float(total_length))
+    return Route(references=references, ports=(port_input, port_output), length=length)
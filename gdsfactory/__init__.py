@@ -34,6 +34,7 @@ from gdsfactory.cell import clear_cache
 from gdsfactory.tech import LAYER
 from gdsfactory.show import show
 from gdsfactory.read.import_gds import import_gds
+from gdsfactory.read.import_oas import import_oas
 from gdsfactory.cross_section import CrossSection
 from gdsfactory.types import Label
 
@@ -109,6 +110,7 @@ __all__ = [
     "grid",
     "grid_with_text",
     "import_gds",
+    "import_oas",
     "klive",
     "layers",
     "mask",
@@ -0,0 +1,545 @@
+"""Bounded in-memory Component cache.
+
+The ``@cell`` decorator stores every Component it builds in ``gdsfactory.cell.CACHE``
+so that building the same cell twice returns the same object
+(and the GDS does not end up with two different cells with the same name).
+
+By default the cache is unbounded. For long builds (mask sweeps with thousands of
+parameter combinations) you can bound it by number of entries,
+number of polygons or number of bytes:
+
+.. code::
+
+    from gdsfactory.cache import ComponentCache
+    from gdsfactory.cell import set_cache
+
+    set_cache(ComponentCache(max_entries=10000, max_bytes=2e9))
+
+Least recently used cells are evicted first.
+Cells referenced by other cells still in the cache are pinned and never evicted,
+as evicting them would not free any memory.
+Evicted cells that are still alive (referenced by a Component that you hold)
+are returned again on the next lookup, so one name always maps to one Component.
+
+You can also enable a second level cache on disk (`DiskCache`),
+so later runs and worker processes load cells instead of rebuilding them:
+
+.. code::
+
+    from gdsfactory.cache import DiskCache
+    from gdsfactory.cell import set_disk_cache
+
+    set_disk_cache(DiskCache("~/.gdsfactory/cache/cells"))
+"""
+
+import functools
+import hashlib
+import importlib
+import inspect
+import io
+import os
+import pathlib
+import pickle
+import tempfile
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from loguru import logger
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    polygons: int
+    nbytes: int
+
+
+def get_component_size(component: Any) -> Tuple[int, int]:
+    """Returns (number of polygons, number of bytes) of the polygons owned by
+    a component, without counting its references (they are cached on their own)."""
+    polygons = 0
+    nbytes = 0
+    for polygonset in getattr(component, "polygons", []):
+        polygons += len(polygonset.polygons)
+        nbytes += sum(getattr(p, "nbytes", 0) for p in polygonset.polygons)
+    for path in getattr(component, "paths", []):
+        polygons += 1
+        nbytes += sum(getattr(p, "nbytes", 0) for p in getattr(path, "points", []))
+    return polygons, nbytes
+
+
+def get_children(component: Any) -> Tuple[Any, ...]:
+    """Returns the Components directly referenced by a component."""
+    children = []
+    for reference in getattr(component, "references", []):
+        child = getattr(reference, "parent", None) or getattr(
+            reference, "ref_cell", None
+        )
+        if child is not None:
+            children.append(child)
+    return tuple(children)
+
+
+class ComponentCache(MutableMapping):
+    """Least recently used Component cache with optional memory bounds.
+
+    Args:
+        max_entries: maximum number of cached Components (None: unbounded).
+        max_polygons: maximum number of polygons owned by cached Components.
+        max_bytes: maximum number of bytes of polygon points of cached Components.
+        sizeof: function that returns (polygons, nbytes) for a cached value.
+        keep_alive: if True, evicted values that are still referenced somewhere
+            else are returned on the next lookup instead of being rebuilt.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_polygons: Optional[int] = None,
+        max_bytes: Optional[float] = None,
+        sizeof: Callable[[Any], Tuple[int, int]] = get_component_size,
+        keep_alive: bool = True,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_polygons = max_polygons
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.keep_alive = keep_alive
+
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, Tuple[int, int]] = {}
+        self._children: Dict[Hashable, Tuple[Hashable, ...]] = {}
+        self._pins: Dict[Hashable, int] = {}
+        self._evicted = weakref.WeakValueDictionary()
+        self._key_by_id: Dict[int, Hashable] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.polygons = 0
+        self.nbytes = 0
+
+    def __getitem__(self, key: Hashable) -> Any:
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+        value = self._evicted.get(key) if self.keep_alive else None
+        if value is None:
+            self.misses += 1
+            raise KeyError(key)
+
+        self.hits += 1
+        del self._evicted[key]
+        self._insert(key, value)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        if key in self._data:
+            self._remove(key)
+        self._evicted.pop(key, None)
+        self._insert(key, value)
+
+    def __delitem__(self, key: Hashable) -> None:
+        if key not in self._data:
+            raise KeyError(key)
+        self._remove(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data or (self.keep_alive and key in self._evicted)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._data.keys()))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.cache_info()})"
+
+    def clear(self) -> None:
+        """Drops all cached values and resets the counters."""
+        self._data.clear()
+        self._sizes.clear()
+        self._children.clear()
+        self._pins.clear()
+        self._evicted = weakref.WeakValueDictionary()
+        self._key_by_id.clear()
+        self.hits = self.misses = self.evictions = 0
+        self.polygons = self.nbytes = 0
+
+    def cache_info(self) -> CacheInfo:
+        """Returns hits, misses, evictions and current size of the cache."""
+        return CacheInfo(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            entries=len(self._data),
+            polygons=self.polygons,
+            nbytes=self.nbytes,
+        )
+
+    def key_of(self, value: Any) -> Optional[Hashable]:
+        """Returns the key of a cached value (None if the value is not cached)."""
+        return self._key_by_id.get(id(value))
+
+    def is_pinned(self, key: Hashable) -> bool:
+        """Returns True if the value is referenced by another cached value."""
+        return self._pins.get(key, 0) > 0
+
+    def pin(self, key: Hashable) -> None:
+        """Prevents a cached value from being evicted until `unpin` is called."""
+        if key not in self._data:
+            raise KeyError(key)
+        self._pins[key] = self._pins.get(key, 0) + 1
+
+    def unpin(self, key: Hashable) -> None:
+        if self._pins.get(key, 0) > 0:
+            self._pins[key] -= 1
+
+    def resize(
+        self,
+        max_entries: Optional[int] = None,
+        max_polygons: Optional[int] = None,
+        max_bytes: Optional[float] = None,
+    ) -> None:
+        """Changes the cache bounds and evicts values that do not fit anymore."""
+        self.max_entries = max_entries
+        self.max_polygons = max_polygons
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def _insert(self, key: Hashable, value: Any) -> None:
+        polygons, nbytes = self.sizeof(value)
+        children = tuple(
+            self._key_by_id[id(child)]
+            for child in get_children(value)
+            if id(child) in self._key_by_id
+        )
+        self._data[key] = value
+        self._sizes[key] = (polygons, nbytes)
+        self._children[key] = children
+        self._key_by_id[id(value)] = key
+        self.polygons += polygons
+        self.nbytes += nbytes
+
+        for child in children:
+            self._pins[child] = self._pins.get(child, 0) + 1
+        self._evict()
+
+    def _remove(self, key: Hashable) -> Any:
+        value = self._data.pop(key)
+        polygons, nbytes = self._sizes.pop(key)
+        self.polygons -= polygons
+        self.nbytes -= nbytes
+        self._key_by_id.pop(id(value), None)
+
+        for child in self._children.pop(key):
+            if self._pins.get(child, 0) > 0:
+                self._pins[child] -= 1
+        return value
+
+    def _is_full(self) -> bool:
+        return (
+            (self.max_entries is not None and len(self._data) > self.max_entries)
+            or (self.max_polygons is not None and self.polygons > self.max_polygons)
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        )
+
+    def _evict(self) -> None:
+        """Evicts least recently used values until the cache fits its bounds.
+
+        Pinned values and the most recently used value are never evicted.
+        """
+        if not self._is_full():
+            return
+
+        candidates = list(self._data.keys())[:-1]
+        for key in candidates:
+            if not self._is_full():
+                break
+            if self._pins.get(key, 0) > 0 or key not in self._data:
+                continue
+            value = self._remove(key)
+            self.evictions += 1
+            if self.keep_alive:
+                try:
+                    self._evicted[key] = value
+                except TypeError:
+                    pass
+
+
+class DiskCache:
+    """Persistent Component cache, shared between runs and worker processes.
+
+    Each cell is pickled in its own file named after the hash of its cache key
+    (the cell name, which already hashes the changed arguments).
+    Cells referenced by the cached cell are stored as links to their own files,
+    so the hierarchy is not duplicated on disk or in memory.
+
+    Each file stores the source code hash of every cell function used to build
+    the cell hierarchy and of the helper modules in `SOURCE_MODULES`
+    (cross_section and path), and is ignored when any of them changes.
+    Changes to other functions called by your cells are not detected,
+    so clear the cache after editing them.
+
+    Args:
+        dirpath: directory to store the cells.
+    """
+
+    def __init__(self, dirpath: Optional[Union[str, pathlib.Path]] = None) -> None:
+        from gdsfactory.config import CONFIG
+
+        dirpath = dirpath or pathlib.Path(CONFIG["cache_directory"]) / "cells"
+        self.dirpath = pathlib.Path(dirpath).expanduser()
+        self.dirpath.mkdir(exist_ok=True, parents=True)
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({str(self.dirpath)!r})"
+
+    def get_path(self, key: Hashable) -> pathlib.Path:
+        key_hash = hashlib.md5(str(key).encode()).hexdigest()
+        return self.dirpath / f"{key_hash}.pkl"
+
+    def clear(self) -> None:
+        """Deletes all cells stored in the cache directory."""
+        for filepath in self.dirpath.glob("*.pkl"):
+            filepath.unlink()
+
+    def load(
+        self, key: Hashable, cache: Optional[ComponentCache] = None
+    ) -> Optional[Any]:
+        """Returns a cached Component or None if missing or stale.
+
+        Args:
+            key: cell cache key.
+            cache: in-memory cache where the referenced cells are looked up first
+                and where the cells loaded from disk are stored.
+        """
+        filepath = self.get_path(key)
+        if not filepath.exists():
+            self.misses += 1
+            return None
+
+        def persistent_load(pid: Tuple[str, Hashable]) -> Any:
+            _, child_key = pid
+            child = cache.get(child_key) if cache is not None else None
+            if child is None:
+                child = self.load(child_key, cache=cache)
+            if child is None:
+                raise pickle.UnpicklingError(f"cell {child_key!r} is not cached")
+            if cache is not None and child_key not in cache:
+                cache[child_key] = child
+            return child
+
+        try:
+            with open(filepath, "rb") as f:
+                unpickler = pickle.Unpickler(f)
+                header = unpickler.load()
+                if header.get("key") != key or not _sources_are_valid(
+                    header.get("sources", {}), header.get("modules", {})
+                ):
+                    self.misses += 1
+                    return None
+                unpickler.persistent_load = persistent_load
+                component = unpickler.load()
+        except Exception as exc:
+            logger.debug(f"DiskCache could not load {key!r}: {exc}")
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return component
+
+    def save(
+        self, key: Hashable, component: Any, cache: Optional[ComponentCache] = None
+    ) -> Optional[pathlib.Path]:
+        """Stores a Component and returns its filepath.
+
+        Returns None if the component cannot be stored (for example if it was
+        built by a function without source code or holds objects that cannot be
+        pickled, such as lambdas).
+
+        Args:
+            key: cell cache key.
+            component: to store.
+            cache: in-memory cache, referenced cells found in the cache are
+                stored as links.
+        """
+        try:
+            sources = _get_sources(component)
+        except Exception as exc:
+            logger.debug(f"DiskCache could not hash sources of {key!r}: {exc}")
+            return None
+
+        def persistent_id(obj: Any) -> Optional[Tuple[str, Hashable]]:
+            if obj is component or cache is None or not hasattr(obj, "references"):
+                return None
+            child_key = cache.key_of(obj)
+            if child_key is None:
+                return None
+            if not self.get_path(child_key).exists():
+                self.save(child_key, obj, cache=cache)
+            return ("cell", child_key)
+
+        filepath = self.get_path(key)
+        buffer = io.BytesIO()
+        try:
+            pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+            pickler.dump(dict(key=key, sources=sources, modules=_get_module_sources()))
+            pickler.persistent_id = persistent_id
+            pickler.dump(component)
+        except Exception as exc:
+            logger.debug(f"DiskCache could not pickle {key!r}: {exc}")
+            return None
+
+        # write to a temporary file first so other processes never read half a file
+        with tempfile.NamedTemporaryFile(
+            dir=self.dirpath, prefix=filepath.stem, suffix=".tmp", delete=False
+        ) as f:
+            f.write(buffer.getvalue())
+        os.replace(f.name, filepath)
+        return filepath
+
+
+def _get_function_source_hash(module: str, function_name: str) -> str:
+    from gdsfactory.cell import get_source_code
+
+    func = getattr(importlib.import_module(module), function_name)
+    return hashlib.md5(get_source_code(func).encode()).hexdigest()
+
+
+_source_hashes: Dict[Tuple[str, str], Optional[str]] = {}
+
+
+def get_function_source_hash(module: str, function_name: str) -> Optional[str]:
+    """Returns the md5 of a function source code (None if not available)."""
+    key = (module, function_name)
+    if key not in _source_hashes:
+        try:
+            _source_hashes[key] = _get_function_source_hash(module, function_name)
+        except Exception:
+            _source_hashes[key] = None
+    return _source_hashes[key]
+
+
+# modules with the helpers that cells call (cross_sections, paths, extrusion).
+# They are not cell functions, so their source is hashed as a whole.
+SOURCE_MODULES = ("gdsfactory.cross_section", "gdsfactory.path")
+
+_module_hashes: Dict[str, Optional[str]] = {}
+
+
+def get_module_source_hash(module: str) -> Optional[str]:
+    """Returns the md5 of a module source code (None if not available)."""
+    if module not in _module_hashes:
+        try:
+            source = inspect.getsource(importlib.import_module(module))
+            _module_hashes[module] = hashlib.md5(source.encode()).hexdigest()
+        except Exception:
+            _module_hashes[module] = None
+    return _module_hashes[module]
+
+
+def _get_module_sources() -> Dict[str, Optional[str]]:
+    return {module: get_module_source_hash(module) for module in SOURCE_MODULES}
+
+
+def get_cell_function(component: Any) -> Optional[Tuple[str, str]]:
+    """Returns (module, function_name) of the cell function that built a component.
+
+    Reads them from the lazy settings factory of the cell decorator when the
+    settings were not built yet, so it does not force building them.
+    """
+    settings_factory = getattr(component, "_settings_factory", None)
+    if isinstance(settings_factory, functools.partial):
+        func = settings_factory.keywords.get("func")
+        if func is not None:
+            return func.__module__, func.__name__
+
+    settings = component.settings
+    if isinstance(settings, dict):
+        module = settings.get("module")
+        function_name = settings.get("function_name")
+    else:
+        module = getattr(settings, "module", None)
+        function_name = getattr(settings, "function_name", None)
+    if module is None or function_name is None:
+        return None
+    return module, function_name
+
+
+# sources of locked components, so a hierarchy is only walked once
+_component_sources: "weakref.WeakKeyDictionary[Any, Dict[str, str]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_sources(component: Any) -> Dict[str, str]:
+    """Returns {module.function_name: source_hash} for the cells in a hierarchy."""
+    sources = _component_sources.get(component)
+    if sources is not None:
+        return sources
+
+    sources = {}
+    for child in get_children(component):
+        sources.update(_get_sources(child))
+
+    cell_function = get_cell_function(component)
+    if cell_function is not None:
+        module, function_name = cell_function
+        source_hash = get_function_source_hash(module, function_name)
+        if source_hash is None:
+            raise ValueError(f"No source code for {module}.{function_name}")
+        sources[f"{module}.{function_name}"] = source_hash
+
+    if getattr(component, "_locked", False):
+        _component_sources[component] = sources
+    return sources
+
+
+def _sources_are_valid(
+    sources: Dict[str, str], modules: Dict[str, Optional[str]]
+) -> bool:
+    for function, source_hash in sources.items():
+        module, function_name = function.rsplit(".", 1)
+        if get_function_source_hash(module, function_name) != source_hash:
+            return False
+    return modules == _get_module_sources()
+
+
+def test_component_cache_lru() -> None:
+    cache = ComponentCache(max_entries=2, sizeof=lambda value: (0, 0))
+    values = {key: type(key, (), {})() for key in "abc"}
+    for key, value in values.items():
+        cache[key] = value
+
+    assert list(cache) == ["b", "c"]
+    assert cache.evictions == 1
+    assert cache["a"] is values["a"], "live values are resurrected"
+
+    del values
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.cache_info().hits == 0
+
+
+if __name__ == "__main__":
+    test_component_cache_lru()
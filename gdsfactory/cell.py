@@ -3,16 +3,19 @@ import copy
 import functools
 import hashlib
 import inspect
-from typing import Any, Callable, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
 
+import numpy as np
 import toolz
 from phidl.device_layout import Device
 from pydantic import BaseModel, validate_arguments
 
-from gdsfactory.name import MAX_NAME_LENGTH, clean_name, get_name_short
-from gdsfactory.serialization import clean_dict, clean_value_name
+from gdsfactory.cache import ComponentCache, DiskCache
+from gdsfactory.name import MAX_NAME_LENGTH, _get_name_short, clean_name
+from gdsfactory.serialization import clean_dict, clean_value_json, clean_value_name
 
-CACHE: Dict[str, Device] = {}
+CACHE: ComponentCache = ComponentCache()
+DISK_CACHE: Optional[DiskCache] = None
 INFO_VERSION = 2
 
 
@@ -22,8 +25,40 @@ class CellReturnTypeError(ValueError):
 
 def clear_cache() -> None:
     """Clears Component CACHE."""
+    CACHE.clear()
+
+
+def get_cache() -> ComponentCache:
+    """Returns the Component CACHE used by the cell decorators."""
+    return CACHE
+
+
+def set_cache(cache: ComponentCache) -> None:
+    """Replaces the Component CACHE used by the cell decorators.
+
+    Args:
+        cache: for example ComponentCache(max_entries=10000) to bound memory
+            in long builds.
+    """
     global CACHE
-    CACHE = {}
+    if not isinstance(cache, ComponentCache):
+        raise TypeError(f"cache = {type(cache)} needs to be a ComponentCache")
+    CACHE = cache
+
+
+def set_disk_cache(disk_cache: Optional[DiskCache]) -> None:
+    """Enables (or disables with None) the on-disk Component cache.
+
+    Cells missing from CACHE are loaded from disk before being built,
+    and every new cell is stored on disk.
+
+    Args:
+        disk_cache: for example DiskCache(dirpath) or None.
+    """
+    global DISK_CACHE
+    if disk_cache is not None and not isinstance(disk_cache, DiskCache):
+        raise TypeError(f"disk_cache = {type(disk_cache)} needs to be a DiskCache")
+    DISK_CACHE = disk_cache
 
 
 def print_cache():
@@ -58,6 +93,119 @@ class Settings(BaseModel):
     child: Optional[Dict[str, Any]] = None
 
 
+def get_settings(
+    name: str,
+    func: Callable,
+    changed: Dict[str, Any],
+    default: Dict[str, Any],
+    full: Dict[str, Any],
+    info: Dict[str, Any],
+    child: Optional[Dict[str, Any]] = None,
+) -> Settings:
+    """Returns validated Settings from the raw arguments of a cell function.
+
+    Args:
+        name: component name.
+        func: cell function.
+        changed: arguments different from default.
+        default: default arguments, shared by all the calls of func.
+        full: explicitly passed arguments (merged on top of default).
+        info: component info.
+        child: settings of the child component, if any.
+    """
+    default = copy.deepcopy(default)
+    full_settings = dict(default)
+    full_settings.update(**full)
+    return Settings(
+        name=name,
+        module=func.__module__,
+        function_name=func.__name__,
+        changed=clean_dict(dict(changed)),
+        default=clean_dict(default),
+        full=clean_dict(full_settings),
+        info=info,
+        child=child,
+    )
+
+
+def freeze_settings(settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns settings with the mutable values (lists, dicts and arrays) cleaned.
+
+    The lazy settings of a cell are built from its arguments when first read,
+    so mutable arguments are cleaned into new objects at call time.
+    """
+    return {
+        key: clean_value_json(value)
+        if isinstance(value, (list, dict, np.ndarray))
+        else value
+        for key, value in settings.items()
+    }
+
+
+class SignatureInfo(NamedTuple):
+    parameters: Tuple[str, ...]
+    default: Dict[str, Any]
+    default_args: FrozenSet[str]
+    accepts_any_kwargs: bool
+
+
+@functools.lru_cache(maxsize=None)
+def get_signature_info(func: Callable) -> SignatureInfo:
+    """Returns the signature of a cell function, computed only once per function.
+
+    default_args are the default arguments as `key=value` strings used to
+    tell apart the arguments that change the cell name.
+    """
+    sig = inspect.signature(func)
+    default = {
+        p.name: p.default
+        for p in sig.parameters.values()
+        if p.default is not inspect.Parameter.empty
+    }
+    default_args = frozenset(
+        f"{key}={clean_value_name(value)}" for key, value in default.items()
+    )
+    return SignatureInfo(
+        parameters=tuple(sig.parameters.keys()),
+        default=default,
+        default_args=default_args,
+        accepts_any_kwargs="args" in sig.parameters
+        or "kwargs" in sig.parameters
+        or "settings" in sig.parameters,
+    )
+
+
+def get_name_signature(
+    prefix: str, changed: Dict[str, Any], default_args: FrozenSet[str]
+) -> Tuple[str, List[str]]:
+    """Returns cell name and the names of the arguments different from default.
+
+    Args:
+        prefix: name prefix.
+        changed: explicitly passed arguments.
+        default_args: default arguments as `key=value` strings.
+    """
+    # list of explicitly passed args as strings
+    passed_args_list = [
+        f"{key}={clean_value_name(changed[key])}" for key in sorted(changed.keys())
+    ]
+
+    # get only the args which are explicitly passed and different from defaults
+    changed_arg_list = sorted(set(passed_args_list).difference(default_args))
+
+    # if any args were different from default, append a hash of those args.
+    # else, keep only the base name
+    if changed_arg_list:
+        named_args_string = "_".join(changed_arg_list)
+        named_args_hash = hashlib.md5(named_args_string.encode()).hexdigest()[:8]
+        name_signature = clean_name(f"{prefix}_{named_args_hash}")
+    else:
+        name_signature = prefix
+
+    changed_arg_names = [carg.split("=")[0] for carg in changed_arg_list]
+    return name_signature, changed_arg_names
+
+
 def cell_without_validator(func):
     """Decorator for Component functions.
 
@@ -77,67 +225,34 @@ def cell_without_validator(func):
         prefix = kwargs.pop("prefix", func.__name__)
         max_name_length = kwargs.pop("max_name_length", MAX_NAME_LENGTH)
 
-        sig = inspect.signature(func)
-        args_as_kwargs = dict(zip(sig.parameters.keys(), args))
-        args_as_kwargs.update(**copy.deepcopy(kwargs))
-
-        default = {
-            p.name: p.default
-            for p in sig.parameters.values()
-            if not p.default == inspect._empty
-        }
-        changed = args_as_kwargs
-        full = copy.deepcopy(default)
-        full.update(**args_as_kwargs)
-
-        default2 = copy.deepcopy(default)
-        changed2 = copy.deepcopy(changed)
-
-        # list of default args as strings
-        default_args_list = [
-            f"{key}={clean_value_name(default2[key])}" for key in sorted(default.keys())
-        ]
-        # list of explicitly passed args as strings
-        passed_args_list = [
-            f"{key}={clean_value_name(changed2[key])}" for key in sorted(changed.keys())
-        ]
-
-        # get only the args which are explicitly passed and different from defaults
-        changed_arg_set = set(passed_args_list).difference(default_args_list)
-        changed_arg_list = sorted(changed_arg_set)
-
-        # if any args were different from default, append a hash of those args.
-        # else, keep only the base name
-        if changed_arg_list:
-            named_args_string = "_".join(changed_arg_list)
-            named_args_hash = hashlib.md5(named_args_string.encode()).hexdigest()[:8]
-            name_signature = clean_name(f"{prefix}_{named_args_hash}")
-        else:
-            name_signature = prefix
+        sig = get_signature_info(func)
+        args_as_kwargs = dict(zip(sig.parameters, args))
+        args_as_kwargs.update(**kwargs)
 
-        # filter the changed dictionary to only keep entries which have truly changed
-        changed_arg_names = [carg.split("=")[0] for carg in changed_arg_list]
-        changed = {k: changed[k] for k in changed_arg_names}
+        name_signature, changed_arg_names = get_name_signature(
+            prefix=prefix, changed=args_as_kwargs, default_args=sig.default_args
+        )
 
         name = name or name_signature
         decorator = kwargs.pop("decorator", None)
-        name = get_name_short(name, max_name_length=max_name_length)
+        name = _get_name_short(str(name), max_name_length=max_name_length)
 
-        if (
-            "args" not in sig.parameters
-            and "kwargs" not in sig.parameters
-            and "settings" not in sig.parameters
-        ):
+        if not sig.accepts_any_kwargs:
             for key in kwargs.keys():
-                if key not in sig.parameters.keys():
+                if key not in sig.parameters:
                     raise TypeError(
                         f"{func.__name__!r}() got invalid argument {key!r}\n"
-                        f"valid arguments are {list(sig.parameters.keys())}"
+                        f"valid arguments are {list(sig.parameters)}"
                     )
 
-        if cache and name in CACHE:
+        component = CACHE.get(name) if cache else None
+        if component is None and cache and DISK_CACHE is not None:
+            component = DISK_CACHE.load(name, cache=CACHE)
+            if component is not None:
+                CACHE[name] = component
+        if component is not None:
             # print(f"CACHE LOAD {name} {func.__name__}({arguments})")
-            return CACHE[name]
+            return component
         else:
             # print(f"BUILD {name} {func.__name__}({arguments})")
 
@@ -159,7 +274,7 @@ def cell_without_validator(func):
 
             if metadata_child and component.get_child_name:
                 component_name = f"{metadata_child['name']}_{name}"
-                component_name = get_name_short(
+                component_name = _get_name_short(
                     component_name, max_name_length=max_name_length
                 )
             else:
@@ -168,16 +283,24 @@ def cell_without_validator(func):
             if autoname:
                 component.name = component_name
 
+            # snapshot mutable arguments, the caller may change them after the call
+            full = freeze_settings(args_as_kwargs)
+            # filter the changed dictionary to only keep entries which have truly changed
+            changed = {k: full[k] for k in changed_arg_names}
+
             component.info.update(**info)
-            component.settings = Settings(
-                name=component_name,
-                module=func.__module__,
-                function_name=func.__name__,
-                changed=clean_dict(changed),
-                default=clean_dict(default),
-                full=clean_dict(full),
-                info=component.info,
-                child=metadata_child,
+            # settings are cleaned and validated only when someone reads them
+            component.set_settings_factory(
+                functools.partial(
+                    get_settings,
+                    name=component_name,
+                    func=func,
+                    changed=changed,
+                    default=sig.default,
+                    full=full,
+                    info=dict(component.info),
+                    child=metadata_child,
+                )
             )
 
             if decorator:
@@ -190,6 +313,8 @@ def cell_without_validator(func):
 
             component.lock()
             CACHE[name] = component
+            if cache and DISK_CACHE is not None:
+                DISK_CACHE.save(name, component, cache=CACHE)
             return component
 
     return _cell
@@ -207,6 +332,7 @@ def cell(func, *args, **kwargs):
     When decorate your functions with @cell you get:
 
     - CACHE: avoids creating duplicated cells.
+        You can bound its memory with `set_cache(ComponentCache(max_entries=...))`
     - name: gives Components a unique name based on parameters.
     - adds Component.info with default, changed and full component settings.
 
@@ -306,6 +432,35 @@ def demo(length: int = 3, wg_width: float = 0.5):
     return c
 
 
+def test_get_name_signature() -> None:
+    sig = get_signature_info(demo)
+    name, changed = get_name_signature(
+        prefix="demo", changed=dict(length=3, wg_width=0.6), default_args=sig.default_args
+    )
+    named_args_hash = hashlib.md5("wg_width=0.6".encode()).hexdigest()[:8]
+    assert name == f"demo_{named_args_hash}", name
+    assert changed == ["wg_width"], changed
+
+
+def test_settings_lazy() -> None:
+    c = wg(length=7, cache=False)
+    assert c._settings_factory is not None
+    assert c.settings.full["length"] == 7
+    assert c.settings.changed == dict(length=7)
+    assert c._settings_factory is None
+
+
+def test_settings_lazy_pickle() -> None:
+    import pickle
+
+    import gdsfactory as gf
+
+    c = gf.components.mzi(cache=False)
+    assert c._settings_factory is not None
+    c2 = pickle.loads(pickle.dumps(c))
+    assert c2.settings.name == c.settings.name
+
+
 def test_names() -> None:
     name_base = demo().name
     assert name_base.split("_")[0] == "demo", name_base
@@ -6,9 +6,8 @@ import tempfile
 import uuid
 import warnings
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
-import gdspy
 import networkx as nx
 import numpy as np
 import yaml
@@ -21,12 +20,21 @@ from gdsfactory.component_reference import ComponentReference, Coordinate, SizeI
 from gdsfactory.config import CONF, logger
 from gdsfactory.cross_section import CrossSection
 from gdsfactory.layers import LAYER_SET, LayerPhidl, LayerSet
+from gdsfactory.polygon_table import (
+    PolygonTable,
+    build_bounding_box,
+    build_polygon_table,
+    hash_polygon_table,
+    split_polygon_table,
+)
 from gdsfactory.port import (
     Port,
+    PortTable,
     auto_rename_ports,
     auto_rename_ports_counter_clockwise,
     auto_rename_ports_layer_orientation,
     auto_rename_ports_orientation,
+    get_port_table,
     map_ports_layer_to_orientation,
     map_ports_to_orientation_ccw,
     map_ports_to_orientation_cw,
@@ -34,6 +42,7 @@ from gdsfactory.port import (
 )
 from gdsfactory.serialization import clean_dict
 from gdsfactory.snap import snap_to_grid
+from gdsfactory.spatial_index import BoxIndex, get_polygon_boxes
 
 Plotter = Literal["holoviews", "matplotlib", "qt"]
 Axis = Literal["x", "y"]
@@ -83,6 +92,10 @@ class Component(Device):
 
     """
 
+    # counts unlock() calls, as they can add Components to the unlocked
+    # children of any locked Component
+    _unlock_count = 0
+
     def __init__(
         self,
         name: str = "Unnamed",
@@ -101,15 +114,46 @@ class Component(Device):
         self.name = name  # overwrite PHIDL's incremental naming convention
         self.info = {}
 
+        self._settings_factory = None
         self.settings = {}
         self._locked = False
         self.get_child_name = False
         self.version = version
         self.changelog = changelog
 
+    @property
+    def settings(self) -> Any:
+        """Returns settings (name, module, function_name, info, full, changed,
+        default and child settings).
+
+        Cells created with the cell decorator only clean and validate their
+        settings the first time they are read.
+        """
+        if self._settings_factory is not None:
+            self._settings = self._settings_factory()
+            self._settings_factory = None
+        return self._settings
+
+    @settings.setter
+    def settings(self, settings: Any) -> None:
+        self._settings = settings
+        self._settings_factory = None
+
+    def set_settings_factory(self, settings_factory: Callable[[], Any]) -> None:
+        """Sets a function that returns the settings when they are first read."""
+        self._settings_factory = settings_factory
+
+    def __reduce_ex__(self, protocol):
+        """Materializes the settings before pickling, as the settings factory
+        references the undecorated cell function that can not be pickled."""
+        self.settings
+        return super().__reduce_ex__(protocol)
+
     def unlock(self):
         """I recommend doing this only if you know what you are doing."""
         self._locked = False
+        self._unlocked_children = None
+        Component._unlock_count += 1
 
     def lock(self):
         """Makes sure components can't add new elements or move existing ones.
@@ -117,6 +161,7 @@ class Component(Device):
         component does not change others
         """
         self._locked = True
+        self._unlocked_children = None
 
     @classmethod
     def __get_validators__(cls):
@@ -289,6 +334,262 @@ class Component(Device):
         """
         return list(select_ports(self.ports, **kwargs).values())
 
+    def get_port_table(self) -> PortTable:
+        """Returns the ports as arrays (midpoints, orientations, widths).
+
+        Locked Components keep the table until ports are added or removed,
+        as their ports are not supposed to change.
+        """
+        table = getattr(self, "_port_table", None)
+        if (
+            table is None
+            or not self._locked
+            or len(table.ports) != len(self.ports)
+            or table.ports != tuple(self.ports.values())
+        ):
+            table = get_port_table(self.ports)
+            self._port_table = table if self._locked else None
+        return table
+
+    def get_nearest_port(
+        self, point: Coordinate, port_type: Optional[str] = None
+    ) -> Optional[Port]:
+        """Returns the port closest to a point, None if there are no ports.
+
+        Args:
+            point: (x, y).
+            port_type: only look at ports of this type (optical, electrical ...).
+        """
+        table = self.get_port_table()
+        distances = np.hypot(*(table.midpoints - np.asarray(point, dtype=float)).T)
+        if port_type is not None:
+            mask = [port.port_type == port_type for port in table.ports]
+            distances = np.where(mask, distances, np.inf)
+        if not len(distances) or np.isinf(distances.min()):
+            return None
+        return table.ports[int(np.argmin(distances))]
+
+    def _get_geometry_key(self, keep_alive: Optional[List[Any]] = None) -> Tuple:
+        """Returns a key that changes when the geometry of the Component changes.
+
+        Locked Components only check the number of elements, as their geometry
+        is not supposed to change, and the keys of the unlocked Components in
+        their hierarchy. Unlocked Components also check the polygon points and
+        the reference placements, including their children.
+        Changing the values of a points array in place is not detected.
+
+        Args:
+            keep_alive: list to append the objects that the key identifies,
+                so their ids can not be reused while the key is in use.
+        """
+        key = (len(self.polygons), len(self.paths), len(self.references))
+        if self._locked:
+            children = self._get_unlocked_children()
+            if not children:
+                return key
+            return key, tuple(child._get_geometry_key(keep_alive) for child in children)
+
+        polygons = tuple(tuple(map(id, polygon.polygons)) for polygon in self.polygons)
+        references = []
+        for reference in self.references:
+            parent = reference.ref_cell
+            origin = reference.origin
+            references.append(
+                (
+                    id(reference),
+                    id(parent),
+                    float(origin[0]),
+                    float(origin[1]),
+                    reference.rotation,
+                    reference.x_reflection,
+                    reference.magnification,
+                    (reference.columns, reference.rows, tuple(reference.spacing))
+                    if hasattr(reference, "spacing")
+                    else None,
+                    parent._get_geometry_key(keep_alive)
+                    if isinstance(parent, Component)
+                    else None,
+                )
+            )
+            if keep_alive is not None:
+                keep_alive.append((reference, parent))
+        if keep_alive is not None:
+            keep_alive.extend(tuple(polygon.polygons) for polygon in self.polygons)
+            keep_alive.extend(self.paths)
+        return key, polygons, tuple(map(id, self.paths)), tuple(references)
+
+    def _get_unlocked_children(self) -> Tuple["Component", ...]:
+        """Returns the unlocked Components referenced by this locked Component,
+        directly or through locked children.
+
+        Locked Components can not add references, so they are found again
+        only after a Component is unlocked.
+        """
+        cached = getattr(self, "_unlocked_children", None)
+        if cached is not None and cached[0] == Component._unlock_count:
+            return cached[1]
+        found: Dict[int, Component] = {}
+        for reference in self.references:
+            parent = reference.ref_cell
+            if not isinstance(parent, Component) or id(parent) in found:
+                continue
+            if parent._locked:
+                found.update((id(c), c) for c in parent._get_unlocked_children())
+            else:
+                found[id(parent)] = parent
+        children = tuple(found.values())
+        self._unlocked_children = (Component._unlock_count, children)
+        return children
+
+    def _get_geometry_cache(self) -> Dict[str, Any]:
+        """Returns the cache of derived geometry (bounding box, flattened
+        polygons, spatial index), emptied after the geometry changes.
+
+        Besides the geometry key, phidl flags moved references and polygons
+        by clearing `_bb_valid`, which also empties the cache.
+        """
+        cache = getattr(self, "_geometry_cache", None)
+        key = self._get_geometry_key()
+        if cache is None or cache["key"] != key or not self._bb_valid:
+            keep_alive: List[Any] = []
+            key = self._get_geometry_key(keep_alive)
+            cache = dict(key=key, keep_alive=keep_alive)
+            self._geometry_cache = cache
+            self._bb_valid = True
+        return cache
+
+    def get_polygon_table(self) -> PolygonTable:
+        """Returns the flattened polygons packed in arrays.
+
+        The table is kept until the Component changes, and references to this
+        Component transform it with NumPy instead of walking the hierarchy.
+        """
+        cache = self._get_geometry_cache()
+        if "polygon_table" not in cache:
+            cache["polygon_table"] = build_polygon_table(self)
+        return cache["polygon_table"]
+
+    def get_geometry_hash(self, precision: float = 1e-4) -> str:
+        """Returns a hash of the flattened polygons by layer and of the ports.
+
+        Unlike the name, the hash only depends on the geometry, so components
+        that look the same have the same hash regardless of their factory or
+        hierarchy. The polygons hash is kept until the Component changes.
+
+        Args:
+            precision: points are rounded to this grid (um).
+        """
+        cache = self._get_geometry_cache()
+        key = ("geometry_hash", precision)
+        if key not in cache:
+            cache[key] = hash_polygon_table(self.get_polygon_table(), precision)
+
+        h = hashlib.sha1(cache[key])
+        for name in sorted(self.ports):
+            port = self.ports[name]
+            midpoint = np.round(np.asarray(port.midpoint) / precision)
+            port_settings = (
+                name,
+                tuple(midpoint.astype(int).tolist()),
+                round(port.width / precision),
+                round((port.orientation or 0) % 360, 3),
+                tuple(port.layer),
+                port.port_type,
+            )
+            h.update(str(port_settings).encode())
+        return h.hexdigest()
+
+    def get_polygons(
+        self,
+        by_spec: Union[bool, Tuple[int, int]] = False,
+        depth: Optional[int] = None,
+    ) -> Union[List[np.ndarray], Dict[Tuple[int, int], List[np.ndarray]]]:
+        """Returns the polygons of the Component.
+
+        Without depth, the polygons come from the cached polygon table.
+
+        Args:
+            by_spec: True returns a dict of polygons by (layer, datatype).
+                A (layer, datatype) only returns the polygons of that spec.
+            depth: how many reference levels to flatten. None flattens all.
+        """
+        if depth is not None:
+            return super().get_polygons(by_spec=by_spec, depth=depth)
+        return split_polygon_table(self.get_polygon_table(), by_spec=by_spec)
+
+    def get_bounding_box(self) -> Optional[np.ndarray]:
+        """Returns the bounding box [[xmin, ymin], [xmax, ymax]] or None if empty.
+
+        The bounding box is kept until the Component changes.
+        """
+        cache = self._get_geometry_cache()
+        if "bbox" not in cache:
+            cache["bbox"] = build_bounding_box(self)
+        bbox = cache["bbox"]
+        return None if bbox is None else np.array(bbox)
+
+    def _get_reference_index(self) -> BoxIndex:
+        """Returns the index of the reference bounding boxes."""
+        index = self._get_geometry_cache()
+        if "references" not in index:
+            boxes = [reference.get_bounding_box() for reference in self.references]
+            boxes = [((0, 0), (0, 0)) if box is None else box for box in boxes]
+            index["references"] = BoxIndex(np.reshape(boxes, (-1, 4)))
+        return index["references"]
+
+    def _get_polygon_index(self) -> Dict[Layer, Tuple[BoxIndex, List[np.ndarray]]]:
+        """Returns the index of the flattened polygon bounding boxes by layer,
+        with the polygons."""
+        index = self._get_geometry_cache()
+        if "polygons" not in index:
+            index["polygons"] = {
+                layer: (BoxIndex(get_polygon_boxes(polygons)), polygons)
+                for layer, polygons in self.get_polygons(by_spec=True).items()
+            }
+        return index["polygons"]
+
+    def get_references_in_bbox(self, bbox) -> List[ComponentReference]:
+        """Returns the references whose bounding box overlaps or touches a bbox.
+
+        The index of the reference bounding boxes is built on the first query
+        and kept until the Component changes.
+
+        Args:
+            bbox: ((xmin, ymin), (xmax, ymax)).
+        """
+        indices = self._get_reference_index().query_indices(*np.ravel(bbox))
+        return [self.references[i] for i in indices]
+
+    def get_polygons_in_bbox(
+        self, bbox, layers: Optional[Layers] = None, by_spec: bool = False
+    ) -> Union[List[np.ndarray], Dict[Layer, List[np.ndarray]]]:
+        """Returns the flattened polygons whose bounding box overlaps or touches
+        a bbox.
+
+        The index of the polygon bounding boxes of each layer is built on the
+        first query and kept until the Component changes.
+
+        Args:
+            bbox: ((xmin, ymin), (xmax, ymax)).
+            layers: only return polygons on these layers. None returns all layers.
+            by_spec: returns a dict of polygons by layer.
+        """
+        polygons_index = self._get_polygon_index()
+        layers = (
+            polygons_index.keys()
+            if layers is None
+            else [_parse_layer(layer) for layer in layers]
+        )
+
+        polygons = {}
+        for layer in layers:
+            if layer in polygons_index:
+                boxes, layer_polygons = polygons_index[layer]
+                indices = boxes.query_indices(*np.ravel(bbox))
+                if len(indices):
+                    polygons[layer] = [layer_polygons[i].copy() for i in indices]
+        return polygons if by_spec else list(itertools.chain(*polygons.values()))
+
     def ref(
         self,
         position: Coordinate = (0, 0),
@@ -492,6 +793,7 @@ class Component(Device):
                 polygonset.datatypes = [
                     p for p, keep in zip(polygonset.datatypes, polygons_to_keep) if keep
                 ]
+            D._bb_valid = False
 
             if include_labels:
                 new_labels = []
@@ -805,6 +1107,8 @@ class Component(Device):
         timestamp: Optional[datetime.datetime] = _timestamp2019,
         logging: bool = True,
         on_duplicate_cell: Optional[str] = "warn",
+        max_workers: int = 1,
+        processes: bool = False,
     ) -> Path:
         """Write component to GDS and returns gdspath
 
@@ -817,63 +1121,86 @@ class Component(Device):
                 If None uses current time.
             logging: disable GDS path logging, for example for showing it in klayout.
             on_duplicate_cell: specify how to resolve duplicate-named cells. Choose one of the following:
-                "warn" (default): overwrite all duplicate cells with one of the duplicates (arbitrarily)
+                "warn" (default): write the last of the duplicate cells and warn
                 "error": throw a ValueError when attempting to write a gds with duplicate cells
-                "overwrite": overwrite all duplicate cells with one of the duplicates, without warning
+                "overwrite": write the last of the duplicate cells, without warning
                 None: do not try to resolve (at your own risk!)
+            max_workers: number of threads (or processes) that serialize cells.
+                The GDS is byte identical for any number of workers.
+            processes: serialize cells in a process pool instead of a thread pool.
+
+        Cells are streamed top cell first into the file (see gdsfactory.write_gds),
+        so writing does not need a list of all the cells of the design.
 
         """
+        from gdsfactory.write_gds import write_gds
+
         gdsdir = pathlib.Path(gdsdir)
         gdspath = gdspath or gdsdir / (self.name + ".gds")
         gdspath = pathlib.Path(gdspath)
         gdsdir = gdspath.parent
         gdsdir.mkdir(exist_ok=True, parents=True)
 
-        cells = self.get_dependencies(recursive=True)
-        cell_names = [cell.name for cell in list(cells)]
-        cell_names_unique = set(cell_names)
+        gdspath = write_gds(
+            component=self,
+            gdspath=gdspath,
+            unit=unit,
+            precision=precision,
+            timestamp=timestamp,
+            on_duplicate_cell=on_duplicate_cell,
+            max_workers=max_workers,
+            processes=processes,
+        )
 
-        if len(cell_names) != len(set(cell_names)):
-            for cell_name in cell_names_unique:
-                cell_names.remove(cell_name)
+        self.path = gdspath
+        if logging:
+            logger.info(f"Write GDS to {str(gdspath)!r}")
+        return gdspath
 
-            if on_duplicate_cell == "error":
-                cell_names_duplicated = "\n".join(set(cell_names))
-                raise ValueError(
-                    f"Duplicated cell names in {self.name!r}:\n{cell_names_duplicated}"
-                )
-            elif on_duplicate_cell in {"warn", "overwrite"}:
-                if on_duplicate_cell == "warn":
-                    cell_names_duplicated = "\n".join(set(cell_names))
-                    warnings.warn(
-                        f"Duplicated cell names in {self.name!r}:\n{cell_names_duplicated}"
-                    )
-                cells_dict = {cell.name: cell for cell in cells}
-                cells = cells_dict.values()
-            elif on_duplicate_cell is None:
-                pass
-            else:
-                raise ValueError(
-                    f"on_duplicate_cell: {on_duplicate_cell!r} not in (None, warn, error, overwrite)"
-                )
+    def write_oas(
+        self,
+        oaspath: Optional[PathType] = None,
+        gdsdir: PathType = tmp,
+        unit: float = 1e-6,
+        precision: float = 1e-9,
+        logging: bool = True,
+        **kwargs,
+    ) -> Path:
+        """Write component to OASIS and returns oaspath.
 
-        all_cells = [self] + list(cells)
+        Keeps the hierarchy, writes arrays and regular shape repetitions as
+        OASIS repetitions, ports as labels and settings as a top cell property.
+        You can read it back with gf.import_oas.
 
-        no_name_cells = [
-            cell.name for cell in all_cells if cell.name.startswith("Unnamed")
-        ]
+        Args:
+            oaspath: OASIS file path to write to.
+            gdsdir: directory for the OASIS file. Defaults to /tmp/
+            unit: unit size for objects in library. 1um by default.
+            precision: for object dimensions in the library (m). 1nm by default.
+            logging: disable OASIS path logging.
 
-        if no_name_cells:
-            warnings.warn(
-                f"Component {self.name!r} contains {len(no_name_cells)} Unnamed cells"
-            )
+        Keyword Args:
+            compression_level: 0 writes shapes one by one, higher levels
+                look harder for shape repetitions (10 by default).
+            cblocks: compress records with CBLOCK (True by default).
+            strict: write strict mode OASIS.
+            with_ports: write ports as text labels.
+            with_metadata: write component settings as a top cell property.
+            on_duplicate_cell: how to resolve duplicate-named cells.
+        """
+        from gdsfactory.write_oas import write_oas
 
-        lib = gdspy.GdsLibrary(unit=unit, precision=precision)
-        lib.write_gds(gdspath, cells=all_cells, timestamp=timestamp)
-        self.path = gdspath
+        gdsdir = pathlib.Path(gdsdir)
+        oaspath = oaspath or gdsdir / (self.name + ".oas")
+        oaspath = pathlib.Path(oaspath)
+        oaspath.parent.mkdir(exist_ok=True, parents=True)
+
+        oaspath = write_oas(
+            component=self, oaspath=oaspath, unit=unit, precision=precision, **kwargs
+        )
         if logging:
-            logger.info(f"Write GDS to {str(gdspath)!r}")
-        return gdspath
+            logger.info(f"Write OASIS to {str(oaspath)!r}")
+        return oaspath
 
     def write_gds_with_metadata(self, *args, **kwargs) -> Path:
         """Write component in GDS and metadata (component settings) in YAML"""
@@ -1,11 +1,19 @@
 from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
+import gdspy
 import numpy as np
 from numpy import cos, float64, int64, mod, ndarray, pi, sin
 from phidl.device_layout import Device, DeviceReference
 
+from gdsfactory.polygon_table import (
+    get_cell_polygon_table,
+    split_polygon_table,
+    transform_points,
+    transform_polygon_table,
+)
 from gdsfactory.port import (
     Port,
+    PortTable,
     map_ports_layer_to_orientation,
     map_ports_to_orientation_ccw,
     map_ports_to_orientation_cw,
@@ -126,13 +134,12 @@ class ComponentReference(DeviceReference):
             x_reflection=x_reflection,
         )
         self.parent = component
-        # The ports of a DeviceReference have their own unique id (uid),
+        # DeviceReference already copied the ports with their own unique id (uid),
         # since two DeviceReferences of the same parent Device can be
         # in different locations and thus do not represent the same port
-        self._local_ports = {
-            name: port._copy(new_uid=True) for name, port in component.ports.items()
-        }
         self.visual_label = visual_label
+        self._port_table = None
+        self._port_table_key = None
         # self.uid = str(uuid.uuid4())[:8]
 
     def __repr__(self) -> str:
@@ -171,6 +178,46 @@ class ComponentReference(DeviceReference):
             bbox = ((0, 0), (0, 0))
         return np.round(bbox, 3)
 
+    def get_bounding_box(self) -> Optional[ndarray]:
+        """Returns the bounding box [[xmin, ymin], [xmax, ymax]] or None if empty.
+
+        Transforms the cached bounding box of the parent, or the cached polygon
+        table for rotations that are not a multiple of 90 degrees.
+        """
+        if not isinstance(self.ref_cell, gdspy.Cell):
+            return None
+        if self.rotation is None or self.rotation % 90 == 0:
+            bbox = self.ref_cell.get_bounding_box()
+            if bbox is None:
+                return None
+            points = transform_points(bbox, [self])[0]
+        else:
+            table = get_cell_polygon_table(self.ref_cell)
+            if not len(table.points):
+                return None
+            points = transform_points(table.points, [self])[0]
+        return np.array([points.min(axis=0), points.max(axis=0)])
+
+    def get_polygons(
+        self,
+        by_spec: Union[bool, Tuple[int, int]] = False,
+        depth: Optional[int] = None,
+    ) -> Union[List[ndarray], Dict[Tuple[int, int], List[ndarray]]]:
+        """Returns the polygons of the reference.
+
+        Without depth, transforms the cached polygon table of the parent.
+
+        Args:
+            by_spec: True returns a dict of polygons by (layer, datatype).
+                A (layer, datatype) only returns the polygons of that spec.
+            depth: how many reference levels to flatten. None flattens all.
+        """
+        if depth is not None or not isinstance(self.ref_cell, gdspy.Cell):
+            return super().get_polygons(by_spec=by_spec, depth=depth)
+        table = get_cell_polygon_table(self.ref_cell)
+        (table,) = transform_polygon_table(table, [self])
+        return split_polygon_table(table, by_spec=by_spec)
+
     @classmethod
     def __get_validators__(cls):
         yield cls.validate
@@ -210,29 +257,58 @@ class ComponentReference(DeviceReference):
 
         return new_reference
 
+    def get_port_table(self) -> PortTable:
+        """Returns the ports of the parent transformed by the reference as arrays.
+
+        All ports are transformed at once, and the table is kept until the
+        reference moves or the parent ports change. The table holds the parent
+        Port objects, use `ports` for the transformed ones.
+        """
+        parent_table = self.parent.get_port_table()
+        origin = self.origin
+        transform = (
+            None if origin is None else (float(origin[0]), float(origin[1])),
+            self.rotation,
+            bool(self.x_reflection),
+        )
+        key = self._port_table_key
+        if key is not None and key[0] is parent_table and key[1] == transform:
+            return self._port_table
+
+        midpoints = np.array(parent_table.midpoints)
+        orientations = parent_table.orientations
+        if self.x_reflection:
+            midpoints[:, 1] = -midpoints[:, 1]
+            orientations = -orientations
+        if self.rotation is not None:
+            midpoints = _rotate_points(midpoints, angle=self.rotation, center=[0, 0])
+            orientations = orientations + self.rotation
+        if origin is not None:
+            midpoints = midpoints + np.array(origin)
+        orientations = mod(mod(orientations, 360), 360)
+
+        self._port_table = parent_table._replace(
+            midpoints=midpoints, orientations=orientations
+        )
+        self._port_table_key = (parent_table, transform)
+        return self._port_table
+
     @property
     def ports(self) -> Dict[str, Port]:
         """This property allows you to access myref.ports, and receive a copy
         of the ports dict which is correctly rotated and translated"""
-        for name, port in self.parent.ports.items():
-            port = self.parent.ports[name]
-            new_midpoint, new_orientation = self._transform_port(
-                port.midpoint,
-                port.orientation,
-                self.origin,
-                self.rotation,
-                self.x_reflection,
-            )
+        table = self.get_port_table()
+        for name, port, midpoint, orientation in zip(
+            table.names, table.ports, table.midpoints, table.orientations
+        ):
             if name not in self._local_ports:
                 self._local_ports[name] = port.copy(new_uid=True)
-            self._local_ports[name].midpoint = new_midpoint
-            self._local_ports[name].orientation = mod(new_orientation, 360)
+            self._local_ports[name].midpoint = midpoint.copy()
+            self._local_ports[name].orientation = orientation
             self._local_ports[name].parent = self
         # Remove any ports that no longer exist in the reference's parent
-        parent_names = self.parent.ports.keys()
-        local_names = list(self._local_ports.keys())
-        for name in local_names:
-            if name not in parent_names:
+        if len(self._local_ports) > len(table.names):
+            for name in set(self._local_ports).difference(table.names):
                 self._local_ports.pop(name)
         return self._local_ports
 
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import gdsfactory as gf
 from gdsfactory.add_padding import get_padding_points
 from gdsfactory.component import Component
@@ -10,7 +12,7 @@ from gdsfactory.types import CrossSectionOrFactory
 @gf.cell
 def bend_circular(
     angle: float = 90.0,
-    npoints: int = 720,
+    npoints: Optional[int] = 720,
     with_cladding_box: bool = True,
     cross_section: CrossSectionOrFactory = strip,
     **kwargs
@@ -19,7 +21,8 @@ def bend_circular(
 
     Args:
         angle: angle of arc (degrees)
-        npoints: number of points
+        npoints: number of points used per 360 degrees.
+            None uses the fewest points within half a grid step of the arc
         with_cladding_box: square in layers_cladding to remove DRC
         cross_section:
         kwargs: cross_section settings
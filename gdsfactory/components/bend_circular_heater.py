@@ -1,3 +1,5 @@
+from typing import Optional
+
 import gdsfactory as gf
 from gdsfactory.component import Component
 from gdsfactory.config import TECH
@@ -11,7 +13,7 @@ from gdsfactory.types import CrossSectionFactory
 def bend_circular_heater(
     radius: float = 10,
     angle: float = 90,
-    npoints: int = 720,
+    npoints: Optional[int] = 720,
     heater_to_wg_distance: float = 1.2,
     heater_width: float = 0.5,
     layer_heater=TECH.layer.HEATER,
@@ -22,7 +24,8 @@ def bend_circular_heater(
     Args:
         radius
         angle: angle of arc (degrees)
-        npoints: Number of points used per 360 degrees
+        npoints: Number of points used per 360 degrees.
+            None uses the fewest points within half a grid step of the curve
         heater_to_wg_distance:
         heater_width
         layer_heater
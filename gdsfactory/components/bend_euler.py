@@ -1,3 +1,5 @@
+from typing import Optional
+
 import gdsfactory as gf
 from gdsfactory.add_padding import get_padding_points
 from gdsfactory.component import Component
@@ -13,7 +15,7 @@ def bend_euler(
     angle: float = 90.0,
     p: float = 0.5,
     with_arc_floorplan: bool = True,
-    npoints: int = 720,
+    npoints: Optional[int] = 720,
     direction: str = "ccw",
     with_cladding_box: bool = True,
     cross_section: CrossSectionOrFactory = strip,
@@ -35,7 +37,8 @@ def bend_euler(
         with_arc_floorplan: If False: `radius` is the minimum radius of curvature
           If True: The curve scales such that the endpoints match a bend_circular
           with parameters `radius` and `angle`
-        npoints: Number of points used per 360 degrees
+        npoints: Number of points used per 360 degrees.
+            None uses the fewest points within half a grid step of the curve
         direction: cw (clock-wise) or ccw (counter clock-wise)
         with_cladding_box: to avoid DRC acute angle errors in cladding
         cross_section:
@@ -112,7 +115,7 @@ def bend_straight_bend(
     angle: float = 90,
     p: float = 0.5,
     with_arc_floorplan: bool = True,
-    npoints: int = 720,
+    npoints: Optional[int] = 720,
     direction: str = "ccw",
     with_cladding_box: bool = True,
     cross_section: CrossSectionOrFactory = strip,
@@ -127,7 +130,8 @@ def bend_straight_bend(
         with_arc_floorplan: If False: `radius` is the minimum radius of curvature
           If True: The curve scales such that the endpoints match a bend_circular
           with parameters `radius` and `angle`
-        npoints: Number of points used per 360 degrees
+        npoints: Number of points used per 360 degrees.
+            None uses the fewest points within half a grid step of the curve
         direction: cw (clock-wise) or ccw (counter clock-wise)
         with_cladding_box: to avoid DRC acute angle errors in cladding
         cross_section:
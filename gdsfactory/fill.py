@@ -1,7 +1,9 @@
 """Dummy fill to keep density constant."""
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 
+import numpy as np
 from phidl.geometry import fill_rectangle as _fill_rectangle
+from typing_extensions import Literal
 
 from gdsfactory.cell import cell
 from gdsfactory.component import Component
@@ -14,21 +16,25 @@ def fill_rectangle(
     component: Component,
     fill_layers: Layers,
     fill_size: Float2 = (5.0, 5.0),
-    avoid_layers: Optional[Layers] = None,
+    avoid_layers: Optional[Union[Layers, Literal["all"]]] = None,
     include_layers: Optional[Layers] = None,
     margin: float = 5.0,
     fill_densities: Union[float, Floats] = (0.5, 0.25, 0.7),
     fill_inverted: bool = False,
-    bbox: Optional[Float2] = None,
+    bbox: Optional[Tuple[Float2, Float2]] = None,
 ) -> Component:
     """Creates a rectangular fill pattern and fills all empty areas
     in the input component and returns a component that contains just the fill
     Dummy fill keeps density constant during fabrication
 
+    Only rasterizes the polygons within margin of the bbox, looked up in the component
+    spatial index, so filling a reticle window by window does not flatten
+    the whole reticle for every window.
+
     Args:
         component: Component to fill
         fill_size: Rectangular size of the fill element
-        avoid_layers: Layers to be avoided (not filled) in D
+        avoid_layers: Layers to be avoided (not filled) in D, or "all"
         include_layers: Layers to be filled, supercedes avoid_layers
         margin :
             Margin spacing around avoided areas -- fill will not come within
@@ -37,13 +43,24 @@ def fill_rectangle(
         fill_densities: float between 0 and 1
             Defines the fill pattern density (1.0 == fully filled)
         fill_inverted: Inverts the fill pattern
-        bbox: array-like[2][2]
+        bbox: ((xmin, ymin), (xmax, ymax))
             Limit the fill pattern to the area defined by this bounding box
-
     """
+    bbox = component.bbox if bbox is None else bbox
+    layers = (
+        None
+        if avoid_layers is None or avoid_layers == "all"
+        else tuple(avoid_layers) + tuple(include_layers or ())
+    )
+    # geometry up to margin outside the bbox still keeps the fill away
+    window = np.array(bbox) + np.array([[-margin, -margin], [margin, margin]])
+    polygons = component.get_polygons_in_bbox(window, layers=layers, by_spec=True)
+    region = Component()
+    for layer, layer_polygons in polygons.items():
+        region.add_polygon(layer_polygons, layer=layer)
 
     component_filled = _fill_rectangle(
-        component,
+        region,
         fill_size=fill_size,
         avoid_layers=avoid_layers or "all",
         include_layers=include_layers,
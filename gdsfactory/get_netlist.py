@@ -15,8 +15,9 @@ Assumes two ports are connected when they have same width, x, y
 
 """
 
-from typing import Tuple
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import omegaconf
 
 from gdsfactory.component import Component, ComponentReference
@@ -24,11 +25,33 @@ from gdsfactory.name import clean_name
 from gdsfactory.snap import snap_to_grid
 from gdsfactory.tech import LAYER
 
+LabelIndex = Dict[Tuple[float, float], str]
+
+
+def get_label_index(
+    component: Component, layer_label: Tuple[int, int] = LAYER.LABEL_INSTANCE
+) -> LabelIndex:
+    """Returns a dict of label (x, y) snapped to grid: label text.
+
+    When several labels are on the same position keeps the first one.
+
+    Args:
+        component: with labels
+        layer_label: ignores layer_label[1]
+    """
+    label_index = {}
+    for label in component.labels:
+        if label.layer == layer_label[0]:
+            xy = (snap_to_grid(label.position[0]), snap_to_grid(label.position[1]))
+            label_index.setdefault(xy, label.text)
+    return label_index
+
 
 def get_instance_name(
     component: Component,
     reference: ComponentReference,
     layer_label: Tuple[int, int] = LAYER.LABEL_INSTANCE,
+    label_index: Optional[LabelIndex] = None,
 ) -> str:
     """Returns the instance name from the label.
     If no label returns to instanceName_x_y
@@ -37,27 +60,78 @@ def get_instance_name(
         component: with labels
         reference: reference that needs naming
         layer_label: ignores layer_label[1]
+        label_index: from get_label_index, to avoid scanning all the labels
+            for each reference.
     """
 
     x = snap_to_grid(reference.x)
     y = snap_to_grid(reference.y)
-    labels = component.labels
+    if label_index is None:
+        label_index = get_label_index(component, layer_label=layer_label)
+
+    # try to get the instance name from a label
+    text = label_index.get((x, y))
+    if text is not None:
+        return text
 
     # default instance name follows componetName_x_y
-    text = clean_name(f"{reference.parent.name}_{x}_{y}")
+    return clean_name(f"{reference.parent.name}_{x}_{y}")
 
-    # text = f"{reference.parent.name}_X{int(x)}_Y{int(y)}"
-    # text = f"{reference.parent.name}_{reference.uid}"
 
-    # try to get the instance name from a label
-    for label in labels:
-        xl = snap_to_grid(label.position[0])
-        yl = snap_to_grid(label.position[1])
-        if x == xl and y == yl and label.layer == layer_label[0]:
-            # print(label.text, xl, yl, x, y)
-            return label.text
+def get_ports_table(
+    references: List[ComponentReference],
+) -> Tuple[List[Tuple[int, str]], np.ndarray]:
+    """Returns (reference index, port name) and an array with (x, y, width)
+    of all the reference ports.
+
+    Transforms the ports of all the references of the same parent at once,
+    instead of copying each port of each reference.
 
-    return text
+    Args:
+        references: list of references.
+    """
+    references_by_parent: Dict[int, List[int]] = {}
+    for i, reference in enumerate(references):
+        references_by_parent.setdefault(id(reference.parent), []).append(i)
+
+    keys = []
+    tables = []
+    for indices in references_by_parent.values():
+        port_table = references[indices[0]].parent.get_port_table()
+        ports = port_table.ports
+        if not ports:
+            continue
+
+        midpoints = port_table.midpoints
+        widths = port_table.widths
+        group = [references[i] for i in indices]
+        origins = np.array([reference.origin for reference in group], dtype=float)
+        rotations = np.array(
+            [reference.rotation or 0 for reference in group], dtype=float
+        )
+        x_reflections = np.array([bool(r.x_reflection) for r in group])
+
+        # GDS transformation: x reflection, rotation and then translation
+        xy = np.broadcast_to(midpoints, (len(group),) + midpoints.shape).copy()
+        xy[x_reflections, :, 1] *= -1
+        angles = np.deg2rad(rotations)
+        ca = np.cos(angles)
+        sa = np.sin(angles)
+        quarter_turns = np.mod(rotations, 90) == 0
+        ca[quarter_turns] = np.round(ca[quarter_turns])
+        sa[quarter_turns] = np.round(sa[quarter_turns])
+        x = xy[:, :, 0] * ca[:, None] - xy[:, :, 1] * sa[:, None]
+        y = xy[:, :, 0] * sa[:, None] + xy[:, :, 1] * ca[:, None]
+        x += origins[:, 0, None]
+        y += origins[:, 1, None]
+
+        tables.append(
+            np.stack([x, y, np.broadcast_to(widths, x.shape)], axis=-1).reshape(-1, 3)
+        )
+        keys += [(i, port.name) for i in indices for port in ports]
+
+    table = np.concatenate(tables) if tables else np.zeros((0, 3))
+    return keys, table
 
 
 def get_netlist(
@@ -86,17 +160,25 @@ def get_netlist(
     connections = {}
     top_ports = {}
 
-    for reference in component.references:
+    label_index = get_label_index(component, layer_label=layer_label)
+    references = list(component.references)
+    reference_names = []
+    metadata = {}
+
+    for reference in references:
         c = reference.parent
         origin = reference.origin
         x = float(snap_to_grid(origin[0]))
         y = float(snap_to_grid(origin[1]))
         reference_name = get_instance_name(
-            component, reference, layer_label=layer_label
+            component, reference, layer_label=layer_label, label_index=label_index
         )
+        reference_names.append(reference_name)
 
-        instances[reference_name] = c.metadata
-        instances[reference_name]["info"] = c.info
+        if id(c) not in metadata:
+            metadata[id(c)] = c.metadata
+            metadata[id(c)]["info"] = c.info
+        instances[reference_name] = metadata[id(c)]
 
         placements[reference_name] = dict(
             x=x,
@@ -105,56 +187,52 @@ def get_netlist(
             mirror=reference.x_reflection,
         )
 
-    # store where ports are located
-    name2port = {}
-
-    # Initialize a dict of port locations to Instance1Name,PortNames
-    port_locations = {}
-
     # TOP level ports
     ports = component.get_ports(depth=0)
-    top_ports_list = set()
-    for port in ports:
-        src = port.name
-        name2port[src] = port
-        top_ports_list.add(src)
+    top_ports_list = {port.name for port in ports}
+    names = [port.name for port in ports]
+    table = [(port.x, port.y, port.width) for port in ports]
 
     # lower level ports
-    for reference in component.references:
-        for port in reference.ports.values():
-            reference_name = get_instance_name(
-                component, reference, layer_label=layer_label
-            )
-            src = f"{reference_name},{port.name}"
-            name2port[src] = port
-
-    # build connectivity port_locations = Dict[Tuple(x,y,width), set of portNames]
-    for name, port in name2port.items():
-        xyw = tuple(
-            round(1000 * v)
-            for v in snap_to_grid((port.x, port.y, port.width), nm=tolerance)
+    keys, references_table = get_ports_table(references)
+    names += [f"{reference_names[i]},{port_name}" for i, port_name in keys]
+    table = np.concatenate(
+        [np.array(table, dtype=float).reshape(-1, 3), references_table]
+    )
+
+    # references with the same name: the last port with each name wins
+    rows = {name: row for row, name in enumerate(names)}
+    if len(rows) < len(names):
+        names = list(rows.keys())
+        table = table[list(rows.values())]
+
+    # build connectivity grouping ports with the same (x, y, width) on grid
+    xyw = np.round(1000 * snap_to_grid(table, nm=tolerance)).astype(np.int64)
+    locations, inverse, counts = np.unique(
+        xyw, axis=0, return_inverse=True, return_counts=True
+    )
+    inverse = inverse.reshape(-1)
+
+    if np.any(counts > 2):
+        location = int(np.argmax(counts > 2))
+        x, y, w = locations[location] / 1000
+        names_list = [names[i] for i in np.flatnonzero(inverse == location)]
+        raise ValueError(
+            f"more than 2 connections at {x, y} {names_list}, width  = {w} "
         )
-        if xyw not in port_locations:
-            port_locations[xyw] = set()
-        port_locations[xyw].add(name)
-
-    for xyw, names_set in port_locations.items():
-        if len(names_set) > 2:
-            x, y, w = (v / 1000 for v in xyw)
-            raise ValueError(
-                f"more than 2 connections at {x, y} {list(names_set)}, width  = {w} "
-            )
-        if len(names_set) == 2:
-            names_list = list(names_set)
-            src = names_list[0]
-            dst = names_list[1]
-            if src in top_ports_list:
-                top_ports[src] = dst
-            elif dst in top_ports_list:
-                top_ports[dst] = src
-            else:
-                src_dest = sorted([src, dst])
-                connections[src_dest[0]] = src_dest[1]
+
+    order = np.argsort(inverse, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    for start in starts[counts == 2]:
+        src = names[order[start]]
+        dst = names[order[start + 1]]
+        if src in top_ports_list:
+            top_ports[src] = dst
+        elif dst in top_ports_list:
+            top_ports[dst] = src
+        else:
+            src_dest = sorted([src, dst])
+            connections[src_dest[0]] = src_dest[1]
 
     connections_sorted = {k: connections[k] for k in sorted(list(connections.keys()))}
     placements_sorted = {k: placements[k] for k in sorted(list(placements.keys()))}
@@ -8,15 +8,20 @@ import pydantic
 MAX_NAME_LENGTH = 32
 
 
-@pydantic.validate_arguments
-def get_name_short(name: str, max_name_length=MAX_NAME_LENGTH) -> str:
-    """Returns a short name."""
+def _get_name_short(name: str, max_name_length: int = MAX_NAME_LENGTH) -> str:
+    """Returns a short name without validating the arguments (cell hot path)."""
     if len(name) > max_name_length:
         name_hash = hashlib.md5(name.encode()).hexdigest()[:8]
         name = f"{name[:(max_name_length - 9)]}_{name_hash}"
     return name
 
 
+@pydantic.validate_arguments
+def get_name_short(name: str, max_name_length=MAX_NAME_LENGTH) -> str:
+    """Returns a short name."""
+    return _get_name_short(name, max_name_length=max_name_length)
+
+
 def join_first_letters(name: str) -> str:
     """Join the first letter of a name separated with underscores.
 
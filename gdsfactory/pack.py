@@ -3,7 +3,7 @@ adapted from phidl.geometry.
 """
 
 import warnings
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 from pydantic import validate_arguments
@@ -19,17 +19,121 @@ from gdsfactory.types import (
 )
 
 
+def _pack_maxrects(
+    widths: np.ndarray, heights: np.ndarray, box_size: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns x, y and packed mask of rectangles packed with rectpack MaxRects.
+
+    Rectangles are packed in the order they are given.
+
+    Args:
+        widths: rectangle widths.
+        heights: rectangle heights.
+        box_size: bin (width, height).
+    """
+    import rectpack
+
+    rect_packer = rectpack.newPacker(
+        mode=rectpack.PackingMode.Offline,
+        pack_algo=rectpack.MaxRectsBlsf,
+        sort_algo=rectpack.SORT_NONE,
+        bin_algo=rectpack.PackingBin.BBF,
+        rotation=False,
+    )
+    for rid, (w, h) in enumerate(zip(widths.tolist(), heights.tolist())):
+        rect_packer.add_rect(width=w, height=h, rid=rid)
+    rect_packer.add_bin(width=box_size[0], height=box_size[1])
+    rect_packer.pack()
+
+    x = np.zeros(len(widths), dtype=np.int64)
+    y = np.zeros(len(widths), dtype=np.int64)
+    packed = np.zeros(len(widths), dtype=bool)
+    if len(rect_packer):
+        for rx, ry, _, _, rid in rect_packer[0].rect_list():
+            x[rid], y[rid], packed[rid] = rx, ry, True
+    return x, y, packed
+
+
+def _pack_skyline(
+    widths: np.ndarray, heights: np.ndarray, box_size: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns x, y and packed mask of rectangles packed with a bottom-left skyline.
+
+    The skyline is the top edge of the packed rectangles, stored as segments
+    starting at `skyline_x` with height `skyline_y`. Each rectangle goes
+    where its bottom is lowest (then leftmost), evaluating every segment as a
+    start position at once with numpy. Rectangles are packed in the order they
+    are given, and the ones that do not fit in the box are skipped.
+
+    Args:
+        widths: rectangle widths.
+        heights: rectangle heights.
+        box_size: bin (width, height).
+    """
+    box_width, box_height = box_size
+    x = np.zeros(len(widths), dtype=np.int64)
+    y = np.zeros(len(widths), dtype=np.int64)
+    packed = np.zeros(len(widths), dtype=bool)
+
+    skyline_x = np.zeros(1, dtype=np.int64)
+    skyline_y = np.zeros(1, dtype=np.int64)
+
+    for i, (w, h) in enumerate(zip(widths.tolist(), heights.tolist())):
+        n = len(skyline_x)
+        # segments [start, end) under the rectangle for each start segment
+        ends = np.searchsorted(skyline_x, skyline_x + w)
+        bounds = np.stack([np.arange(n), ends], axis=1).ravel()
+        bottoms = np.maximum.reduceat(np.append(skyline_y, 0), bounds)[::2]
+        fits = (skyline_x + w <= box_width) & (bottoms + h <= box_height)
+        if not fits.any():
+            continue
+
+        candidates = np.flatnonzero(fits)
+        start = candidates[np.argmin(bottoms[candidates])]
+        end = ends[start]
+        x0 = skyline_x[start]
+        top = bottoms[start] + h
+        x[i], y[i], packed[i] = x0, bottoms[start], True
+
+        # replace the segments under the rectangle by its top edge
+        new_x = [] if start and skyline_y[start - 1] == top else [x0]
+        new_y = [top] if new_x else []
+        next_x = skyline_x[end] if end < n else box_width
+        if x0 + w < next_x:
+            new_x.append(x0 + w)
+            new_y.append(skyline_y[end - 1])
+        elif end < n and skyline_y[end] == top:
+            end += 1
+        skyline_x = np.concatenate([skyline_x[:start], new_x, skyline_x[end:]])
+        skyline_y = np.concatenate([skyline_y[:start], new_y, skyline_y[end:]])
+        skyline_x = skyline_x.astype(np.int64, copy=False)
+        skyline_y = skyline_y.astype(np.int64, copy=False)
+
+    return x, y, packed
+
+
+pack_algorithms = {"maxrects": _pack_maxrects, "skyline": _pack_skyline}
+
+
 def _pack_single_bin(
     rect_dict: Dict[int, Tuple[Number, Number]],
     aspect_ratio: Tuple[Number, Number],
     max_size: Tuple[float, float],
     sort_by_area: bool,
     density: float,
+    algorithm: str = "maxrects",
 ) -> Tuple[Dict[int, Tuple[Number, Number, Number, Number]], Dict[Any, Any]]:
     """Packs a dict of rectangles {id:(w,h)} and tries to
     pack it into a bin as small as possible with aspect ratio `aspect_ratio`
-    Will iteratively grow the bin size until everything fits or the bin size
-    reaches `max_size`.
+
+    Tries bins that grow by a `density` factor from the total area, and returns
+    the first one that fits everything (or stops at `max_size`).
+    Instead of trying every size in order, it estimates a bin that fits with
+    the skyline packing, which is fast, and binary searches the sizes between
+    the total area and that bin, growing from there if none of them fit.
+    So it returns the same bin (and density) as growing the bin step by step,
+    when larger bins always fit.
+    The rectangles are sorted only once for all the attempts.
 
     Args:
         rect_dict: dict of rectangles {id: (w, h)} to pack
@@ -37,61 +141,90 @@ def _pack_single_bin(
         max_size: tuple of max X, Y size
         sort_by_area: sorts components by area
         density: of packing, closer to 1 packs tighter (more compute heavy)
+        algorithm: maxrects (rectpack) or skyline (faster for many rectangles)
 
     Returns:
         packed rectangles dict {id:(x,y,w,h)}
         dict of remaining unpacked rectangles
     """
-    import rectpack
-
-    # Compute total area and use it for an initial estimate of the bin size
-    total_area = 0
-    for r in rect_dict.values():
-        total_area += r[0] * r[1]
-    aspect_ratio = np.asarray(aspect_ratio) / np.linalg.norm(aspect_ratio)  # Normalize
-
-    # Setup variables
-    box_size = np.asarray(aspect_ratio * np.sqrt(total_area), dtype=np.float64)
-    box_size = np.clip(box_size, None, max_size)
-    if sort_by_area:
-        rp_sort = rectpack.SORT_AREA
-    else:
-        rp_sort = rectpack.SORT_NONE
-
-    # Repeatedly run the rectangle-packing algorithm with increasingly larger
-    # areas until everything fits or we've reached the maximum size
-    while True:
-        # Create the pack object
-        rect_packer = rectpack.newPacker(
-            mode=rectpack.PackingMode.Offline,
-            pack_algo=rectpack.MaxRectsBlsf,
-            sort_algo=rp_sort,
-            bin_algo=rectpack.PackingBin.BBF,
-            rotation=False,
+    if algorithm not in pack_algorithms:
+        raise ValueError(
+            f"algorithm {algorithm!r} not in {list(pack_algorithms.keys())}"
         )
+    pack_function = pack_algorithms[algorithm]
 
-        # Add each rectangle to the pack, create a single bin, and pack
-        for rid, r in rect_dict.items():
-            rect_packer.add_rect(width=r[0], height=r[1], rid=rid)
-        rect_packer.add_bin(width=box_size[0], height=box_size[1])
-        rect_packer.pack()
+    rids = list(rect_dict.keys())
+    sizes = np.array(list(rect_dict.values()), dtype=np.int64).reshape(-1, 2)
+    if sort_by_area:
+        order = np.argsort(-sizes[:, 0] * sizes[:, 1], kind="stable")
+        rids = [rids[i] for i in order]
+        sizes = sizes[order]
+    widths, heights = sizes[:, 0], sizes[:, 1]
 
-        # Adjust the box size for next time
-        box_size *= density  # Increase area to try to fit
-        box_size = np.clip(box_size, None, max_size)
+    aspect_ratio = np.asarray(aspect_ratio) / np.linalg.norm(aspect_ratio)  # Normalize
+    max_size = np.asarray(max_size, dtype=np.float64)
+
+    def pack_scale(scale: float, pack_function: Callable):
+        box_size = np.clip(aspect_ratio * scale, None, max_size)
+        x, y, packed = pack_function(widths, heights, box_size)
+        return box_size, x, y, packed
+
+    # Bin scales are searched on the same grid as growing the bin by `density`
+    # from the total area, scale0 * density**k, so the search finds the same bin
+    # as trying every step in order, with far fewer attempts
+    total_area = float(np.sum(widths * heights))
+    scale0 = np.sqrt(total_area) or 1.0
+
+    def get_step(scale: float) -> int:
+        return int(np.ceil(np.log(scale / scale0) / np.log(density) - 1e-9))
+
+    # Lower bound: a box with the total area that fits the largest rectangle
+    scale = max(
+        np.sqrt(total_area / np.prod(aspect_ratio)),
+        widths.max() / aspect_ratio[0],
+        heights.max() / aspect_ratio[1],
+    )
+    step_fail = get_step(scale) - 1
 
-        # Quit the loop if we've packed all the rectangles or reached the max size
-        if len(rect_packer.rect_list()) == len(rect_dict):
-            break
-        if all(box_size >= max_size):
+    # Grow a skyline packing, which is fast, until everything fits
+    # or we've reached the maximum size. The height used by the rectangles
+    # that fit estimates the next scale.
+    while True:
+        box_size, x, y, packed = pack_scale(scale, _pack_skyline)
+        if packed.all() or np.all(box_size >= max_size):
             break
+        height = np.max(y[packed] + heights[packed], initial=0)
+        scale = max(scale * density, height / aspect_ratio[1])
+
+    # Binary search the steps below the box that fits the skyline packing
+    step = max(get_step(scale), step_fail + 1)
+    best = None
+    while step - step_fail > 1:
+        step_mid = (step + step_fail) // 2
+        result = pack_scale(scale0 * density**step_mid, pack_function)
+        if result[3].all():
+            step, best = step_mid, result
+        else:
+            step_fail = step_mid
+
+    # If none of them fit, grow from that box until everything fits
+    # or we've reached the maximum size
+    while best is None:
+        result = pack_scale(scale0 * density**step, pack_function)
+        if result[3].all() or np.all(result[0] >= max_size):
+            best = result
+        step += 1
+
+    _, x, y, packed = best
 
     # Separate packed from unpacked rectangles, make dicts of form {id:(x,y,w,h)}
-    packed_rect_dict = {r[-1]: r[:-1] for r in rect_packer[0].rect_list()}
+    packed_rect_dict = {}
     unpacked_rect_dict = {}
-    for k, v in rect_dict.items():
-        if k not in packed_rect_dict:
-            unpacked_rect_dict[k] = v
+    for i, rid in enumerate(rids):
+        if packed[i]:
+            packed_rect_dict[rid] = (x[i], y[i], widths[i], heights[i])
+        else:
+            unpacked_rect_dict[rid] = rect_dict[rid]
 
     return packed_rect_dict, unpacked_rect_dict
 
@@ -113,6 +246,7 @@ def pack(
     rotation: int = 0,
     h_mirror: bool = False,
     v_mirror: bool = False,
+    algorithm: str = "maxrects",
 ) -> List[Component]:
     """Pack a list of components into as few Components as possible.
 
@@ -135,12 +269,18 @@ def pack(
         rotation: for each component in degrees
         h_mirror: horizontal mirror in y axis (x, 1) (1, 0). This is the most common.
         v_mirror: vertical mirror using x axis (1, y) (0, y)
+        algorithm: maxrects (rectpack MaxRects) or skyline.
+            skyline is much faster for thousands of components.
     """
     if density < 1.01:
         raise ValueError(
             "pack() `density` argument is too small. "
             "The density argument must be >= 1.01"
         )
+    if algorithm not in pack_algorithms:
+        raise ValueError(
+            f"algorithm {algorithm!r} not in {list(pack_algorithms.keys())}"
+        )
 
     # Santize max_size variable
     max_size = [np.inf if v is None else v for v in max_size]
@@ -173,6 +313,7 @@ def pack(
             max_size=max_size,
             sort_by_area=sort_by_area,
             density=density,
+            algorithm=algorithm,
         )
         packed_list.append(packed_rect_dict)
 
@@ -258,6 +399,53 @@ def test_pack_with_settings() -> Component:
     return c
 
 
+def test_pack_skyline() -> None:
+    import gdsfactory as gf
+
+    component_list = [
+        gf.components.rectangle(size=(i, 2 * i), port_type=None) for i in range(1, 10)
+    ]
+    component_list += [
+        gf.components.rectangle(size=(2 * i, i), port_type=None) for i in range(1, 10)
+    ]
+    packed = pack(component_list, spacing=1, max_size=(20, 20), algorithm="skyline")
+    assert len(packed) > 1
+    assert sum(len(c.references) for c in packed) == len(component_list)
+
+    for c in packed:
+        assert c.xsize <= 20 and c.ysize <= 20
+        bboxes = [ref.bbox for ref in c.references]
+        for i, (min1, max1) in enumerate(bboxes):
+            for min2, max2 in bboxes[i + 1 :]:
+                overlap = np.minimum(max1, max2) - np.maximum(min1, min2)
+                assert (overlap < 1 - 1e-3).any(), "overlapping references"
+
+
+def test_pack_single_bin_steps() -> None:
+    """The search returns the first bin that fits when growing by density."""
+    rng = np.random.default_rng(0)
+    sizes = rng.integers(500, 20000, size=(60, 2))
+    rect_dict = {i: tuple(size) for i, size in enumerate(sizes.tolist())}
+    packed, unpacked = _pack_single_bin(
+        rect_dict,
+        aspect_ratio=(1, 1),
+        max_size=(np.inf, np.inf),
+        sort_by_area=True,
+        density=1.1,
+    )
+    assert not unpacked
+    width = max(x + w for x, y, w, h in packed.values())
+    height = max(y + h for x, y, w, h in packed.values())
+
+    order = np.argsort(-sizes[:, 0] * sizes[:, 1], kind="stable")
+    widths, heights = sizes[order, 0], sizes[order, 1]
+    box_size = np.sqrt(np.sum(widths * heights)) * np.sqrt(0.5) * np.ones(2)
+    while not _pack_maxrects(widths, heights, box_size)[2].all():
+        box_size *= 1.1
+    assert width <= box_size[0] and height <= box_size[1]
+    assert max(width, height) > box_size[0] / 1.1
+
+
 if __name__ == "__main__":
     # test_pack()
     import gdsfactory as gf
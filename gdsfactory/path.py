@@ -7,7 +7,7 @@ The CrossSection defines the layer numbers, widths and offsetts
 Based on phidl.path
 """
 
-from collections.abc import Iterable
+import hashlib
 from typing import Optional
 
 import numpy as np
@@ -16,9 +16,11 @@ from phidl.device_layout import Path as PathPhidl
 from phidl.device_layout import _simplify
 from phidl.path import smooth as smooth_phidl
 
-from gdsfactory.cell import cell
+from gdsfactory.cell import cell, get_cache
 from gdsfactory.component import Component
 from gdsfactory.cross_section import CrossSection, Transition
+from gdsfactory.serialization import get_string
+from gdsfactory.tech import TECH
 from gdsfactory.types import (
     Coordinates,
     CrossSectionOrFactory,
@@ -163,7 +165,99 @@ def transition(
     return Xtrans
 
 
-@cell
+def _centerpoint_offset_curves(
+    points: np.ndarray,
+    offset_distances: np.ndarray,
+    start_angle: Optional[float],
+    end_angle: Optional[float],
+) -> np.ndarray:
+    """Returns centerpoint offset curves of points for many offset distances.
+
+    Same as phidl.Path._centerpoint_offset_curve but the segment angles are
+    computed once for all the curves.
+
+    Args:
+        points: (n, 2) path points.
+        offset_distances: (..., n) or (..., 1) offset distance of each curve.
+        start_angle: of the path in degrees.
+        end_angle: of the path in degrees.
+
+    Returns:
+        (..., n, 2) offset curves.
+    """
+    dx = np.diff(points[:, 0])
+    dy = np.diff(points[:, 1])
+    theta = np.arctan2(dy, dx)
+    theta = np.concatenate([theta[0:1], theta, theta[-1:]])
+    theta_mid = (np.pi + theta[1:] + theta[:-1]) / 2  # Mean angle between segments
+    dtheta_int = np.pi + theta[:-1] - theta[1:]  # Internal angle between segments
+
+    offset_distances = np.asarray(offset_distances, dtype=float)
+    offset_distances = offset_distances / np.sin(dtheta_int / 2)
+    new_points = np.empty(offset_distances.shape + (2,))
+    new_points[..., 0] = points[:, 0] - offset_distances * np.cos(theta_mid)
+    new_points[..., 1] = points[:, 1] - offset_distances * np.sin(theta_mid)
+    if start_angle is not None:
+        new_points[..., 0, 0] = (
+            points[0, 0] + np.sin(start_angle * np.pi / 180) * offset_distances[..., 0]
+        )
+        new_points[..., 0, 1] = (
+            points[0, 1] + -np.cos(start_angle * np.pi / 180) * offset_distances[..., 0]
+        )
+    if end_angle is not None:
+        new_points[..., -1, 0] = (
+            points[-1, 0] + np.sin(end_angle * np.pi / 180) * offset_distances[..., -1]
+        )
+        new_points[..., -1, 1] = (
+            points[-1, 1] + -np.cos(end_angle * np.pi / 180) * offset_distances[..., -1]
+        )
+    return new_points
+
+
+def get_cross_section_hash(cross_section: CrossSection, p: Path) -> str:
+    """Returns a hash of the CrossSection settings used to extrude Path p.
+
+    Callable widths and offsets are hashed by their values along the path,
+    so two transitions between the same cross_sections have the same hash
+    even if they are different function objects.
+
+    Args:
+        cross_section: to extrude.
+        p: path to extrude.
+    """
+    dx = np.diff(p.points[:, 0])
+    dy = np.diff(p.points[:, 1])
+    lengths = np.concatenate([[0], np.cumsum(np.sqrt(dx ** 2 + dy ** 2))])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = lengths / lengths[-1]
+        ds = 1e-6 / lengths[-1]
+    # Path.offset also evaluates the offset close to the ends for the angles
+    t_offset = np.concatenate([t, [ds, 1 - ds]])
+
+    h = hashlib.md5()
+    for section in cross_section.sections:
+        section = dict(section)
+        for key, t_key in [("width", t), ("offset", t_offset)]:
+            if callable(section[key]):
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    values = np.broadcast_to(section[key](t_key), t_key.shape)
+                h.update(np.ascontiguousarray(values, dtype=np.float64))
+                section[key] = "callable"
+        h.update(get_string(section).encode())
+
+    cross_sections = getattr(cross_section, "cross_sections", [cross_section])
+    for x in cross_sections:
+        settings = dict(
+            name=x.name,
+            info=x.info,
+            decorator=x.decorator,
+            ports=sorted(x.ports),
+            port_types=sorted(x.port_types),
+        )
+        h.update(get_string(settings).encode())
+    return h.hexdigest()
+
+
 def extrude(
     p: Path,
     cross_section: Optional[CrossSectionOrFactory] = None,
@@ -176,6 +270,12 @@ def extrude(
     A path can be extruded using any CrossSection returning a Component
     The CrossSection defines the layer numbers, widths and offsetts
 
+    Identical extrusions return the same Component, named after the path
+    geometry and the cross_section (see get_cross_section_hash), so routes
+    with many identical bends keep a single cell for each of them.
+    Extrusions are stored in the cell CACHE, that you can bound with
+    gf.cell.set_cache(ComponentCache(max_entries=...)).
+
     adapted from phidl.path
 
     Args:
@@ -204,73 +304,100 @@ def extrude(
         cross_section = CrossSection()
         cross_section.add(width=_linear_transition(widths[0], widths[1]), layer=layer)
 
-    xsection_points = []
-    c = Component()
+    if isinstance(simplify, bool):
+        raise ValueError(
+            "[PHIDL] the simplify argument must be a number (e.g. 1e-3) or None"
+        )
 
     cross_section = cross_section() if callable(cross_section) else cross_section
-    snap_to_grid = cross_section.info.get("snap_to_grid", None)
+    extrude_hash = hashlib.md5(
+        f"{p.hash_geometry()}_{get_cross_section_hash(cross_section, p)}_"
+        f"{simplify}".encode()
+    ).hexdigest()
+    name = f"extrude_{extrude_hash[:8]}"
 
-    for section in cross_section.sections:
-        width = section["width"]
+    component = get_cache().get(name)
+    if component is None:
+        component = _extrude(p, cross_section, simplify=simplify, name=name)
+    return component
+
+
+@cell
+def _extrude(
+    p: Path,
+    cross_section: CrossSectionOrFactory,
+    simplify: Optional[float] = None,
+) -> Component:
+    """Returns Component extruding a Path with a cross_section.
+
+    Args:
+        p: a path is a list of points (arc, straight, euler)
+        cross_section: to extrude
+        simplify: Tolerance value for the simplification algorithm.
+    """
+    c = Component()
+
+    snap_to_grid = cross_section.info.get("snap_to_grid", None)
+    sections = cross_section.sections
+
+    dx = np.diff(p.points[:, 0])
+    dy = np.diff(p.points[:, 1])
+    segment_lengths = np.sqrt(dx ** 2 + dy ** 2)
+    lengths = np.concatenate([[0], np.cumsum(segment_lengths)])
+    path_length = np.sum(segment_lengths)
+
+    # Offset curves of all the sections with a fixed offset in one go
+    widths = [
+        section["width"](lengths / lengths[-1])
+        if callable(section["width"])
+        else section["width"]
+        for section in sections
+    ]
+    offsets = [
+        0 if callable(section["offset"]) else section["offset"]
+        for section in sections
+    ]
+    widths_array = np.array(
+        [np.broadcast_to(width, lengths.shape) for width in widths], dtype=float
+    ).reshape(len(sections), len(lengths))
+    offsets_array = np.array(offsets, dtype=float).reshape(len(sections), 1)
+    points1_all, points2_all = _centerpoint_offset_curves(
+        p.points,
+        offset_distances=[
+            offsets_array + widths_array / 2,
+            offsets_array - widths_array / 2,
+        ],
+        start_angle=p.start_angle,
+        end_angle=p.end_angle,
+    )
+
+    for i, section in enumerate(sections):
+        width = widths[i]
         offset = section["offset"]
         layer = section["layer"]
         ports = section["ports"]
         port_types = section["port_types"]
         hidden = section["hidden"]
 
-        if isinstance(width, (int, float)) and isinstance(offset, (int, float)):
-            xsection_points.append([width, offset])
         if isinstance(layer, int):
             layer = (layer, 0)
-        if (
-            isinstance(layer, Iterable)
-            and len(layer) == 2
-            and isinstance(layer[0], int)
-            and isinstance(layer[1], int)
-        ):
-            xsection_points.append([layer[0], layer[1]])
-
-        # print(offset, type(offset))
+
         if callable(offset):
             P_offset = p.copy()
             P_offset.offset(offset)
             points = P_offset.points
-            start_angle = P_offset.start_angle
-            end_angle = P_offset.end_angle
-            offset = 0
-        else:
-            points = p.points
-            start_angle = p.start_angle
-            end_angle = p.end_angle
-
-        if callable(width):
-            # Compute lengths
-            dx = np.diff(p.points[:, 0])
-            dy = np.diff(p.points[:, 1])
-            lengths = np.cumsum(np.sqrt(dx ** 2 + dy ** 2))
-            lengths = np.concatenate([[0], lengths])
-            width = width(lengths / lengths[-1])
+            half_width = np.reshape(width, -1) / 2
+            points1, points2 = _centerpoint_offset_curves(
+                points,
+                offset_distances=[half_width, -half_width],
+                start_angle=P_offset.start_angle,
+                end_angle=P_offset.end_angle,
+            )
         else:
-            pass
-
-        points1 = p._centerpoint_offset_curve(
-            points,
-            offset_distance=offset + width / 2,
-            start_angle=start_angle,
-            end_angle=end_angle,
-        )
-        points2 = p._centerpoint_offset_curve(
-            points,
-            offset_distance=offset - width / 2,
-            start_angle=start_angle,
-            end_angle=end_angle,
-        )
+            points1 = points1_all[i]
+            points2 = points2_all[i]
 
         # Simplify lines using the Ramer–Douglas–Peucker algorithm
-        if isinstance(simplify, bool):
-            raise ValueError(
-                "[PHIDL] the simplify argument must be a number (e.g. 1e-3) or None"
-            )
         if simplify is not None:
             points1 = _simplify(points1, tolerance=simplify)
             points2 = _simplify(points2, tolerance=simplify)
@@ -292,7 +419,7 @@ def extrude(
         points = np.concatenate([points1, points2[::-1, :]])
 
         layers = layer if hidden else [layer, layer]
-        if not hidden and p.length() > 1e-3:
+        if not hidden and path_length > 1e-3:
             c.add_polygon(points, layer=layer)
 
         # Add ports if they were specified
@@ -333,7 +460,7 @@ def extrude(
     # clean_dict(cross_section.info)
     # c.info.path = p.info
     # c.info.cross_section = cross_section.info
-    c.info["length"] = float(np.round(p.length(), 3))
+    c.info["length"] = float(np.round(path_length, 3))
 
     if cross_section.decorator:
         c = cross_section.decorator(c) or c
@@ -341,15 +468,64 @@ def extrude(
     return c
 
 
-def arc(radius: float = 10.0, angle: float = 90, npoints: int = 720) -> Path:
+def get_max_error_nm() -> float:
+    """Returns half of the layout grid (TECH.snap_to_grid_nm),
+    so the error of the curves is gone once their points are snapped."""
+    return TECH.snap_to_grid_nm / 2
+
+
+def get_npoints_per_360(radius: float, max_error_nm: Optional[float] = None) -> int:
+    """Returns the number of points per 360 degrees of a circle
+    so that the sagitta of each segment is below max_error_nm.
+
+    The sagitta of a segment spanning dtheta is radius * (1 - cos(dtheta / 2)).
+
+    Args:
+        radius: of the circle (um).
+        max_error_nm: maximum distance between the segments and the circle (nm).
+            None uses half of the layout grid.
+    """
+    if max_error_nm is None:
+        max_error_nm = get_max_error_nm()
+    if max_error_nm <= 0:
+        raise ValueError(f"max_error_nm = {max_error_nm} needs to be > 0")
+    max_error = max_error_nm * 1e-3
+    if max_error >= abs(radius):
+        return 4
+    dtheta = 2 * np.arccos(1 - max_error / abs(radius))
+    return int(np.ceil(2 * np.pi / dtheta))
+
+
+def _get_npoints_arc(
+    radius: float, angle: float, max_error_nm: Optional[float]
+) -> float:
+    """Returns phidl num_pts for an arc with a sagitta below max_error_nm."""
+    if not angle:
+        return 720
+    nsegments = get_npoints_per_360(radius, max_error_nm) * abs(angle) / 360
+    # phidl rounds down num_pts * angle / 360 to get the number of points
+    return (np.ceil(nsegments) + 1.5) * 360 / abs(angle)
+
+
+def arc(
+    radius: float = 10.0,
+    angle: float = 90,
+    npoints: Optional[int] = 720,
+    max_error_nm: Optional[float] = None,
+) -> Path:
     """Returns a radial arc.
 
     Args:
         radius: minimum radius of curvature
         angle: total angle of the curve
-        npoints: Number of points used per 360 degrees
+        npoints: Number of points used per 360 degrees.
+            None uses the fewest points with a sagitta below max_error_nm.
+        max_error_nm: maximum sagitta (nm) when npoints is None.
+            None uses half of the layout grid (TECH.snap_to_grid_nm).
 
     """
+    if npoints is None:
+        npoints = _get_npoints_arc(radius, angle, max_error_nm)
     return path.arc(radius=radius, angle=angle, num_pts=npoints)
 
 
@@ -358,7 +534,8 @@ def euler(
     angle: float = 90,
     p: float = 0.5,
     use_eff: bool = False,
-    npoints: int = 720,
+    npoints: Optional[int] = 720,
+    max_error_nm: Optional[float] = None,
 ) -> Path:
     """Returns an euler bend that adiabatically transitions from straight to curved.
     By default, `radius` corresponds to the minimum radius of curvature of the bend.
@@ -374,9 +551,32 @@ def euler(
         use_eff: If False: `radius` is the minimum radius of curvature of the bend
             If True: The curve will be scaled such that the endpoints match an arc
             with parameters `radius` and `angle`
-        npoints: Number of points used per 360 degrees
+        npoints: Number of points used per 360 degrees.
+            None uses the fewest points with a sagitta below max_error_nm.
+        max_error_nm: maximum sagitta (nm) when npoints is None.
+            None uses half of the layout grid (TECH.snap_to_grid_nm).
 
     """
+    if npoints is None:
+        if p == 0:
+            return path.euler(
+                radius=radius,
+                angle=angle,
+                p=p,
+                num_pts=_get_npoints_arc(radius, angle, max_error_nm),
+            )
+        radius_min = radius
+        if use_eff:
+            P = path.euler(radius=radius, angle=angle, p=p, use_eff=use_eff)
+            radius_min = P.info["Rmin"]
+        # phidl spaces npoints * angle / 360 points evenly along each half of
+        # the curve, which is (1 + p) times longer than an arc with radius_min.
+        # Each half is an euler and an arc part with rounded numbers of points.
+        nsegments = get_npoints_per_360(radius_min, max_error_nm) * abs(angle) / 720
+        fraction_euler = 2 * p / (1 + p)
+        margin = sum(1.5 / f for f in [fraction_euler, 1 - fraction_euler] if f > 0)
+        npoints = np.ceil(nsegments * (1 + p) + margin) + 0.5
+        npoints = npoints * 360 / abs(angle) if angle else 720
     return path.euler(radius=radius, angle=angle, p=p, use_eff=use_eff, num_pts=npoints)
 
 
@@ -409,6 +609,7 @@ def smooth(
         radius: radius of curvature, passed to `bend`
         bend: bend function to round corners
         **kwargs: Extra keyword arguments that will be passed to `bend`
+            (for example npoints=None for the fewest points within max_error_nm)
     """
     return smooth_phidl(points=points, radius=radius, corner_fun=bend, **kwargs)
 
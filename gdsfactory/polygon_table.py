@@ -0,0 +1,328 @@
+"""Flattened polygons packed in arrays.
+
+A `PolygonTable` stores the points of all the polygons of a cell hierarchy in
+one array, so a reference transforms all the polygons of its cell with a few
+NumPy operations instead of one Python loop per polygon.
+
+The transformations follow the same order of operations as gdspy, so the
+polygons are identical to the ones that gdspy returns.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import gdspy
+import numpy as np
+from numpy import ndarray
+
+Layer = Tuple[int, int]
+BySpec = Union[bool, Layer]
+
+_mpone = np.array((-1.0, 1.0))
+
+
+class PolygonTable(NamedTuple):
+    """Polygons packed in arrays.
+
+    Polygon i has the points `points[offsets[i]:offsets[i + 1]]` and the
+    (layer, datatype) `specs[i]`.
+    """
+
+    points: ndarray
+    offsets: ndarray
+    specs: ndarray
+
+
+def get_polygon_table(
+    polygons: Sequence[ndarray], specs: Sequence[Layer]
+) -> PolygonTable:
+    """Returns a PolygonTable from a list of polygons and their specs."""
+    offsets = np.zeros(len(polygons) + 1, dtype=int)
+    np.cumsum([len(polygon) for polygon in polygons], out=offsets[1:])
+    points = np.concatenate(polygons) if polygons else np.zeros((0, 2))
+    return PolygonTable(
+        points=np.asarray(points, dtype=float),
+        offsets=offsets,
+        specs=np.asarray(specs, dtype=int).reshape(-1, 2),
+    )
+
+
+def concatenate_polygon_tables(tables: Sequence[PolygonTable]) -> PolygonTable:
+    """Returns the polygons of several tables in one table."""
+    if not tables:
+        return get_polygon_table([], [])
+    if len(tables) == 1:
+        return tables[0]
+    starts = np.cumsum([0] + [len(table.points) for table in tables[:-1]])
+    return PolygonTable(
+        points=np.concatenate([table.points for table in tables]),
+        offsets=np.concatenate(
+            [[0]] + [table.offsets[1:] + start for table, start in zip(tables, starts)]
+        ),
+        specs=np.concatenate([table.specs for table in tables]),
+    )
+
+
+def transform_points(
+    points: ndarray, references: Sequence[gdspy.CellReference]
+) -> ndarray:
+    """Returns points (N, 2) transformed by each reference as an (R, N, 2) array.
+
+    Same operations as `gdspy.CellReference._transform_polygons`, done in place.
+    Skipped operations (no reflection or magnification) would be exact
+    multiplications by one, so they are only done when a reference needs them.
+    """
+    x_reflection = np.array(
+        [(1, -1) if reference.x_reflection else (1, 1) for reference in references],
+        dtype=float,
+    )
+    magnification = np.array(
+        [
+            1.0 if reference.magnification is None else reference.magnification
+            for reference in references
+        ]
+    )
+    rotations = [reference.rotation or 0 for reference in references]
+    ct = np.array([np.cos(rotation * np.pi / 180.0) for rotation in rotations])
+    st = np.array([np.sin(rotation * np.pi / 180.0) for rotation in rotations])
+    origin = np.array(
+        [
+            (0, 0) if reference.origin is None else reference.origin
+            for reference in references
+        ],
+        dtype=float,
+    )
+
+    points = np.repeat(np.asarray(points, dtype=float)[None], len(references), axis=0)
+    if (x_reflection != 1).any():
+        points *= x_reflection[:, None]
+    if (magnification != 1).any():
+        points *= magnification[:, None, None]
+    rotated = points[..., ::-1] * (st[:, None] * _mpone)[:, None]
+    points *= ct[:, None, None]
+    points += rotated
+    points += origin[:, None]
+    return points
+
+
+def transform_polygon_table(
+    table: PolygonTable, references: Sequence[gdspy.CellReference]
+) -> List[PolygonTable]:
+    """Returns the table transformed by each reference."""
+    points = transform_points(table.points, references)
+    return [
+        PolygonTable(points=reference_points, offsets=table.offsets, specs=table.specs)
+        for reference_points in points
+    ]
+
+
+def transform_polygon_table_array(
+    table: PolygonTable, reference: gdspy.CellArray
+) -> PolygonTable:
+    """Returns the table repeated and transformed by a CellArray.
+
+    Same operations as `gdspy.CellArray._transform_polygons`.
+    """
+    tables = []
+    for ii in range(reference.columns):
+        for jj in range(reference.rows):
+            spc = np.array([reference.spacing[0] * ii, reference.spacing[1] * jj])
+            if reference.magnification is not None:
+                points = table.points * reference.magnification + spc
+            else:
+                points = table.points + spc
+            if reference.x_reflection:
+                points = points * np.array((1, -1))
+            if reference.rotation is not None:
+                ct = np.cos(reference.rotation * np.pi / 180.0)
+                st = np.sin(reference.rotation * np.pi / 180.0) * _mpone
+                points = points * ct + points[:, ::-1] * st
+            if reference.origin is not None:
+                points = points + np.array(reference.origin)
+            tables.append(table._replace(points=points))
+    return concatenate_polygon_tables(tables)
+
+
+def split_polygon_table(
+    table: PolygonTable, by_spec: BySpec = False
+) -> Union[List[ndarray], Dict[Layer, List[ndarray]]]:
+    """Returns the polygons of a table as `gdspy.Cell.get_polygons` does.
+
+    Args:
+        table: polygons.
+        by_spec: True returns a dict of polygons by (layer, datatype).
+            A (layer, datatype) only returns the polygons of that spec.
+    """
+    offsets = table.offsets.tolist()
+    if by_spec is True or by_spec is False:
+        points = table.points.copy()
+        polygons = [
+            points[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])
+        ]
+        if by_spec is False:
+            return polygons
+        specs = [tuple(spec) for spec in table.specs.tolist()]
+        polygons_by_spec: Dict[Layer, List[ndarray]] = {}
+        for spec, polygon in zip(specs, polygons):
+            polygons_by_spec.setdefault(spec, []).append(polygon)
+        return polygons_by_spec
+
+    layer, datatype = by_spec
+    indices = np.flatnonzero(
+        (table.specs[:, 0] == layer) & (table.specs[:, 1] == datatype)
+    )
+    return [table.points[offsets[i] : offsets[i + 1]].copy() for i in indices]
+
+
+def _mix(values: ndarray) -> ndarray:
+    """Returns the splitmix64 finalizer of uint64 values."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+_hash_constants = np.array(
+    [
+        [
+            0x9E3779B97F4A7C15,
+            0xC2B2AE3D27D4EB4F,
+            0x165667B19E3779F9,
+            0x27D4EB2F165667C5,
+        ],
+        [
+            0xFF51AFD7ED558CCD,
+            0xC4CEB9FE1A85EC53,
+            0x85EBCA77C2B2AE63,
+            0xD6E8FEB86659FD93,
+        ],
+    ],
+    dtype=np.uint64,
+)
+
+
+def hash_polygon_table(table: PolygonTable, precision: float = 1e-4) -> bytes:
+    """Returns a 16 bytes hash of the polygons of a table.
+
+    Each polygon hashes the set of its edges, and the table adds the hashes of
+    its polygons, so the hash does not depend on the order of the polygons,
+    on their first point or on their orientation, only on the polygon shapes
+    and their (layer, datatype).
+
+    Args:
+        table: polygons.
+        precision: points are rounded to this grid (um).
+    """
+    if not len(table.specs):
+        return bytes(16)
+    # round is symmetric, so mirrored points round to mirrored grid points
+    points = np.round(table.points / precision).astype(np.int64)
+    offsets = table.offsets
+    lengths = np.diff(offsets)
+    next_point = np.arange(1, len(points) + 1)
+    next_point[offsets[1:] - 1] = offsets[:-1]
+    start, stop = points, points[next_point]
+    swap = (stop[:, 0] < start[:, 0]) | (
+        (stop[:, 0] == start[:, 0]) & (stop[:, 1] < start[:, 1])
+    )
+    edges = np.hstack(
+        [np.where(swap[:, None], stop, start), np.where(swap[:, None], start, stop)]
+    ).astype(np.uint64)
+    specs = table.specs.astype(np.uint64)
+
+    digest = b""
+    for constants in _hash_constants:
+        edge_hashes = _mix(edges @ constants)
+        polygon_hashes = np.add.reduceat(edge_hashes, offsets[:-1])
+        polygon_hashes = _mix(
+            polygon_hashes
+            ^ _mix(specs[:, 0] * constants[0] + specs[:, 1] * constants[1])
+            ^ lengths.astype(np.uint64) * constants[2]
+        )
+        digest += np.array([polygon_hashes.sum()], dtype="<u8").tobytes()
+    return digest
+
+
+def get_cell_polygon_table(cell: gdspy.Cell) -> PolygonTable:
+    """Returns the flattened polygons of a cell, cached for Components."""
+    get_table = getattr(cell, "get_polygon_table", None)
+    return get_table() if get_table else build_polygon_table(cell)
+
+
+def build_polygon_table(cell: gdspy.Cell) -> PolygonTable:
+    """Returns the flattened polygons of a cell in the gdspy order.
+
+    The references to the same cell are transformed together.
+    """
+    polygons = []
+    specs = []
+    for polyset in cell.polygons:
+        polygons.extend(polyset.polygons)
+        specs.extend(zip(polyset.layers, polyset.datatypes))
+    for path in cell.paths:
+        for spec, path_polygons in path.get_polygons(True).items():
+            polygons.extend(path_polygons)
+            specs.extend([spec] * len(path_polygons))
+
+    tables = [None] * len(cell.references)
+    groups: Dict[int, Tuple[gdspy.Cell, List[int], List[gdspy.CellReference]]] = {}
+    for i, reference in enumerate(cell.references):
+        ref_cell = reference.ref_cell
+        if not isinstance(ref_cell, gdspy.Cell):
+            continue
+        if isinstance(reference, gdspy.CellArray):
+            table = get_cell_polygon_table(ref_cell)
+            tables[i] = transform_polygon_table_array(table, reference)
+        else:
+            group = groups.setdefault(id(ref_cell), (ref_cell, [], []))
+            group[1].append(i)
+            group[2].append(reference)
+
+    for ref_cell, indices, references in groups.values():
+        table = get_cell_polygon_table(ref_cell)
+        if len(table.specs):
+            for i, reference_table in zip(
+                indices, transform_polygon_table(table, references)
+            ):
+                tables[i] = reference_table
+
+    return concatenate_polygon_tables(
+        [get_polygon_table(polygons, specs)]
+        + [table for table in tables if table is not None]
+    )
+
+
+def build_bounding_box(cell: gdspy.Cell) -> Optional[ndarray]:
+    """Returns the bounding box of a cell as `gdspy.Cell.get_bounding_box` does.
+
+    The references to the same cell with a rotation multiple of 90 degrees
+    transform the bounding box of the cell together.
+    """
+    all_polygons = []
+    for polygon in cell.polygons:
+        all_polygons.extend(polygon.polygons)
+    for path in cell.paths:
+        all_polygons.extend(path.to_polygonset().polygons)
+
+    groups: Dict[int, Tuple[gdspy.Cell, List[gdspy.CellReference]]] = {}
+    for reference in cell.references:
+        if (
+            isinstance(reference, gdspy.CellReference)
+            and isinstance(reference.ref_cell, gdspy.Cell)
+            and (reference.rotation is None or reference.rotation % 90 == 0)
+        ):
+            ref_cell = reference.ref_cell
+            groups.setdefault(id(ref_cell), (ref_cell, []))[1].append(reference)
+        else:
+            reference_bb = reference.get_bounding_box()
+            if reference_bb is not None:
+                all_polygons.append(reference_bb)
+
+    for ref_cell, references in groups.values():
+        cell_bbox = ref_cell.get_bounding_box()
+        if cell_bbox is not None:
+            all_polygons.append(transform_points(cell_bbox, references).reshape(-1, 2))
+
+    if not all_polygons:
+        return None
+    all_points = np.concatenate(all_polygons)
+    return np.array([all_points.min(axis=0), all_points.max(axis=0)])
@@ -31,7 +31,7 @@ import csv
 import functools
 from copy import deepcopy
 from functools import partial
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
 import numpy as np
 import phidl.geometry as pg
@@ -192,7 +192,7 @@ class Port(PortPhidl):
             port_type=self.port_type,
             cross_section=self.cross_section,
         )
-        new_port.info = deepcopy(self.info)
+        new_port.info = deepcopy(self.info) if self.info else {}
         if not new_uid:
             new_port.uid = self.uid
             Port._next_uid -= 1
@@ -243,6 +243,40 @@ class Port(PortPhidl):
             )
 
 
+class PortTable(NamedTuple):
+    """Ports of a Component as arrays, for vectorized port transforms.
+
+    Args:
+        names: port names.
+        ports: Port objects, in the same order as names.
+        midpoints: (n, 2) port midpoints.
+        orientations: (n,) port orientations in degrees.
+        widths: (n,) port widths.
+    """
+
+    names: Tuple[str, ...]
+    ports: Tuple[Port, ...]
+    midpoints: ndarray
+    orientations: ndarray
+    widths: ndarray
+
+
+def get_port_table(ports: Dict[str, Port]) -> PortTable:
+    """Returns a PortTable from a dict of ports."""
+    port_list = tuple(ports.values())
+    return PortTable(
+        names=tuple(ports.keys()),
+        ports=port_list,
+        midpoints=np.array(
+            [port.midpoint for port in port_list], dtype=np.float64
+        ).reshape(-1, 2),
+        orientations=np.array(
+            [port.orientation for port in port_list], dtype=np.float64
+        ),
+        widths=np.array([port.width for port in port_list], dtype=np.float64),
+    )
+
+
 def port_array(
     midpoint: Tuple[int, int] = (0, 0),
     width: float = 0.5,
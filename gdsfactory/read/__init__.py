@@ -5,11 +5,13 @@ from gdsfactory.read.from_phidl import from_phidl
 from gdsfactory.read.from_picwriter import from_picwriter
 from gdsfactory.read.from_yaml import from_yaml
 from gdsfactory.read.import_gds import import_gds
+from gdsfactory.read.import_oas import import_oas
 
 __all__ = [
     "from_phidl",
     "from_picwriter",
     "import_gds",
+    "import_oas",
     "from_gdspaths",
     "from_gdsdir",
     "from_np",
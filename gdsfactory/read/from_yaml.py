@@ -60,7 +60,7 @@ import omegaconf
 from omegaconf import OmegaConf
 
 from gdsfactory.add_pins import add_instance_label
-from gdsfactory.cell import CACHE
+from gdsfactory.cell import get_cache
 from gdsfactory.component import Component, ComponentReference
 from gdsfactory.components import factory
 from gdsfactory.cross_section import cross_section_factory
@@ -519,11 +519,12 @@ def from_yaml(
         "name",
         f"Unnamed_{hashlib.md5(json.dumps(OmegaConf.to_container(conf)).encode()).hexdigest()[:8]}",
     )
-    if name in CACHE:
-        return CACHE[name]
+    cache = get_cache()
+    if name in cache:
+        return cache[name]
     else:
         c = Component(name)
-        CACHE[name] = c
+        cache[name] = c
     placements_conf = conf.get("placements")
     routes_conf = conf.get("routes")
     ports_conf = conf.get("ports")
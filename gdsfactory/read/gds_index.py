@@ -0,0 +1,264 @@
+"""Index of the cells in a GDS file.
+
+Records where each cell starts and ends in the file and which cells it references,
+so importing one cell only needs to parse the cells it depends on
+instead of the whole library.
+
+The index is cached in `~/.gdsfactory/gds_index`, in one JSON file per GDS file
+named after the hash of its resolved path, so nothing is written next to the GDS
+files (PDK, site-packages or user repos). Each index stores the
+`gdspy.gdsii_hash` of the file. The file size and modification time are checked
+first, so the file is only rehashed when it was touched.
+"""
+import hashlib
+import json
+import mmap
+import pathlib
+import struct
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import gdspy
+from loguru import logger
+
+from gdsfactory.config import home_path
+from gdsfactory.types import PathType
+
+INDEX_VERSION = 1
+INDEX_DIRPATH = home_path / "gds_index"
+
+# GDS record types
+BGNSTR = 0x05
+STRNAME = 0x06
+ENDSTR = 0x07
+SNAME = 0x12
+ENDLIB = 0x04
+
+ENDLIB_RECORD = struct.pack(">2H", 4, 0x0400)
+
+# OASIS files have no GDS records, so they are hashed with md5
+OASIS_MAGIC = b"%SEMI-OASIS\r\n"
+
+# resolved path: (size, mtime_ns, gdsii_hash)
+_HASHES: Dict[pathlib.Path, Tuple[int, int, str]] = {}
+
+
+class CellIndex(NamedTuple):
+    start: int
+    end: int
+    children: List[str]
+
+
+class GdsIndex(NamedTuple):
+    gdsii_hash: str
+    size: int
+    mtime_ns: int
+    header_end: int
+    cells: Dict[str, CellIndex]
+
+    def get_top_level(self) -> List[str]:
+        """Returns the names of the cells that are not referenced by other cells."""
+        children = {child for cell in self.cells.values() for child in cell.children}
+        return [name for name in self.cells if name not in children]
+
+    def get_dependencies(self, cellname: str) -> List[str]:
+        """Returns a cell and all the cells it references (transitive closure)."""
+        if cellname not in self.cells:
+            raise ValueError(
+                f"cell {cellname!r} not in GDS cells {list(self.cells.keys())}"
+            )
+        names = [cellname]
+        visited: Set[str] = {cellname}
+        for name in names:
+            for child in self.cells[name].children:
+                if child not in visited and child in self.cells:
+                    visited.add(child)
+                    names.append(child)
+        return names
+
+
+def _decode_name(data: bytes) -> str:
+    return data.rstrip(b"\0").decode("ascii", errors="replace")
+
+
+def scan_gds(gdspath: PathType, gdsii_hash: Optional[str] = None) -> GdsIndex:
+    """Returns the GDS index from one pass over the record headers of a file."""
+    gdspath = pathlib.Path(gdspath)
+    stat = gdspath.stat()
+    cells = {}
+    header_end = None
+    name = None
+    start = 0
+    children: Set[str] = set()
+
+    with open(gdspath, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        size = len(data)
+        pos = 0
+        while pos + 4 <= size:
+            length, record_type = struct.unpack_from(">HB", data, pos)
+            if length < 4:
+                break  # zero padding after ENDLIB
+            if record_type == BGNSTR:
+                start = pos
+                if header_end is None:
+                    header_end = pos
+            elif record_type == STRNAME:
+                name = _decode_name(data[pos + 4 : pos + length])
+            elif record_type == SNAME:
+                children.add(_decode_name(data[pos + 4 : pos + length]))
+            elif record_type == ENDSTR:
+                cells[name] = CellIndex(start, pos + length, sorted(children))
+                children = set()
+            elif record_type == ENDLIB:
+                break
+            pos += length
+
+    return GdsIndex(
+        gdsii_hash=gdsii_hash or gdspy.gdsii_hash(str(gdspath)),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        header_end=header_end if header_end is not None else pos,
+        cells=cells,
+    )
+
+
+def get_index_path(
+    gdspath: PathType, dirpath: Optional[PathType] = None
+) -> pathlib.Path:
+    """Returns the path of the cached index of a GDS file.
+
+    Args:
+        gdspath: GDS file path.
+        dirpath: index cache directory. Defaults to ~/.gdsfactory/gds_index.
+    """
+    gdspath = pathlib.Path(gdspath).resolve()
+    dirpath = pathlib.Path(dirpath) if dirpath else INDEX_DIRPATH
+    path_hash = hashlib.md5(str(gdspath).encode()).hexdigest()
+    return dirpath / f"{gdspath.stem}_{path_hash}.json"
+
+
+def _write_index(index: GdsIndex, index_path: pathlib.Path) -> None:
+    d = index._asdict()
+    d["version"] = INDEX_VERSION
+    d["cells"] = {name: list(cell) for name, cell in index.cells.items()}
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        index_path.write_text(json.dumps(d))
+    except OSError as exc:
+        logger.debug(f"GDS index not cached in {str(index_path)!r}: {exc}")
+
+
+def _read_index(index_path: pathlib.Path) -> Optional[GdsIndex]:
+    try:
+        d = json.loads(index_path.read_text())
+    except (OSError, ValueError):
+        return None
+    if d.pop("version", None) != INDEX_VERSION:
+        return None
+    d["cells"] = {name: CellIndex(*cell) for name, cell in d["cells"].items()}
+    return GdsIndex(**d)
+
+
+def get_gds_hash(gdspath: PathType, dirpath: Optional[PathType] = None) -> str:
+    """Returns the gdspy.gdsii_hash of a GDS file, or the md5 hash of an
+    OASIS file.
+
+    The file is only hashed when its size or modification time changed since
+    the last call (or since the cached index of the file was written).
+
+    Args:
+        gdspath: GDS or OASIS file path.
+        dirpath: index cache directory. Defaults to ~/.gdsfactory/gds_index.
+    """
+    gdspath = pathlib.Path(gdspath).resolve()
+    stat = gdspath.stat()
+    size_mtime = (stat.st_size, stat.st_mtime_ns)
+
+    cached = _HASHES.get(gdspath)
+    if cached and cached[:2] == size_mtime:
+        return cached[2]
+
+    index = _read_index(get_index_path(gdspath, dirpath))
+    if index and (index.size, index.mtime_ns) == size_mtime:
+        gdsii_hash = index.gdsii_hash
+    else:
+        with open(gdspath, "rb") as f:
+            is_oasis = f.read(len(OASIS_MAGIC)) == OASIS_MAGIC
+        gdsii_hash = (
+            hashlib.md5(gdspath.read_bytes()).hexdigest()
+            if is_oasis
+            else gdspy.gdsii_hash(str(gdspath))
+        )
+    _HASHES[gdspath] = (*size_mtime, gdsii_hash)
+    return gdsii_hash
+
+
+def get_gds_index(gdspath: PathType, dirpath: Optional[PathType] = None) -> GdsIndex:
+    """Returns the GDS index, from the cache if it is valid.
+
+    Args:
+        gdspath: GDS file path.
+        dirpath: index cache directory. Defaults to ~/.gdsfactory/gds_index.
+    """
+    gdspath = pathlib.Path(gdspath)
+    index_path = get_index_path(gdspath, dirpath)
+    index = _read_index(index_path)
+    stat = gdspath.stat()
+
+    if index and index.size == stat.st_size and index.mtime_ns == stat.st_mtime_ns:
+        return index
+
+    gdsii_hash = get_gds_hash(gdspath, dirpath)
+    if index and index.size == stat.st_size and index.gdsii_hash == gdsii_hash:
+        index = index._replace(mtime_ns=stat.st_mtime_ns)
+    else:
+        index = scan_gds(gdspath, gdsii_hash=gdsii_hash)
+    _write_index(index, index_path)
+    return index
+
+
+def read_gds_cells(gdspath: PathType, cellname: str) -> bytes:
+    """Returns a GDS library with only a cell and the cells it references.
+
+    Args:
+        gdspath: GDS file path.
+        cellname: name of the cell to read.
+    """
+    index = get_gds_index(gdspath)
+    cellnames = index.get_dependencies(cellname)
+
+    with open(gdspath, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        records = [data[: index.header_end]]
+        for name in cellnames:
+            cell = index.cells[name]
+            records.append(data[cell.start : cell.end])
+    records.append(ENDLIB_RECORD)
+    return b"".join(records)
+
+
+def test_gds_index(tmp_path) -> None:
+    from gdsfactory.config import CONFIG
+
+    gdspath = CONFIG["gdsdir"] / "mzi2x2.gds"
+    index = get_gds_index(gdspath, dirpath=tmp_path)
+    assert not gdspath.with_name(f"{gdspath.name}.index.json").exists()
+    assert _read_index(get_index_path(gdspath, dirpath=tmp_path)) == index
+    top_level = index.get_top_level()
+    assert len(top_level) == 1, top_level
+
+    cellnames = index.get_dependencies(top_level[0])
+    assert set(cellnames) == set(index.cells.keys())
+
+    lib = gdspy.GdsLibrary()
+    lib.read_gds(str(gdspath))
+    assert set(lib.cells.keys()) == set(index.cells.keys())
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        test_gds_index(pathlib.Path(dirpath))
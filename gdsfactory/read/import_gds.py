@@ -1,20 +1,112 @@
-from functools import lru_cache
+"""Import a Component from a GDS file.
+
+Imported Components are cached in IMPORT_CACHE, keyed on the content hash of the
+GDS file (not on its path), so a file that changes on disk is imported again.
+The file is only rehashed when its size or modification time change.
+
+The import cache is bounded by the bytes of polygon points of the imported
+hierarchies, and least recently used imports are evicted first:
+
+.. code::
+
+    from gdsfactory.cache import ComponentCache
+    from gdsfactory.read.import_gds import get_component_size_recursive, set_import_cache
+
+    set_import_cache(ComponentCache(max_bytes=4e9, sizeof=get_component_size_recursive))
+"""
+import io
 from pathlib import Path
-from typing import Callable, Optional, Union, cast
+from typing import Any, Callable, Hashable, Optional, Tuple, Union, cast
 
 import gdspy
 import numpy as np
 from omegaconf import OmegaConf
 from phidl.device_layout import CellArray, DeviceReference
 
-from gdsfactory.cell import CACHE
+from gdsfactory.cache import ComponentCache, get_component_size
+from gdsfactory.cell import get_cache
 from gdsfactory.component import Component
 from gdsfactory.config import CONFIG, logger
 from gdsfactory.name import get_name_short
+from gdsfactory.read.gds_index import get_gds_hash, get_gds_index, read_gds_cells
 from gdsfactory.snap import snap_to_grid
 
 
-@lru_cache(maxsize=None)
+def get_component_size_recursive(component: Component) -> Tuple[int, int]:
+    """Returns (number of polygons, number of bytes) of a component hierarchy."""
+    polygons, nbytes = get_component_size(component)
+    for child in component.get_dependencies(recursive=True):
+        child_polygons, child_nbytes = get_component_size(child)
+        polygons += child_polygons
+        nbytes += child_nbytes
+    return polygons, nbytes
+
+
+IMPORT_CACHE: ComponentCache = ComponentCache(
+    max_bytes=2e9, sizeof=get_component_size_recursive
+)
+
+
+def clear_import_cache() -> None:
+    """Clears the cache of imported GDS Components."""
+    IMPORT_CACHE.clear()
+
+
+def get_import_cache() -> ComponentCache:
+    """Returns the cache of imported GDS Components."""
+    return IMPORT_CACHE
+
+
+def set_import_cache(cache: ComponentCache) -> None:
+    """Replaces the cache of imported GDS Components.
+
+    Args:
+        cache: for example ComponentCache(max_bytes=4e9,
+            sizeof=get_component_size_recursive) to change the memory budget.
+    """
+    global IMPORT_CACHE
+    if not isinstance(cache, ComponentCache):
+        raise TypeError(f"cache = {type(cache)} needs to be a ComponentCache")
+    IMPORT_CACHE = cache
+
+
+def get_import_key(
+    gdspath: Path,
+    cellname: Optional[str] = None,
+    flatten: bool = False,
+    snap_to_grid_nm: Optional[int] = None,
+    name: Optional[str] = None,
+    decorator: Optional[Callable] = None,
+    safe_cell_names: bool = False,
+    use_index: bool = True,
+    **kwargs: Any,
+) -> Hashable:
+    """Returns the IMPORT_CACHE key of a GDS import.
+
+    Uses the GDS content hash instead of the path,
+    and the size and modification time of the YAML metadata file.
+    """
+    metadata_filepath = gdspath.with_suffix(".yml")
+    if metadata_filepath.exists():
+        stat = metadata_filepath.stat()
+        metadata = (stat.st_size, stat.st_mtime_ns)
+    else:
+        metadata = None
+
+    return (
+        get_gds_hash(gdspath),
+        metadata,
+        cellname,
+        flatten,
+        snap_to_grid_nm,
+        name,
+        decorator,
+        safe_cell_names,
+        use_index,
+        tuple(sorted(kwargs.items())),
+    )
+
+
 def import_gds(
     gdspath: Union[str, Path],
     cellname: Optional[str] = None,
@@ -24,6 +116,7 @@ def import_gds(
     decorator: Optional[Callable] = None,
     gdsdir: Optional[Union[str, Path]] = None,
     safe_cell_names: bool = False,
+    use_index: bool = True,
     **kwargs,
 ) -> Component:
     """Returns a Componenent from a GDS file.
@@ -33,6 +126,9 @@ def import_gds(
     if any cell names are found on the component CACHE we append a $ with a
     number to the name
 
+    Imported Components are cached on IMPORT_CACHE, keyed on the file contents,
+    so importing a file again after it changed on disk returns the new cells.
+
     Args:
         gdspath: path of GDS file.
         cellname: cell of the name to import (None) imports top cell.
@@ -43,17 +139,69 @@ def import_gds(
         gdsdir: optional GDS directory.
         safe_cell_names: append file hash to imported cell names to avoid
             duplicated cell names.
+        use_index: when cellname is defined, only parse that cell and the cells it
+            references, using a cell index cached next to the GDS file.
         kwargs: extra info for the imported component (polarization, wavelength ...).
     """
     gdspath = Path(gdsdir) / Path(gdspath) if gdsdir else Path(gdspath)
-    gdshash = gdspy.gdsii_hash(gdspath)
     if not gdspath.exists():
         raise FileNotFoundError(f"No file {gdspath!r} found")
 
+    key = get_import_key(
+        gdspath,
+        cellname=cellname,
+        flatten=flatten,
+        snap_to_grid_nm=snap_to_grid_nm,
+        name=name,
+        decorator=decorator,
+        safe_cell_names=safe_cell_names,
+        use_index=use_index,
+        **kwargs,
+    )
+    component = IMPORT_CACHE.get(key)
+    if component is None:
+        component = _import_gds(
+            gdspath,
+            cellname=cellname,
+            flatten=flatten,
+            snap_to_grid_nm=snap_to_grid_nm,
+            name=name,
+            decorator=decorator,
+            safe_cell_names=safe_cell_names,
+            use_index=use_index,
+            **kwargs,
+        )
+        IMPORT_CACHE[key] = component
+    return component
+
+
+def _import_gds(
+    gdspath: Path,
+    cellname: Optional[str] = None,
+    flatten: bool = False,
+    snap_to_grid_nm: Optional[int] = None,
+    name: Optional[str] = None,
+    decorator: Optional[Callable] = None,
+    safe_cell_names: bool = False,
+    use_index: bool = True,
+    **kwargs,
+) -> Component:
     metadata_filepath = gdspath.with_suffix(".yml")
 
     gdsii_lib = gdspy.GdsLibrary()
-    gdsii_lib.read_gds(str(gdspath))
+    if cellname is not None and use_index:
+        index = get_gds_index(gdspath)
+        if cellname not in index.cells:
+            raise ValueError(
+                f"cell {cellname} is not in file {gdspath} "
+                f"with cells {index.get_top_level()}"
+            )
+        gdsii_lib.read_gds(io.BytesIO(read_gds_cells(gdspath, cellname)))
+        gdshash = index.gdsii_hash
+    else:
+        gdsii_lib.read_gds(str(gdspath))
+        gdshash = get_gds_hash(gdspath) if safe_cell_names else None
+
     top_level_cells = gdsii_lib.top_level()
     cellnames = [c.name for c in top_level_cells]
 
@@ -72,7 +220,7 @@ def import_gds(
         )
 
     if name:
-        if name in CACHE:
+        if name in get_cache():
             raise ValueError(
                 f"name = {name!r} already on cache. "
                 "Please, choose a different name or set name = None. "
@@ -0,0 +1,427 @@
+"""Import a Component from an OASIS file.
+
+The cells of the klayout layout are converted into Components directly,
+and the ports and settings written by write_oas are recovered.
+
+Imported Components are cached in the import_gds IMPORT_CACHE, keyed on the
+content hash of the OASIS file (not on its path), so a file that changes on
+disk is imported again.
+"""
+import pathlib
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from omegaconf import OmegaConf
+from phidl.device_layout import CellArray
+from pydantic import ValidationError
+
+from gdsfactory.cell import Settings, get_cache
+from gdsfactory.component import Component
+from gdsfactory.component_reference import ComponentReference
+from gdsfactory.config import CONFIG
+from gdsfactory.name import get_name_short
+from gdsfactory.read.gds_index import get_gds_hash
+from gdsfactory.read.import_gds import get_import_cache, import_gds
+from gdsfactory.snap import snap_to_grid
+from gdsfactory.write_oas import METADATA_PROPERTY
+
+
+def pop_port_labels(layout, cell) -> List[Dict[str, Any]]:
+    """Removes the port text labels from a klayout cell and returns the ports.
+
+    Args:
+        layout: klayout.db.Layout.
+        cell: klayout.db.Cell.
+    """
+    ports = []
+    for layer_index in layout.layer_indexes():
+        layer_info = layout.get_info(layer_index)
+        shapes = cell.shapes(layer_index)
+        port_shapes = [
+            shape
+            for shape in shapes.each()
+            if shape.is_text() and shape.property("port_width") is not None
+        ]
+        for shape in port_shapes:
+            position = shape.text_dpos
+            ports.append(
+                dict(
+                    name=shape.text_string,
+                    midpoint=(position.x, position.y),
+                    width=shape.property("port_width"),
+                    orientation=shape.property("port_orientation"),
+                    port_type=shape.property("port_type"),
+                    layer=(layer_info.layer, layer_info.datatype),
+                )
+            )
+            shapes.erase(shape)
+    return ports
+
+
+def add_instance(component: Component, instance, child: Component) -> None:
+    """Adds a klayout instance to a Component as a reference or a CellArray.
+
+    Arrays that are not regular in the frame of the instance are added as one
+    reference per element.
+    """
+    import klayout.db as pya
+
+    trans = instance.dcplx_trans
+    origin = (trans.disp.x, trans.disp.y)
+    rotation = trans.angle
+    magnification = None if trans.mag == 1 else trans.mag
+    x_reflection = trans.is_mirror()
+
+    if instance.is_regular_array():
+        dbu = instance.layout().dbu
+        local = pya.DCplxTrans(1, rotation, x_reflection, 0, 0).inverted()
+        a = local * instance.da
+        b = local * instance.db
+        if abs(a.y) < dbu / 2 and abs(b.x) < dbu / 2:
+            array = CellArray(
+                device=child,
+                columns=instance.na,
+                rows=instance.nb,
+                spacing=(a.x, b.y),
+                origin=origin,
+                rotation=rotation,
+                magnification=magnification,
+                x_reflection=x_reflection,
+            )
+            array.owner = component
+            component.add(array)
+            return
+        origins = [
+            (
+                origin[0] + i * instance.da.x + j * instance.db.x,
+                origin[1] + i * instance.da.y + j * instance.db.y,
+            )
+            for i in range(instance.na)
+            for j in range(instance.nb)
+        ]
+    else:
+        origins = [origin]
+
+    for origin in origins:
+        reference = ComponentReference(
+            child,
+            origin=origin,
+            rotation=rotation,
+            magnification=magnification,
+            x_reflection=x_reflection,
+        )
+        component.add(reference)
+
+
+def get_component(layout, topcell, snap_to_grid_nm: Optional[int] = None) -> Component:
+    """Returns a Component hierarchy from a klayout cell and the cells it calls.
+
+    Polygons with holes are cut into polygons without holes, paths and boxes
+    are added as polygons and texts as labels, without rotation or anchor.
+    If any cell names are found on the component CACHE we append a $ to the name.
+
+    Args:
+        layout: klayout.db.Layout.
+        topcell: klayout.db.Cell.
+        snap_to_grid_nm: snap polygon points to a nm grid (does not snap if None).
+    """
+    dbu = layout.dbu
+    layers = {}
+    for layer_index in layout.layer_indexes():
+        layer_info = layout.get_info(layer_index)
+        layers[layer_index] = (layer_info.layer, layer_info.datatype)
+    cell_indexes = set(topcell.called_cells()) | {topcell.cell_index()}
+    components: Dict[int, Component] = {}
+    cache = get_cache()
+
+    for cell_index in layout.each_cell_bottom_up():
+        if cell_index not in cell_indexes:
+            continue
+        cell = layout.cell(cell_index)
+        name = get_name_short(cell.name)
+        while name in cache:
+            name += "$"
+        component = Component(name=name)
+
+        for layer_index, layer in layers.items():
+            polygons = []
+            for shape in cell.shapes(layer_index).each():
+                if shape.is_text():
+                    position = shape.text_dpos
+                    component.add_label(
+                        text=shape.text_string,
+                        position=(position.x, position.y),
+                        layer=layer,
+                    )
+                    continue
+                polygon = shape.polygon
+                if polygon is None:
+                    continue
+                if polygon.holes():
+                    polygon = polygon.resolved_holes()
+                points = [(p.x * dbu, p.y * dbu) for p in polygon.each_point_hull()]
+                if snap_to_grid_nm:
+                    points = snap_to_grid(points, nm=snap_to_grid_nm)
+                polygons.append(points)
+            if polygons:
+                component.add_polygon(polygons, layer=layer)
+
+        for instance in cell.each_inst():
+            add_instance(component, instance, components[instance.cell_index])
+        components[cell_index] = component
+    return components[topcell.cell_index()]
+
+
+def import_oas(
+    oaspath: Union[str, pathlib.Path],
+    cellname: Optional[str] = None,
+    flatten: bool = False,
+    snap_to_grid_nm: Optional[int] = None,
+    name: Optional[str] = None,
+    decorator: Optional[Callable] = None,
+    oasdir: Optional[Union[str, pathlib.Path]] = None,
+    **kwargs,
+) -> Component:
+    """Returns a Component from an OASIS file.
+
+    Recovers the ports and settings written by Component.write_oas.
+    If any cell names are found on the component CACHE we append a $ to the name.
+
+    Imported Components are cached on IMPORT_CACHE, keyed on the file contents,
+    so importing a file again after it changed on disk returns the new cells.
+
+    Args:
+        oaspath: path of OASIS file.
+        cellname: cell of the name to import (None) imports top cell.
+        flatten: if True returns flattened (no hierarchy)
+        snap_to_grid_nm: snap to different nm grid (does not snap if False)
+        name: Optional name. Over-rides the default imported name.
+        decorator: function to apply over the imported component.
+        oasdir: optional OASIS directory.
+        kwargs: extra info for the imported component (polarization, wavelength ...).
+    """
+    oaspath = (
+        pathlib.Path(oasdir) / pathlib.Path(oaspath)
+        if oasdir
+        else pathlib.Path(oaspath)
+    )
+    if not oaspath.exists():
+        raise FileNotFoundError(f"No file {oaspath!r} found")
+
+    key = (
+        "oas",
+        get_gds_hash(oaspath),
+        cellname,
+        flatten,
+        snap_to_grid_nm,
+        name,
+        decorator,
+        tuple(sorted(kwargs.items())),
+    )
+    import_cache = get_import_cache()
+    component = import_cache.get(key)
+    if component is None:
+        component = _import_oas(
+            oaspath,
+            cellname=cellname,
+            flatten=flatten,
+            snap_to_grid_nm=snap_to_grid_nm,
+            name=name,
+            decorator=decorator,
+            **kwargs,
+        )
+        import_cache[key] = component
+    return component
+
+
+def _import_oas(
+    oaspath: pathlib.Path,
+    cellname: Optional[str] = None,
+    flatten: bool = False,
+    snap_to_grid_nm: Optional[int] = None,
+    name: Optional[str] = None,
+    decorator: Optional[Callable] = None,
+    **kwargs,
+) -> Component:
+    import klayout.db as pya
+
+    layout = pya.Layout()
+    layout.read(str(oaspath))
+    top_cells = layout.top_cells()
+    cellnames = [cell.name for cell in top_cells]
+
+    if cellname is not None:
+        if not layout.has_cell(cellname):
+            raise ValueError(
+                f"cell {cellname} is not in file {oaspath} with cells {cellnames}"
+            )
+        topcell = layout.cell(cellname)
+    elif len(top_cells) == 1:
+        topcell = top_cells[0]
+    else:
+        raise ValueError(
+            f"import_oas() There are multiple top-level cells in {oaspath!r}, "
+            f"you must specify `cellname` to select of one of them among {cellnames}"
+        )
+
+    if name:
+        if name in get_cache():
+            raise ValueError(
+                f"name = {name!r} already on cache. "
+                "Please, choose a different name or set name = None. "
+            )
+
+    ports = pop_port_labels(layout, topcell)
+    metadata = topcell.property(METADATA_PROPERTY)
+    if flatten:
+        topcell.flatten(True)
+    component = get_component(layout, topcell, snap_to_grid_nm=snap_to_grid_nm)
+    if name:
+        component.name = name
+
+    for port in ports:
+        if port["name"] not in component.ports:
+            orientation = port.pop("orientation")
+            component.add_port(
+                orientation=0 if orientation is None else orientation, **port
+            )
+            component.ports[port["name"]].orientation = orientation
+
+    if metadata:
+        settings = OmegaConf.to_container(OmegaConf.create(metadata)).get(
+            "settings", {}
+        )
+        try:
+            component.settings = Settings(**settings)
+        except ValidationError:
+            component.settings = settings
+
+    if decorator:
+        component_new = decorator(component)
+        component = component_new or component
+    component.info.update(**kwargs)
+    component.lock()
+    return component
+
+
+def test_import_oas() -> None:
+    import numpy as np
+
+    import gdsfactory as gf
+
+    c = gf.components.mzi()
+    oaspath = c.write_oas()
+    c2 = import_oas(oaspath)
+
+    assert c2.name == f"{c.name}$"
+    assert c2.settings.name == c.settings.name
+    # klayout snaps points to the database unit and changes the polygons start point
+    polygons = c.get_polygons(by_spec=True)
+    polygons2 = c2.get_polygons(by_spec=True)
+    assert polygons.keys() == polygons2.keys()
+    for layer, area in c.area(by_spec=True).items():
+        assert len(polygons[layer]) == len(polygons2[layer])
+        assert abs(area - c2.area(by_spec=True)[layer]) < 1e-3 * area
+    assert set(c2.ports.keys()) == set(c.ports.keys())
+    for port_name, port in c.ports.items():
+        assert np.allclose(port.midpoint, c2.ports[port_name].midpoint, atol=1e-3)
+        assert port.width == c2.ports[port_name].width
+    assert import_oas(oaspath) is c2
+
+
+def test_import_oas_changed(tmp_path: pathlib.Path) -> None:
+    """Importing a file again after it changed returns the new component."""
+    import gdsfactory as gf
+
+    oaspath = tmp_path / "c.oas"
+    c = gf.Component("import_oas_changed")
+    c.add_polygon([(0, 0), (1, 0), (1, 1)], layer=(1, 0))
+    c.add_port("o1", midpoint=(0, 0), width=1, orientation=0, layer=(1, 0))
+    c.ports["o1"].orientation = None
+    c.write_oas(oaspath)
+    c1 = import_oas(oaspath)
+    assert c1.ports["o1"].orientation is None
+
+    c = gf.Component("import_oas_changed")
+    c.add_polygon([(0, 0), (2, 0), (2, 2)], layer=(1, 0))
+    c.write_oas(oaspath)
+    c2 = import_oas(oaspath)
+    assert c2 is not c1
+    assert c2.area() == 2
+
+
+def test_import_oas_shapes(tmp_path: pathlib.Path) -> None:
+    """Boxes, paths and polygons with holes become polygons,
+    and arrays that are not regular in the instance frame are expanded."""
+    import klayout.db as pya
+    import numpy as np
+
+    layout = pya.Layout()
+    layout.dbu = 0.001
+    layer = layout.layer(1, 0)
+    child = layout.create_cell("child")
+    child.shapes(layer).insert(pya.DBox(0, 0, 1, 1))
+    top = layout.create_cell("top")
+    polygon = pya.DPolygon(pya.DBox(0, 0, 10, 10))
+    polygon.insert_hole(pya.DBox(2, 2, 8, 8))
+    top.shapes(layer).insert(polygon)
+    top.shapes(layer).insert(pya.DPath([pya.DPoint(0, 20), pya.DPoint(10, 20)], 2))
+    top.insert(
+        pya.DCellInstArray(
+            child.cell_index(),
+            pya.DTrans(1, False, 20, 0),
+            pya.DVector(0, 2),
+            pya.DVector(-3, 0),
+            3,
+            2,
+        )
+    )
+    top.insert(
+        pya.DCellInstArray(
+            child.cell_index(),
+            pya.DTrans(0, False, 40, 0),
+            pya.DVector(2, 0),
+            pya.DVector(1, 2),
+            3,
+            2,
+        )
+    )
+    oaspath = tmp_path / "shapes.oas"
+    layout.write(str(oaspath))
+
+    c = import_oas(oaspath)
+    assert len(c.polygons) == 2
+    assert abs(c.area() - (100 - 36 + 20 + 12)) < 1e-6
+    arrays = [r for r in c.references if isinstance(r, CellArray)]
+    assert len(arrays) == 1 and len(c.references) == 1 + 6
+    assert np.allclose(arrays[0].bbox, [(16, 0), (20, 5)])
+    assert np.allclose(c.bbox, [(0, 0), (46, 21)])
+
+
+def test_import_oas_labels(tmp_path: pathlib.Path) -> None:
+    """Label texts, positions and layers survive a round trip,
+    while rotation and anchor do not, as OASIS texts do not store them."""
+    import gdsfactory as gf
+
+    c = gf.Component("import_oas_labels")
+    c.add_polygon([(0, 0), (1, 0), (1, 1)], layer=(1, 0))
+    c.add_label("a", position=(1, 2), rotation=90, anchor="ne", layer=(10, 0))
+    c.add_label("b", position=(3, 4), anchor="s", layer=(11, 0))
+    c2 = import_oas(c.write_oas(tmp_path / "labels.oas"))
+
+    labels = {
+        label.text: (tuple(label.position), (label.layer, label.texttype))
+        for label in c2.labels
+    }
+    assert labels == {"a": ((1, 2), (10, 0)), "b": ((3, 4), (11, 0))}
+    for label in c2.labels:
+        assert not label.rotation
+        assert label.anchor == 5  # "o"
+
+
+if __name__ == "__main__":
+    gdspath = CONFIG["gdsdir"] / "mzi2x2.gds"
+    c = import_gds(gdspath)
+    oaspath = c.write_oas()
+    c2 = import_oas(oaspath)
+    print(c2.ports)
+    c2.show()
@@ -20,6 +20,7 @@ from gdsfactory.routing.get_route import (
     get_route_electrical,
     get_route_from_waypoints,
 )
+from gdsfactory.routing.get_route_astar import get_route_astar
 from gdsfactory.routing.get_route_from_steps import get_route_from_steps
 from gdsfactory.routing.get_route_sbend import get_route_sbend
 from gdsfactory.routing.get_routes_bend180 import get_routes_bend180
@@ -41,6 +42,7 @@ __all__ = [
     "get_bundle_path_length_match",
     "get_bundle_from_waypoints",
     "get_route",
+    "get_route_astar",
     "get_route_electrical",
     "get_routes_bend180",
     "get_routes_straight",
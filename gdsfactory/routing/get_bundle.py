@@ -26,7 +26,11 @@ from gdsfactory.port import Port
 from gdsfactory.routing.get_bundle_corner import get_bundle_corner
 from gdsfactory.routing.get_bundle_u import get_bundle_udirect, get_bundle_uindirect
 from gdsfactory.routing.get_route import get_route, get_route_from_waypoints
-from gdsfactory.routing.manhattan import generate_manhattan_waypoints
+from gdsfactory.routing.manhattan import (
+    generate_manhattan_waypoints,
+    generate_manhattan_waypoints_batch,
+    round_corners_batch,
+)
 from gdsfactory.routing.sort_ports import get_port_x, get_port_y
 from gdsfactory.routing.sort_ports import sort_ports as sort_ports_function
 from gdsfactory.types import ComponentFactory, CrossSectionFactory, Number, Route
@@ -45,6 +49,7 @@ def get_bundle(
     end_straight_length: float = 0.0,
     start_straight_length: Optional[float] = None,
     cross_section: CrossSectionFactory = strip,
+    batched: bool = False,
     **kwargs,
 ) -> List[Route]:
     """Connects a bundle of ports with a river router.
@@ -60,6 +65,9 @@ def get_bundle(
         end_straight_length:
         start_straight_length:
         cross_section:
+        batched: for ports facing each other, computes the waypoints and bends
+            of all routes at once and merges the straights of each route
+            into one Component. Faster and smaller GDS for wide bundles.
         **kwargs: cross_section settings
 
     """
@@ -141,7 +149,7 @@ def get_bundle(
             and y_start > y_end
         ):
             # print("get_bundle_same_axis")
-            return get_bundle_same_axis(**params)
+            return get_bundle_same_axis(batched=batched, **params)
 
         elif start_angle == end_angle:
             # print('get_bundle_udirect')
@@ -184,8 +192,10 @@ def get_bundle_same_axis(
     end_straight_length: float = 0.0,
     start_straight_length: float = 0.0,
     bend: ComponentFactory = bend_euler,
+    straight: ComponentFactory = straight_function,
     sort_ports: bool = True,
     cross_section: CrossSectionFactory = strip,
+    batched: bool = False,
     **kwargs,
 ) -> List[Route]:
     r"""Semi auto-routing for two lists of ports.
@@ -202,6 +212,9 @@ def get_bundle_same_axis(
         end_straight_length: offset to add at the end of each straight
         sort_ports: sort the ports according to the axis.
         cross_section: cross_section
+        batched: creates the bend once, computes the waypoints and bends of all
+            routes with numpy and merges the straights of each route
+            into one Component (see round_corners_batch).
         kwargs: cross_section settings
 
     Returns:
@@ -247,6 +260,9 @@ def get_bundle_same_axis(
     if sort_ports:
         ports1, ports2 = sort_ports_function(ports1, ports2)
 
+    if batched:
+        bend = bend(cross_section=cross_section, **kwargs) if callable(bend) else bend
+
     routes = _get_bundle_waypoints(
         ports1,
         ports2,
@@ -255,12 +271,22 @@ def get_bundle_same_axis(
         cross_section=cross_section,
         end_straight_length=end_straight_length,
         start_straight_length=start_straight_length,
+        batched=batched,
         **kwargs,
     )
+    if batched:
+        return round_corners_batch(
+            routes,
+            straight=straight,
+            bend=bend,
+            cross_section=cross_section,
+            **kwargs,
+        )
     return [
         get_route_from_waypoints(
             route,
             bend=bend,
+            straight=straight,
             cross_section=cross_section,
             **kwargs,
         )
@@ -276,6 +302,7 @@ def _get_bundle_waypoints(
     tol: float = 0.00001,
     start_straight_length: float = 0.0,
     cross_section: CrossSectionFactory = strip,
+    batched: bool = False,
     **kwargs,
 ) -> List[ndarray]:
     """Returns route coordinates List
@@ -288,6 +315,7 @@ def _get_bundle_waypoints(
         tol: tolerance
         start_straight_length: length of straight
         cross_section: cross_section
+        batched: computes the waypoints of all the routes together
         kwargs: cross_section settings
     """
 
@@ -389,6 +417,16 @@ def _get_bundle_waypoints(
 
     end_straights += [max(x - L, 0) + Le for x in end_straights_in_group]
 
+    if batched:
+        return generate_manhattan_waypoints_batch(
+            ports1,
+            ports2,
+            end_straight_lengths=end_straights,
+            start_straight_length=start_straight_length,
+            cross_section=cross_section,
+            **kwargs,
+        )
+
     # Second pass - route the ports pairwise
     N = len(ports1)
     for i in range(N):
@@ -0,0 +1,503 @@
+"""`get_route_astar` returns a Manhattan route between two ports that avoids obstacles.
+
+Unlike `get_route`, which only looks at the two ports, it searches a path
+around the keep-out boxes of the component:
+
+ 1. Index the keep-out boxes (bounding boxes of the component references,
+ or of the polygons on some layers) in an `ObstacleIndex`.
+ You can build the index once and reuse it for many routes.
+
+ 2. Build a sparse grid with the obstacle edges (grown by the route half width and
+ a clearance) that are close to the ports, so the grid only has the lines
+ where a shortest route can turn.
+
+ 3. Search the grid with A*, where each bend costs `bend_cost`,
+ consecutive bends are at least two bend sizes apart and each bend footprint
+ is checked against the obstacles.
+
+ 4. Replace the corners by bends and straights with `round_corners`.
+
+"""
+import bisect
+import heapq
+from typing import List, Optional, Tuple
+
+import numpy as np
+from numpy import ndarray
+from phidl.device_layout import _parse_layer
+
+from gdsfactory.component import Component
+from gdsfactory.components.bend_euler import bend_euler
+from gdsfactory.components.straight import straight as straight_function
+from gdsfactory.cross_section import strip
+from gdsfactory.port import Port
+from gdsfactory.routing.manhattan import RouteError, _get_bend_size, round_corners
+from gdsfactory.spatial_index import BoxIndex
+from gdsfactory.types import (
+    ComponentFactory,
+    ComponentOrFactory,
+    CrossSectionFactory,
+    Layers,
+    Route,
+)
+
+# East, North, West, South
+DIRECTIONS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+TOLERANCE = 1e-6
+
+
+class ObstacleIndex(BoxIndex):
+    """Spatial index of keep-out boxes.
+
+    Boxes are stored in square bins, so querying a window only looks at
+    the boxes in the bins that the window overlaps.
+
+    Args:
+        boxes: array of (xmin, ymin, xmax, ymax).
+        bin_size: bin side. Defaults to the typical box size.
+    """
+
+    def __init__(self, boxes: ndarray, bin_size: Optional[float] = None) -> None:
+        boxes = np.round(np.asarray(boxes, dtype=float).reshape(-1, 4), 3)
+        super().__init__(boxes, bin_size=bin_size)
+
+    @classmethod
+    def from_component(
+        cls, component: Component, layers: Optional[Layers] = None
+    ) -> "ObstacleIndex":
+        """Returns the index of the keep-out boxes of a component.
+
+        Reuses the bounding boxes of the component spatial index.
+
+        Args:
+            component: with obstacles.
+            layers: layers of the polygons to avoid (polygon bounding boxes).
+                None avoids the bounding boxes of the component references.
+        """
+        if layers is None:
+            boxes = component._get_reference_index().boxes
+        else:
+            index = component._get_polygon_index()
+            boxes = [
+                index[layer][0].boxes
+                for layer in map(_parse_layer, layers)
+                if layer in index
+            ]
+            boxes = np.concatenate(boxes) if boxes else np.zeros((0, 4))
+        return cls(boxes)
+
+    def query(self, xmin: float, ymin: float, xmax: float, ymax: float) -> ndarray:
+        """Returns the boxes that overlap a window."""
+        boxes = super().query(xmin, ymin, xmax, ymax)
+        overlap = (
+            (boxes[:, 0] < xmax)
+            & (boxes[:, 2] > xmin)
+            & (boxes[:, 1] < ymax)
+            & (boxes[:, 3] > ymin)
+        )
+        return boxes[overlap]
+
+
+def _get_direction(orientation: float) -> int:
+    direction = int(round(orientation / 90)) % 4
+    if abs(orientation - 90 * round(orientation / 90)) > TOLERANCE:
+        raise RouteError(f"port orientation {orientation} is not Manhattan")
+    return direction
+
+
+def _get_escape_length(
+    point: ndarray, direction: int, boxes: ndarray, min_length: float
+) -> float:
+    """Returns the distance to leave the boxes that contain a point,
+    moving along a direction."""
+    dx, dy = DIRECTIONS[direction]
+    length = 0.0
+    for _ in range(len(boxes) + 1):
+        x, y = point + length * np.array([dx, dy])
+        inside = (
+            (boxes[:, 0] < x + TOLERANCE)
+            & (boxes[:, 2] > x - TOLERANCE)
+            & (boxes[:, 1] < y + TOLERANCE)
+            & (boxes[:, 3] > y - TOLERANCE)
+        )
+        if not inside.any():
+            break
+        b = boxes[inside]
+        exits = [b[:, 2] - x, b[:, 3] - y, x - b[:, 0], y - b[:, 1]][direction]
+        length += float(exits.max()) + TOLERANCE
+    return max(length, min_length)
+
+
+def get_min_bends(dx: float, dy: float, direction: int, end_direction: int) -> int:
+    """Returns the minimum number of bends to reach a point (dx, dy) away
+    arriving with end_direction, when moving along direction."""
+    ux, uy = DIRECTIONS[direction]
+    ahead = dx * ux + dy * uy
+    left = dy * ux - dx * uy
+    turn = (end_direction - direction) % 4
+
+    if turn == 0:
+        if abs(left) < TOLERANCE and ahead > -TOLERANCE:
+            return 0
+        return 2 if ahead > -TOLERANCE else 4
+    if turn == 2:
+        return 2 if abs(left) > TOLERANCE else 4
+    side = left if turn == 1 else -left
+    return 1 if ahead > -TOLERANCE and side > -TOLERANCE else 3
+
+
+def _search(
+    start: ndarray,
+    start_direction: int,
+    end: ndarray,
+    end_direction: int,
+    boxes: ndarray,
+    window: Tuple[float, float, float, float],
+    bend_size: float,
+    bend_cost: float,
+) -> Optional[List[ndarray]]:
+    """Returns the corners of the shortest path on the sparse grid (or None)."""
+    xmin, ymin, xmax, ymax = window
+    boxes = boxes.copy()
+    boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], xmin, xmax)
+    boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], ymin, ymax)
+    boxes = np.round(boxes, 3)
+    d = 2 * bend_size
+    xs = np.unique(
+        np.round(
+            np.concatenate(
+                [
+                    boxes[:, 0],
+                    boxes[:, 2],
+                    [xmin, xmax, start[0], end[0]],
+                    [start[0] - d, start[0] + d, end[0] - d, end[0] + d],
+                ]
+            ),
+            3,
+        )
+    )
+    ys = np.unique(
+        np.round(
+            np.concatenate(
+                [
+                    boxes[:, 1],
+                    boxes[:, 3],
+                    [ymin, ymax, start[1], end[1]],
+                    [start[1] - d, start[1] + d, end[1] - d, end[1] + d],
+                ]
+            ),
+            3,
+        )
+    )
+    xs = xs[(xs >= xmin) & (xs <= xmax)]
+    ys = ys[(ys >= ymin) & (ys <= ymax)]
+    nx, ny = len(xs), len(ys)
+
+    # blocked_h[i][j]: edge from node (i, j) to (i + 1, j) crosses an obstacle
+    # blocked_v[i][j]: edge from node (i, j) to (i, j + 1) crosses an obstacle
+    # cells[i, j]: grid cell between nodes (i, j) and (i + 1, j + 1) is an obstacle
+    blocked_h = np.zeros((nx, ny), dtype=bool)
+    blocked_v = np.zeros((nx, ny), dtype=bool)
+    cells = np.zeros((nx, ny), dtype=np.int32)
+    for x0, y0, x1, y1 in boxes:
+        i0, i1 = np.searchsorted(xs, [x0, x1], side="left")
+        j0, j1 = np.searchsorted(ys, [y0, y1], side="left")
+        ii0 = np.searchsorted(xs, x0, side="right")
+        jj0 = np.searchsorted(ys, y0, side="right")
+        blocked_h[i0:i1, jj0:j1] = True
+        blocked_v[ii0:i1, j0:j1] = True
+        cells[i0:i1, j0:j1] = 1
+
+    # cells_sum[i][j]: number of obstacle cells in cells[:i, :j]
+    cells_sum = np.zeros((nx + 1, ny + 1), dtype=np.int32)
+    cells_sum[1:, 1:] = cells.cumsum(axis=0).cumsum(axis=1)
+    cells_sum = cells_sum.tolist()
+    blocked_h = blocked_h.tolist()
+    blocked_v = blocked_v.tolist()
+    xs_list = xs.tolist()
+    ys_list = ys.tolist()
+
+    i_start, i_end = np.searchsorted(xs, np.round([start[0], end[0]], 3)).tolist()
+    j_start, j_end = np.searchsorted(ys, np.round([start[1], end[1]], 3)).tolist()
+
+    def is_blocked(i: int, j: int, direction: int) -> bool:
+        if direction == 0:
+            return i + 1 >= nx or blocked_h[i][j]
+        if direction == 2:
+            return i == 0 or blocked_h[i - 1][j]
+        if direction == 1:
+            return j + 1 >= ny or blocked_v[i][j]
+        return j == 0 or blocked_v[i][j - 1]
+
+    def is_bend_free(i: int, j: int, direction_in: int, direction_out: int) -> bool:
+        """Returns True if no obstacle cell overlaps the bend bounding box."""
+        x, y = xs_list[i], ys_list[j]
+        dx0, dy0 = DIRECTIONS[direction_in]
+        dx1, dy1 = DIRECTIONS[direction_out]
+        xa, xb = sorted([x - bend_size * dx0, x + bend_size * dx1])
+        ya, yb = sorted([y - bend_size * dy0, y + bend_size * dy1])
+        ia = max(bisect.bisect_right(xs_list, xa + TOLERANCE) - 1, 0)
+        ib = bisect.bisect_left(xs_list, xb - TOLERANCE)
+        ja = max(bisect.bisect_right(ys_list, ya + TOLERANCE) - 1, 0)
+        jb = bisect.bisect_left(ys_list, yb - TOLERANCE)
+        return (
+            cells_sum[ib][jb] - cells_sum[ia][jb] - cells_sum[ib][ja] + cells_sum[ia][ja]
+            == 0
+        )
+
+    x_end = xs_list[i_end]
+    y_end = ys_list[j_end]
+    goal = (i_end, j_end, end_direction)
+
+    def heuristic(i: int, j: int, direction: int) -> float:
+        dx = x_end - xs_list[i]
+        dy = y_end - ys_list[j]
+        bends = get_min_bends(dx, dy, direction, end_direction)
+        return abs(dx) + abs(dy) + bend_cost * bends
+
+    def slide(i: int, j: int, direction: int) -> Tuple[Optional[tuple], float]:
+        """Returns the first node at least 2 bend sizes away (where the route can
+        bend again) or the goal if it is on the way, and the straight length."""
+        dx, dy = DIRECTIONS[direction]
+        length = 0.0
+        while not is_blocked(i, j, direction):
+            length += abs(xs_list[i + dx] - xs_list[i]) + abs(
+                ys_list[j + dy] - ys_list[j]
+            )
+            i, j = i + dx, j + dy
+            if (i, j, direction) == goal or length >= d - TOLERANCE:
+                return (i, j, direction), length
+        return None, length
+
+    # state: (i, j, direction) on a node where the route can bend.
+    # A bend slides the route at least 2 bend sizes before the next state,
+    # so consecutive bends never overlap.
+    start_state = (i_start, j_start, start_direction)
+    costs = {start_state: 0.0}
+    parents = {start_state: (None, False)}
+    queue = [(heuristic(*start_state), -0.0, start_state)]
+
+    while queue:
+        _, cost, state = heapq.heappop(queue)
+        cost = -cost
+        if cost > costs[state] + TOLERANCE:
+            continue
+        if state == goal:
+            break
+        i, j, direction = state
+
+        moves = []
+        if not is_blocked(i, j, direction):
+            dx, dy = DIRECTIONS[direction]
+            length = abs(xs_list[i + dx] - xs_list[i]) + abs(
+                ys_list[j + dy] - ys_list[j]
+            )
+            moves.append(((i + dx, j + dy, direction), length, False))
+        for turn in (1, 3):
+            direction_out = (direction + turn) % 4
+            if not is_bend_free(i, j, direction, direction_out):
+                continue
+            state_new, length = slide(i, j, direction_out)
+            if state_new is not None:
+                moves.append((state_new, bend_cost + length, True))
+
+        for state_new, move_cost, bend in moves:
+            cost_new = cost + move_cost
+            if cost_new < costs.get(state_new, np.inf) - TOLERANCE:
+                costs[state_new] = cost_new
+                parents[state_new] = (state, bend)
+                # ties are broken towards the longest route so far (closer to the goal)
+                # rounding avoids breaking ties with floating point noise
+                heapq.heappush(
+                    queue,
+                    (round(cost_new + heuristic(*state_new), 6), -cost_new, state_new),
+                )
+    else:
+        return None
+
+    corners = []
+    while state is not None:
+        parent, bend = parents[state]
+        if bend:
+            corners.append(np.array([xs_list[parent[0]], ys_list[parent[1]]]))
+        state = parent
+    return corners[::-1]
+
+
+def get_route_astar(
+    component: Component,
+    input_port: Port,
+    output_port: Port,
+    obstacles: Optional[ObstacleIndex] = None,
+    layers: Optional[Layers] = None,
+    clearance: float = 2.0,
+    bend_cost: Optional[float] = None,
+    margin: float = 100.0,
+    bend: ComponentOrFactory = bend_euler,
+    straight: ComponentFactory = straight_function,
+    taper: Optional[ComponentFactory] = None,
+    start_straight_length: float = 0.01,
+    end_straight_length: float = 0.01,
+    cross_section: CrossSectionFactory = strip,
+    **kwargs,
+) -> Route:
+    """Returns a Manhattan Route between 2 ports that avoids the component obstacles.
+
+    The references are straights and bends.
+    The ports leave straight out of their own component before the first bend.
+
+    Args:
+        component: with obstacles (the route references are not added to it).
+        input_port: start port.
+        output_port: end port.
+        obstacles: keep-out index. Defaults to ObstacleIndex.from_component.
+            Build it once to route many ports on the same component.
+        layers: layers of the polygons to avoid. None avoids the reference boxes.
+        clearance: minimum distance between the route and the obstacles.
+        bend_cost: cost of each bend, in um of straight. Defaults to 2 bend sizes.
+        margin: searches a window around the ports grown by this margin first,
+            and then the whole component if there is no route in the window.
+        bend: function that returns bends.
+        straight: function that returns straights.
+        taper: function that returns tapers.
+        start_straight_length: length of starting straight (out of the obstacles).
+        end_straight_length: length of end straight (out of the obstacles).
+        cross_section: for the route.
+        kwargs: cross_section settings.
+
+    .. plot::
+        :include-source:
+
+        import gdsfactory as gf
+
+        c = gf.Component("get_route_astar_sample")
+        w = gf.components.straight()
+        left = c << w
+        right = c << w
+        right.move((100, 80))
+
+        obstacle = c << gf.components.rectangle(size=(40, 40), layer=(2, 0))
+        obstacle.move((40, 20))
+
+        route = gf.routing.get_route_astar(c, left.ports["o2"], right.ports["o1"])
+        c.add(route.references)
+        c.plot()
+
+    """
+    x = cross_section(**kwargs)
+    width = x.info.get("width", input_port.width)
+    bend90 = bend(cross_section=cross_section, **kwargs) if callable(bend) else bend
+    bend_size = float(_get_bend_size(bend90))
+    bend_cost = 2 * bend_size if bend_cost is None else float(bend_cost)
+
+    if obstacles is None:
+        obstacles = ObstacleIndex.from_component(component, layers=layers)
+    grow = width / 2 + clearance
+
+    port_points = [np.array(input_port.midpoint), np.array(output_port.midpoint)]
+    directions = [
+        _get_direction(input_port.orientation),
+        _get_direction(output_port.orientation),
+    ]
+    straight_lengths = [start_straight_length, end_straight_length]
+    escape_points = []
+    for point, direction, straight_length in zip(
+        port_points, directions, straight_lengths
+    ):
+        near = obstacles.query(*(point - grow), *(point + grow))
+        near = near + np.array([-grow, -grow, grow, grow])
+        length = _get_escape_length(point, direction, near, straight_length)
+        escape_points.append(
+            point + (length + bend_size) * np.array(DIRECTIONS[direction])
+        )
+
+    start, end = escape_points
+    start_direction = directions[0]
+    end_direction = (directions[1] + 2) % 4
+
+    xy = np.array(port_points + escape_points)
+    window = (*(xy.min(axis=0) - margin), *(xy.max(axis=0) + margin))
+    corners = None
+    for _ in range(2):
+        boxes = obstacles.query(*window) + np.array([-grow, -grow, grow, grow])
+        corners = _search(
+            start=start,
+            start_direction=start_direction,
+            end=end,
+            end_direction=end_direction,
+            boxes=boxes,
+            window=window,
+            bend_size=bend_size,
+            bend_cost=bend_cost,
+        )
+        if corners is not None:
+            break
+        bbox = obstacles.get_bbox()
+        window = (
+            min(window[0], bbox[0] - margin),
+            min(window[1], bbox[1] - margin),
+            max(window[2], bbox[2] + margin),
+            max(window[3], bbox[3] + margin),
+        )
+
+    if corners is None:
+        raise RouteError(
+            f"No route found between {input_port.name} at {input_port.midpoint} "
+            f"and {output_port.name} at {output_port.midpoint}"
+        )
+
+    points = np.array([port_points[0], start, *corners, end, port_points[1]])
+    keep = np.abs(np.diff(points, axis=0)).max(axis=1) > TOLERANCE
+    points = points[np.concatenate([[True], keep])]
+    return round_corners(
+        points=points,
+        bend=bend90,
+        straight=straight,
+        taper=taper,
+        cross_section=cross_section,
+        **kwargs,
+    )
+
+
+def test_get_route_astar() -> Component:
+    import gdsfactory as gf
+
+    c = gf.Component("test_get_route_astar")
+    w = gf.components.straight()
+    left = c << w
+    right = c << w
+    right.move((100, 80))
+
+    obstacle = c << gf.components.rectangle(size=(40, 40), layer=(2, 0))
+    obstacle.move((40, 20))
+    (xmin, ymin), (xmax, ymax) = obstacle.bbox
+
+    route = get_route_astar(c, left.ports["o2"], right.ports["o1"])
+    for reference in route.references:
+        (x0, y0), (x1, y1) = reference.bbox
+        assert x1 <= xmin or x0 >= xmax or y1 <= ymin or y0 >= ymax, reference
+    c.add(route.references)
+    return c
+
+
+def test_get_route_astar_no_obstacles() -> None:
+    """An empty obstacle index is used as is: the route ignores the rectangle."""
+    import gdsfactory as gf
+
+    c = gf.Component("test_get_route_astar_no_obstacles")
+    w = gf.components.straight()
+    left = c << w
+    right = c << w
+    right.movex(100)
+    obstacle = c << gf.components.rectangle(size=(40, 40), layer=(2, 0))
+    obstacle.move((40, -20))
+
+    obstacles = ObstacleIndex(np.zeros((0, 4)))
+    route = get_route_astar(c, left.ports["o2"], right.ports["o1"], obstacles=obstacles)
+    assert len(route.references) == 1
+    assert np.isclose(route.length, 90)
+
+
+if __name__ == "__main__":
+    c = test_get_route_astar()
+    c.show()
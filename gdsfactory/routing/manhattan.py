@@ -1,6 +1,6 @@
 import uuid
 import warnings
-from typing import Callable, Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
 import gdspy
 import numpy as np
@@ -8,6 +8,7 @@ import pytest
 from numpy import bool_, ndarray
 
 import gdsfactory as gf
+from gdsfactory.cell import cell_without_validator
 from gdsfactory.component import Component, ComponentReference
 from gdsfactory.components.bend_euler import bend_euler
 from gdsfactory.components.bend_s import bend_s
@@ -530,6 +531,97 @@ def get_route_error(
     return Route(references=references, ports=[port1, port2], length=-1, labels=labels)
 
 
+class RouteArrays(NamedTuple):
+    """Bends and straight sections of manhattan routes, as arrays.
+
+    Segments are the sections between consecutive waypoints.
+    Corners are the waypoints between two segments, where the bends go.
+    """
+
+    segment_route: ndarray  # route index of each segment
+    directions: ndarray  # unit vector along each segment
+    angles: ndarray  # direction of each segment (deg)
+    starts: ndarray  # where the straight of each segment starts
+    straight_lengths: ndarray  # snapped straight length of each segment
+    corner_route: ndarray  # route index of each corner
+    origins: ndarray  # bend reference origins
+    rotations: ndarray  # bend reference rotations (deg)
+    x_reflections: ndarray  # bend reference reflections
+    is_valid: ndarray  # routes that are manhattan and where the bends fit
+
+
+def get_route_arrays(
+    points_list: List[ndarray], port_west: Port, port_north: Port
+) -> RouteArrays:
+    """Returns the bend placements and straight sections of manhattan routes.
+
+    Computes all the routes together with numpy. Bends turning left go as they are,
+    bends turning right are mirrored, and both are rotated along the incoming
+    segment with the west port `leg_in` before the corner.
+
+    Args:
+        points_list: waypoints of each route, without flat angles.
+        port_west: bend port facing west.
+        port_north: bend port facing north.
+    """
+    # bend legs before and after the corner
+    leg_in, leg_out = port_north.midpoint - port_west.midpoint
+    nroutes = len(points_list)
+    sizes = np.array([len(points) for points in points_list])
+    if np.any(sizes < 2):
+        raise ValueError(f"routes need at least 2 waypoints, got {sizes.min()}")
+    points = np.concatenate(points_list)
+
+    # segments between consecutive points of the same route
+    is_segment = np.ones(len(points) - 1, dtype=bool)
+    is_segment[np.cumsum(sizes)[:-1] - 1] = False
+    segments = np.flatnonzero(is_segment)
+    segment_route = np.repeat(np.arange(nroutes), sizes - 1)
+    delta = points[segments + 1] - points[segments]
+    lengths = np.abs(delta).sum(axis=1)
+    directions = np.where(np.abs(delta) < TOLERANCE, 0, np.sign(delta))
+    is_manhattan = (np.abs(directions).sum(axis=1) == 1) & (lengths > TOLERANCE)
+    angles = np.round(np.degrees(np.arctan2(directions[:, 1], directions[:, 0])))
+    angles = angles % 360
+
+    # corners between consecutive segments of the same route
+    corners = np.flatnonzero(segment_route[1:] == segment_route[:-1])
+    d_in = directions[corners]
+    d_out = directions[corners + 1]
+    turn = d_in[:, 0] * d_out[:, 1] - d_in[:, 1] * d_out[:, 0]
+    corner_route = segment_route[corners]
+
+    trim_start = np.zeros(len(segments))
+    trim_end = np.zeros(len(segments))
+    trim_end[corners] = leg_in
+    trim_start[corners + 1] = leg_out
+    straight_lengths = snap_to_grid(lengths - trim_start - trim_end)
+    starts = points[segments] + trim_start[:, None] * directions
+
+    is_valid = np.ones(nroutes, dtype=bool)
+    is_valid[segment_route[~is_manhattan | (straight_lengths < -TOLERANCE)]] = False
+    is_valid[corner_route[np.abs(turn) != 1]] = False
+
+    mirror = np.where(turn < 0, -1, 1)
+    wx, wy = port_west.midpoint
+    cos, sin = d_in[:, 0], d_in[:, 1]
+    west = np.stack([cos * wx - sin * wy * mirror, sin * wx + cos * wy * mirror], 1)
+    origins = points[segments[corners] + 1] - leg_in * d_in - west
+
+    return RouteArrays(
+        segment_route=segment_route,
+        directions=directions,
+        angles=angles,
+        starts=starts,
+        straight_lengths=straight_lengths,
+        corner_route=corner_route,
+        origins=origins,
+        rotations=angles[corners],
+        x_reflections=turn < 0,
+        is_valid=is_valid,
+    )
+
+
 def round_corners(
     points: Coordinates,
     straight: ComponentFactory = straight_function,
@@ -551,6 +643,9 @@ def round_corners(
     - ports: Tuple of ports
     - length: route length (float)
 
+    The bend placements and straight lengths are computed for all the corners
+    at once (see get_route_arrays).
+
     Args:
         points: manhattan route defined by waypoints
         bend90: the bend to use for 90Deg turns
@@ -577,7 +672,6 @@ def round_corners(
     width_wide = x.info.get("width_wide", None)
     references = []
     bend90 = bend(cross_section=cross_section, **kwargs) if callable(bend) else bend
-    # bsx = bsy = _get_bend_size(bend90)
     taper = taper or taper_function(
         cross_section=cross_section,
         width1=width,
@@ -596,141 +690,48 @@ def round_corners(
 
     # Remove any flat angle, otherwise the algorithm won't work
     points = remove_flat_angles(points)
-    points = np.array(points)
-
-    straight_sections = []  # (p0, angle, length)
-    p0_straight = points[0]
-    p1 = points[1]
-
-    total_length = 0  # Keep track of the total path length
+    points = np.array(points, dtype=float)
 
     if not bend90.info.get("length"):
         raise ValueError(f"bend {bend90} needs to have bend.info['length'] defined")
 
     bend_length = bend90.info["length"]
 
-    dp = p1 - p0_straight
-    bend_orientation = None
-    if _is_vertical(p0_straight, p1):
-        if dp[1] > 0:
-            bend_orientation = 90
-        elif dp[1] < 0:
-            bend_orientation = 270
-    elif _is_horizontal(p0_straight, p1):
-        if dp[0] > 0:
-            bend_orientation = 0
-        elif dp[0] < 0:
-            bend_orientation = 180
-
-    if bend_orientation is None:
+    if not (_is_vertical(points[0], points[1]) ^ _is_horizontal(points[0], points[1])):
         return on_route_error(points=points, cross_section=x)
 
     layer = x.info["layer"]
     try:
-        pname_west, pname_north = [
-            p.name for p in _get_bend_ports(bend=bend90, layer=layer)
-        ]
+        port_west, port_north = _get_bend_ports(bend=bend90, layer=layer)
     except ValueError as exc:
         raise ValueError(
             f"Did not find 2 ports on layer {layer}. Got {list(bend90.ports.values())}"
         ) from exc
-    n_o_bends = points.shape[0] - 2
-    total_length += n_o_bends * bend_length
 
-    previous_port_point = points[0]
-    bend_points = [previous_port_point]
-
-    # Add bend sections and record straight-section information
-    for i in range(1, points.shape[0] - 1):
-        bend_origin, rotation, x_reflection = _get_bend_reference_parameters(
-            points[i - 1], points[i], points[i + 1], bend90, x.info["layer"]
+    route = get_route_arrays([points], port_west=port_west, port_north=port_north)
+    references += [
+        ComponentReference(
+            component=bend90,
+            origin=origin,
+            rotation=float(rotation),
+            x_reflection=bool(reflect),
         )
-        bend_ref = gen_sref(bend90, rotation, x_reflection, pname_west, bend_origin)
-        references.append(bend_ref)
-
-        dx_points = points[i][0] - points[i - 1][0]
-        dy_points = points[i][1] - points[i - 1][1]
-
-        if abs(dx_points) < TOLERANCE:
-            matching_ports = [
-                port
-                for port in bend_ref.ports.values()
-                if np.isclose(port.x, points[i][0])
-            ]
-
-        if abs(dy_points) < TOLERANCE:
-            matching_ports = [
-                port
-                for port in bend_ref.ports.values()
-                if np.isclose(port.y, points[i][1])
-            ]
-
-        if matching_ports:
-            next_port = matching_ports[0]
-            other_port_name = set(bend_ref.ports.keys()) - {next_port.name}
-            other_port = bend_ref.ports[list(other_port_name)[0]]
-            bend_points.append(next_port.midpoint)
-            bend_points.append(other_port.midpoint)
-            previous_port_point = other_port.midpoint
-
-        try:
-            straight_sections += [
-                (
-                    p0_straight,
-                    bend_orientation,
-                    get_straight_distance(p0_straight, bend_origin),
-                )
-            ]
-        except RouteError:
-            on_route_error(
-                points=(p0_straight, bend_origin),
-                cross_section=x,
-                references=references,
-            )
-
-        p0_straight = bend_ref.ports[pname_north].midpoint
-        bend_orientation = bend_ref.ports[pname_north].orientation
-
-    bend_points.append(points[-1])
-
-    try:
-        straight_sections += [
-            (
-                p0_straight,
-                bend_orientation,
-                get_straight_distance(p0_straight, points[-1]),
-            )
-        ]
-    except RouteError:
-        on_route_error(
-            points=(p0_straight, points[-1]),
-            cross_section=x,
-            references=references,
+        for origin, rotation, reflect in zip(
+            route.origins, route.rotations, route.x_reflections
         )
+    ]
+    if not route.is_valid[0]:
+        return on_route_error(points=points, cross_section=x, references=references)
 
-    # with_point_markers=True
-    # print()
-    # for i, point in enumerate(points):
-    #     print(i, point)
-    # print()
-    # for i, point in enumerate(bend_points):
-    #     print(i, point)
-
-    # ensure bend connectivity
-    for i, point in enumerate(points[:-1]):
-        sx = np.sign(points[i + 1][0] - point[0])
-        sy = np.sign(points[i + 1][1] - point[1])
-        bsx = np.sign(bend_points[2 * i + 1][0] - bend_points[2 * i][0])
-        bsy = np.sign(bend_points[2 * i + 1][1] - bend_points[2 * i][1])
-        if bsx * sx == -1 or bsy * sy == -1:
-            return on_route_error(points=points, cross_section=x, references=references)
+    total_length = len(references) * bend_length + np.sum(route.straight_lengths)
 
+    straights: Dict[float, Component] = {}
     wg_refs = []
-    for straight_origin, angle, length in straight_sections:
+    for straight_origin, angle, length in zip(
+        route.starts, route.angles.tolist(), route.straight_lengths.tolist()
+    ):
         with_taper = False
-        # wg_width = list(bend90.ports.values())[0].width
-        length = snap_to_grid(length)
-        total_length += length
+        port_index_out = 1
 
         if auto_widen and length > auto_widen_minimum_length and width_wide:
             # Taper starts where straight would have started
@@ -756,10 +757,14 @@ def round_corners(
             kwargs_wide.update(width=width_wide)
             cross_section_wide = gf.partial(cross_section, **kwargs_wide)
             wg = straight(length=length, cross_section=cross_section_wide)
+        elif length <= 0:
+            continue
         else:
-            wg = straight_fall_back_no_taper(
-                length=length, cross_section=cross_section, **kwargs
-            )
+            if length not in straights:
+                straights[length] = straight_fall_back_no_taper(
+                    length=length, cross_section=cross_section, **kwargs
+                )
+            wg = straights[length]
 
         if straight_ports is None:
             straight_ports = [
@@ -767,19 +772,21 @@ def round_corners(
             ]
         pname_west, pname_east = straight_ports
 
-        wg_ref = wg.ref()
-        wg_ref.move(wg.ports[pname_west], (0, 0))
         if mirror_straight:
+            wg_ref = wg.ref()
+            wg_ref.move(wg.ports[pname_west], (0, 0))
             wg_ref.reflect_v(list(wg_ref.ports.values())[0].name)
-
-        wg_ref.rotate(angle)
-        wg_ref.move(straight_origin)
+            wg_ref.rotate(angle)
+            wg_ref.move(straight_origin)
+        else:
+            wg_ref = wg.ref(
+                position=straight_origin, port_id=pname_west, rotation=angle
+            )
 
         if length > 0:
             references.append(wg_ref)
             wg_refs += [wg_ref]
 
-        port_index_out = 1
         if with_taper:
             # Second taper:
             # Origin at end of straight waveguide, starting from east side of taper
@@ -795,14 +802,6 @@ def round_corners(
                 rotation=angle + 180,
                 v_mirror=True,
             )
-            # references += [
-            #     gf.Label(
-            #         text=f"a{angle}",
-            #         position=taper_ref.center,
-            #         layer=2,
-            #         texttype=0,
-            #     )
-            # ]
             references.append(taper_ref)
             wg_refs += [taper_ref]
             port_index_out = 0
@@ -817,6 +816,248 @@ def round_corners(
     return Route(references=references, ports=(port_input, port_output), length=length)
 
 
+def round_corners_batch(
+    waypoints: List[Coordinates],
+    straight: ComponentFactory = straight_function,
+    bend: ComponentOrFactory = bend_euler,
+    cross_section: CrossSectionFactory = strip,
+    merge_straights: bool = True,
+    snap_to_grid_nm: int = 1,
+    **kwargs,
+) -> List[Route]:
+    """Returns a list of Routes rounding the corners of many manhattan routes.
+
+    Equivalent to `[round_corners(points) for points in waypoints]`,
+    but the cross_section and bend are created once and the bend placements and
+    straight sections of all the routes are computed together with numpy.
+
+    Routes that are not manhattan, where the bends do not fit, or that need
+    tapers (cross_section with auto_widen) are passed to round_corners.
+
+    Args:
+        waypoints: list of manhattan routes defined by waypoints.
+        straight: straight factory, used when merge_straights is False.
+        bend: bend or bend factory for the 90Deg turns.
+        cross_section: cross_section factory.
+        merge_straights: True adds all the straight sections of each route
+            into one Component with the cross_section polygons.
+            False references one straight Component for each distinct length.
+        snap_to_grid_nm: nm to snap the waypoints to.
+        kwargs: cross_section settings.
+    """
+    x = cross_section(**kwargs)
+    sections = [section for section in x.sections if not section["hidden"]]
+
+    if x.info.get("auto_widen", False) or (
+        merge_straights
+        and any(callable(s["width"]) or callable(s["offset"]) for s in sections)
+    ):
+        return [
+            round_corners(
+                points,
+                straight=straight,
+                bend=bend,
+                cross_section=cross_section,
+                snap_to_grid_nm=snap_to_grid_nm,
+                **kwargs,
+            )
+            for points in waypoints
+        ]
+    if not waypoints:
+        return []
+
+    bend90 = bend(cross_section=cross_section, **kwargs) if callable(bend) else bend
+    if not bend90.info.get("length"):
+        raise ValueError(f"bend {bend90} needs to have bend.info['length'] defined")
+    bend_length = bend90.info["length"]
+
+    layer = x.info["layer"]
+    try:
+        port_west, port_north = _get_bend_ports(bend=bend90, layer=layer)
+    except ValueError as exc:
+        raise ValueError(
+            f"Did not find 2 ports on layer {layer}. Got {list(bend90.ports.values())}"
+        ) from exc
+
+    points_list = [
+        remove_flat_angles(
+            np.array(snap_to_grid(points, nm=snap_to_grid_nm), dtype=float)
+        )
+        for points in waypoints
+    ]
+    nroutes = len(points_list)
+    sizes = np.array([len(points) for points in points_list])
+    route = get_route_arrays(points_list, port_west=port_west, port_north=port_north)
+    segment_route = route.segment_route
+    with_straight = route.straight_lengths > 1e-3
+    port_names = x.info.get("port_names") or ("o1", "o2")
+    port_types = x.info.get("port_types") or ("optical", "optical")
+    width = x.info["width"]
+
+    straights: Dict[float, Component] = {}
+
+    bend_counts = np.bincount(route.corner_route, minlength=nroutes)
+    total_lengths = np.bincount(
+        segment_route, weights=route.straight_lengths, minlength=nroutes
+    )
+    corner_slices = np.cumsum(bend_counts)
+    segment_slices = np.cumsum(sizes - 1)
+
+    routes = []
+    for i in range(nroutes):
+        if not route.is_valid[i]:
+            routes.append(
+                round_corners(
+                    points_list[i],
+                    straight=straight,
+                    bend=bend90,
+                    cross_section=cross_section,
+                    snap_to_grid_nm=snap_to_grid_nm,
+                    **kwargs,
+                )
+            )
+            continue
+
+        references = [
+            ComponentReference(
+                component=bend90,
+                origin=route.origins[j],
+                rotation=float(route.rotations[j]),
+                x_reflection=bool(route.x_reflections[j]),
+            )
+            for j in range(corner_slices[i] - bend_counts[i], corner_slices[i])
+        ]
+        route_segments = range(segment_slices[i] - sizes[i] + 1, segment_slices[i])
+
+        if merge_straights:
+            segments = [j for j in route_segments if with_straight[j]]
+            if segments:
+                c = route_straights(
+                    starts=route.starts[segments],
+                    directions=route.directions[segments],
+                    lengths=route.straight_lengths[segments],
+                    cross_section=x,
+                )
+                references.append(c.ref())
+        else:
+            for j in route_segments:
+                if not with_straight[j]:
+                    continue
+                length = float(route.straight_lengths[j])
+                if length not in straights:
+                    straights[length] = straight(
+                        length=length, cross_section=cross_section, **kwargs
+                    )
+                wg = straights[length]
+                wg_west = _get_straight_ports(wg, layer=layer)[0]
+                references.append(
+                    wg.ref(
+                        position=route.starts[j],
+                        port_id=wg_west.name,
+                        rotation=float(route.angles[j]),
+                    )
+                )
+
+        angle_first = route.angles[route_segments[0]]
+        angle_last = route.angles[route_segments[-1]]
+        port_input = Port(
+            name=port_names[0],
+            midpoint=points_list[i][0],
+            width=width,
+            orientation=angle_first + 180,
+            layer=layer,
+            port_type=port_types[0],
+            cross_section=x,
+        )
+        port_output = Port(
+            name=port_names[1],
+            midpoint=points_list[i][-1],
+            width=width,
+            orientation=angle_last,
+            layer=layer,
+            port_type=port_types[1],
+            cross_section=x,
+        )
+        length = snap_to_grid(float(total_lengths[i] + bend_counts[i] * bend_length))
+        routes.append(
+            Route(
+                references=references,
+                ports=(port_input, port_output),
+                length=length,
+            )
+        )
+    return routes
+
+
+def get_straight_polygons_batch(
+    x: CrossSection, starts: ndarray, directions: ndarray, lengths: ndarray
+) -> List[Tuple[ndarray, Layer]]:
+    """Returns (polygons, layer) for each layer of many straight sections.
+
+    Same polygons as `gf.components.straight`, including the cladding box.
+
+    Args:
+        x: cross_section with constant widths and offsets.
+        starts: (n, 2) start points.
+        directions: (n, 2) unit vectors along each straight.
+        lengths: (n,) straight lengths.
+    """
+    ends = starts + lengths[:, None] * directions
+    normals = np.stack([-directions[:, 1], directions[:, 0]], 1)
+
+    def get_polygons(offset_min: float, offset_max: float) -> ndarray:
+        top = offset_max * normals
+        bot = offset_min * normals
+        return np.stack([starts + top, ends + top, ends + bot, starts + bot], 1)
+
+    polygons_layers = []
+    offsets = []
+    for section in x.sections:
+        if section["hidden"]:
+            continue
+        width, offset, layer = section["width"], section["offset"], section["layer"]
+        if isinstance(layer, int):
+            layer = (layer, 0)
+        offsets += [offset - width / 2, offset + width / 2]
+        polygons_layers.append(
+            (get_polygons(offset - width / 2, offset + width / 2), layer)
+        )
+
+    layers_cladding = x.info.get("layers_cladding")
+    if layers_cladding and offsets:
+        cladding_offset = x.info["cladding_offset"]
+        polygons = get_polygons(
+            min(offsets) - cladding_offset, max(offsets) + cladding_offset
+        )
+        polygons_layers += [(polygons, layer) for layer in layers_cladding]
+    return polygons_layers
+
+
+@cell_without_validator
+def route_straights(
+    starts: ndarray,
+    directions: ndarray,
+    lengths: ndarray,
+    cross_section: CrossSection,
+) -> Component:
+    """Returns the straight sections of a route merged into one Component.
+
+    Cached like any other cell, so routes with the same straights share it.
+
+    Args:
+        starts: (n, 2) start points.
+        directions: (n, 2) unit vectors along each straight.
+        lengths: (n,) straight lengths.
+        cross_section: with constant widths and offsets.
+    """
+    c = Component()
+    for polygons, layer in get_straight_polygons_batch(
+        x=cross_section, starts=starts, directions=directions, lengths=lengths
+    ):
+        c.add_polygon(list(polygons), layer=layer)
+    return c
+
+
 def generate_manhattan_waypoints(
     input_port: Port,
     output_port: Port,
@@ -849,6 +1090,90 @@ def generate_manhattan_waypoints(
     return points
 
 
+def generate_manhattan_waypoints_batch(
+    ports1: List[Port],
+    ports2: List[Port],
+    end_straight_lengths: Optional[List[float]] = None,
+    start_straight_length: Optional[float] = None,
+    min_straight_length: Optional[float] = None,
+    bend: ComponentOrFactory = bend_euler,
+    cross_section: CrossSectionFactory = strip,
+    **kwargs,
+) -> List[ndarray]:
+    """Returns waypoints for Manhattan routes between many pairs of ports.
+
+    Vectorized generate_manhattan_waypoints for ports facing each other,
+    where each route is a straight line or an S-bend.
+    Other routes are passed to generate_manhattan_waypoints.
+
+    Args:
+        ports1: input ports.
+        ports2: output ports.
+        end_straight_lengths: for each route. Defaults to cross_section min_length.
+        start_straight_length: defaults to cross_section min_length.
+        min_straight_length: defaults to cross_section min_length.
+        bend: bend or bend factory.
+        cross_section: cross_section factory.
+        kwargs: cross_section settings.
+    """
+    bend90 = bend(cross_section=cross_section, **kwargs) if callable(bend) else bend
+    x = cross_section(**kwargs)
+    start_straight_length = start_straight_length or x.info.get("min_length")
+    min_straight_length = min_straight_length or x.info.get("min_length")
+    if end_straight_lengths is None:
+        end_straight_lengths = [None] * len(ports1)
+    end_straight_lengths = np.array(
+        [length or x.info.get("min_length") for length in end_straight_lengths],
+        dtype=float,
+    )
+    bs = _get_bend_size(bend90)
+    threshold = TOLERANCE
+
+    p_input = np.array([port.midpoint for port in ports1], dtype=float)
+    p_output = np.array([port.midpoint for port in ports2], dtype=float)
+    angle_input = np.array([port.orientation for port in ports1], dtype=float)
+    angle_output = np.array([port.orientation for port in ports2], dtype=float)
+
+    # d: route direction at the output, n: normal
+    a = np.radians(angle_output + 180)
+    d = np.round(np.stack([np.cos(a), np.sin(a)], 1), 12)
+    n = np.stack([-d[:, 1], d[:, 0]], 1)
+    u = np.sum((p_input - p_output) * d, axis=1)
+    v = np.sum((p_input - p_output) * n, axis=1)
+
+    is_aligned = np.mod(angle_input - angle_output - 180, 360) < threshold
+    is_straight = is_aligned & (np.abs(v) < threshold) & (u <= threshold)
+    is_sbend = (
+        is_aligned
+        & ~is_straight
+        & (u + 2 * bs + end_straight_lengths + start_straight_length < threshold)
+        & (np.abs(v) - (2 * bs + min_straight_length) > -threshold)
+    )
+    p_turn = p_output - (end_straight_lengths + bs)[:, None] * d
+    p_sbend = np.stack([p_input, p_turn + v[:, None] * n, p_turn, p_output], 1)
+
+    waypoints = []
+    for i, (port1, port2) in enumerate(zip(ports1, ports2)):
+        if is_straight[i]:
+            waypoints.append(np.stack([p_input[i], p_output[i]]))
+        elif is_sbend[i]:
+            waypoints.append(p_sbend[i])
+        else:
+            waypoints.append(
+                generate_manhattan_waypoints(
+                    port1,
+                    port2,
+                    start_straight_length=start_straight_length,
+                    end_straight_length=end_straight_lengths[i],
+                    min_straight_length=min_straight_length,
+                    bend=bend90,
+                    cross_section=cross_section,
+                    **kwargs,
+                )
+            )
+    return waypoints
+
+
 def _get_bend_size(bend90: Component):
     p1, p2 = list(bend90.ports.values())[:2]
     bsx = abs(p2.x - p1.x)
@@ -2,7 +2,7 @@ import copy
 import functools
 import inspect
 import pathlib
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Tuple
 
 import numpy as np
 import orjson
@@ -27,8 +27,21 @@ def get_string(value: Any) -> str:
     ).decode()
 
 
+@functools.lru_cache(maxsize=None)
+def get_parameter_names(func: Callable) -> Tuple[str, ...]:
+    """Returns the parameter names of a function, computed only once per function."""
+    return tuple(inspect.signature(func).parameters.keys())
+
+
 def clean_value_name(value: Any) -> str:
     """Returns a string representation of an object."""
+    value_type = type(value)
+    # fast path for the most common cell arguments
+    if value_type in (int, str, bool):
+        return value
+    elif value_type is float:
+        return str(int(value)) if int(value) == value else str(value)
+
     if isinstance(value, pydantic.BaseModel):
         value = str(value)
     elif isinstance(value, float) and int(value) == value:
@@ -44,8 +57,7 @@ def clean_value_name(value: Any) -> str:
         value = np.round(value, 3)
         value = get_string(value)
     elif callable(value) and isinstance(value, functools.partial):
-        sig = inspect.signature(value.func)
-        args_as_kwargs = dict(zip(sig.parameters.keys(), value.args))
+        args_as_kwargs = dict(zip(get_parameter_names(value.func), value.args))
         args_as_kwargs.update(**value.keywords)
         clean_dict(args_as_kwargs)
         args_as_kwargs.pop("function", None)
@@ -100,8 +112,7 @@ def clean_value_json(value: Any) -> Any:
         value = np.round(value, 3)
         value = orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
     elif callable(value) and isinstance(value, functools.partial):
-        sig = inspect.signature(value.func)
-        args_as_kwargs = dict(zip(sig.parameters.keys(), value.args))
+        args_as_kwargs = dict(zip(get_parameter_names(value.func), value.args))
         args_as_kwargs.update(**value.keywords)
         clean_dict(args_as_kwargs)
         args_as_kwargs.pop("function", None)
@@ -7,6 +7,12 @@ from gdsfactory.simulation.get_sparameters_path import (
     get_sparameters_path_lumerical,
     get_sparameters_path_meep,
 )
+from gdsfactory.simulation.sparameters_store import (
+    Sparameters,
+    SparametersStore,
+    get_sparameters_store,
+    sparameters_store,
+)
 
 __all__ = [
     "plot",
@@ -14,4 +20,8 @@ __all__ = [
     "get_sparameters_path_lumerical",
     "get_sparameters_data_meep",
     "get_sparameters_data_lumerical",
+    "Sparameters",
+    "SparametersStore",
+    "get_sparameters_store",
+    "sparameters_store",
 ]
@@ -0,0 +1,245 @@
+"""Run a batch of simulations on a remote solver with asyncio.
+
+`get_results_async` lists the server tasks once, runs each unique simulation
+only once, keeps at most `max_concurrency` simulations in flight and yields the
+results as they complete. `get_results_jobs` runs the simulations of several
+jobs (for example the source ports of several components) in one batch and
+returns the result of each job as soon as its simulations complete.
+
+The solver is a `SimulationBackend`, so the same pipeline runs tidy3d
+simulations (`gdsfactory.simulation.gtidy3d.Tidy3dBackend`) or a local
+stand-in server for testing without network access.
+"""
+import abc
+import asyncio
+import concurrent.futures
+import hashlib
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Sequence,
+    Tuple,
+)
+
+from gdsfactory.config import logger
+from gdsfactory.types import PathType
+
+
+class SimulationBackend(abc.ABC):
+    """Remote solver interface of `get_results_async`.
+
+    The methods are blocking and run on a thread pool, so they can wrap
+    synchronous web APIs.
+    """
+
+    def get_hash(self, sim: Any) -> str:
+        """Returns simulation hash as the unique ID and task_name."""
+        return hashlib.md5(str(sim).encode()).hexdigest()
+
+    @abc.abstractmethod
+    def get_tasks(self) -> Dict[str, str]:
+        """Returns task_name to task_id for the tasks in the server."""
+
+    @abc.abstractmethod
+    def submit(self, sim: Any, task_name: str) -> str:
+        """Uploads and starts a simulation. Returns its task_id."""
+
+    @abc.abstractmethod
+    def monitor(self, task_id: str) -> None:
+        """Waits until a task finishes."""
+
+    @abc.abstractmethod
+    def load(self, task_id: str, path: Path) -> Any:
+        """Downloads the results of a finished task to path and returns them."""
+
+    @abc.abstractmethod
+    def load_file(self, path: Path) -> Any:
+        """Returns the results stored in a local path."""
+
+
+async def get_results_async(
+    sims: Sequence[Any],
+    backend: SimulationBackend,
+    dirpath: PathType,
+    max_concurrency: int = 10,
+    suffix: str = ".hdf5",
+) -> AsyncIterator[Tuple[int, Any]]:
+    """Yields (index, results) for each simulation as they complete.
+
+    Only runs a simulation if its results are not found locally in dirpath or
+    remotely in the server. Equal simulations run once and yield the same
+    results for each index.
+
+    Args:
+        sims: simulations.
+        backend: remote solver.
+        dirpath: to store results locally.
+        max_concurrency: maximum number of simulations in flight.
+        suffix: of the local results files.
+
+    .. code::
+
+        async for index, sim_data in get_results_async(sims, backend, dirpath):
+            print(index, sim_data)
+
+    """
+    dirpath = Path(dirpath)
+    dirpath.mkdir(parents=True, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    def call(function, *args):
+        return loop.run_in_executor(executor, function, *args)
+
+    hash_to_indices: Dict[str, List[int]] = {}
+    hash_to_sim: Dict[str, Any] = {}
+    for index, sim in enumerate(sims):
+        sim_hash = backend.get_hash(sim)
+        hash_to_indices.setdefault(sim_hash, []).append(index)
+        hash_to_sim.setdefault(sim_hash, sim)
+
+    async def get_results(sim_hash: str, hash_to_id: Dict[str, str]) -> Tuple:
+        path = dirpath / f"{sim_hash}{suffix}"
+        async with semaphore:
+            if path.exists():
+                logger.info(f"{str(path)!r} found in local storage")
+                return sim_hash, await call(backend.load_file, path)
+
+            if sim_hash in hash_to_id:
+                task_id = hash_to_id[sim_hash]
+                try:
+                    await call(backend.monitor, task_id)
+                    return sim_hash, await call(backend.load, task_id, path)
+                except Exception as error:
+                    logger.info(f"task_id {task_id!r} exists but failed: {error}")
+
+            logger.info(f"sending task_name {sim_hash!r} to the server.")
+            task_id = await call(backend.submit, hash_to_sim[sim_hash], sim_hash)
+            await call(backend.monitor, task_id)
+            return sim_hash, await call(backend.load, task_id, path)
+
+    hash_to_id: Dict[str, str] = {}
+    if any(not (dirpath / f"{h}{suffix}").exists() for h in hash_to_sim):
+        hash_to_id = await call(backend.get_tasks)
+
+    tasks = [
+        asyncio.ensure_future(get_results(sim_hash, hash_to_id))
+        for sim_hash in hash_to_sim
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            sim_hash, results = await task
+            for index in hash_to_indices[sim_hash]:
+                yield index, results
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False)
+
+
+def run_coroutine(coroutine: Awaitable) -> Any:
+    """Runs a coroutine and returns its result.
+
+    Inside a running event loop (jupyter notebooks) it runs the coroutine in
+    a new event loop on a worker thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def get_results_batch(
+    sims: Sequence[Any],
+    backend: SimulationBackend,
+    dirpath: PathType,
+    max_concurrency: int = 10,
+    suffix: str = ".hdf5",
+) -> List[Any]:
+    """Returns the results of each simulation in the order of sims.
+
+    Blocking version of `get_results_async`.
+
+    Args:
+        sims: simulations.
+        backend: remote solver.
+        dirpath: to store results locally.
+        max_concurrency: maximum number of simulations in flight.
+        suffix: of the local results files.
+    """
+
+    async def collect() -> List[Any]:
+        results = [None] * len(sims)
+        async for index, result in get_results_async(
+            sims, backend, dirpath, max_concurrency=max_concurrency, suffix=suffix
+        ):
+            results[index] = result
+        return results
+
+    return run_coroutine(collect())
+
+
+class SimulationJob(NamedTuple):
+    """Simulations of one job and the function that returns the job result.
+
+    Args:
+        sims: simulations. Empty if the job result is already known.
+        get_result: returns the job result from the results of its sims.
+    """
+
+    sims: Sequence[Any]
+    get_result: Callable[[List[Any]], Any]
+
+
+def get_results_jobs(
+    jobs: Sequence[SimulationJob],
+    backend: SimulationBackend,
+    dirpath: PathType,
+    max_concurrency: int = 10,
+    suffix: str = ".hdf5",
+) -> List[Any]:
+    """Returns the result of each job in the order of jobs.
+
+    The simulations of all the jobs run in a single `get_results_async` batch,
+    so the server tasks are listed once, equal simulations of different jobs
+    run once and at most max_concurrency simulations are in flight.
+    Each job result is computed as soon as its simulations complete.
+
+    Args:
+        jobs: simulations and result function of each job.
+        backend: remote solver.
+        dirpath: to store results locally.
+        max_concurrency: maximum number of simulations in flight.
+        suffix: of the local results files.
+    """
+    sims = [sim for job in jobs for sim in job.sims]
+    owners = [(i, k) for i, job in enumerate(jobs) for k in range(len(job.sims))]
+
+    async def collect() -> List[Any]:
+        results = [None] * len(jobs)
+        job_results = [[None] * len(job.sims) for job in jobs]
+        missing = [len(job.sims) for job in jobs]
+        for i, job in enumerate(jobs):
+            if not job.sims:
+                results[i] = job.get_result([])
+
+        async for index, result in get_results_async(
+            sims, backend, dirpath, max_concurrency=max_concurrency, suffix=suffix
+        ):
+            i, k = owners[index]
+            job_results[i][k] = result
+            missing[i] -= 1
+            if not missing[i]:
+                results[i] = jobs[i].get_result(job_results[i])
+        return results
+
+    return run_coroutine(collect())
@@ -3,10 +3,11 @@ import pathlib
 from copy import deepcopy
 from functools import partial
 from pathlib import Path
+from typing import Optional
 
 import pandas as pd
 
-from gdsfactory.config import sparameters_path
+from gdsfactory.config import logger, sparameters_path
 from gdsfactory.name import clean_value
 from gdsfactory.tech import LAYER_STACK
 from gdsfactory.types import ComponentOrFactory
@@ -20,13 +21,33 @@ def get_kwargs_hash(**kwargs) -> str:
     return kwargs_hash
 
 
+def _get_sparameters_dirpath(component, dirpath: Path) -> Path:
+    dirpath = pathlib.Path(dirpath)
+    dirpath = (
+        dirpath / component.function_name
+        if hasattr(component, "function_name")
+        else dirpath
+    )
+    dirpath.mkdir(exist_ok=True, parents=True)
+    return dirpath
+
+
 def _get_sparameters_path(
     component: ComponentOrFactory,
     dirpath: Path = sparameters_path,
     **kwargs,
 ) -> Path:
     """Return Sparameters CSV filepath.
-    hashes of all simulation settings to get a consitent and unique name.
+    hashes of the component geometry and all simulation settings
+    to get a consitent and unique name.
+
+    The name does not depend on the component name, so components with the
+    same polygons and ports share their Sparameters, and components that
+    change their geometry without changing their name get new Sparameters.
+
+    Sparameters stored with the previous naming ({component.name}_{hash}.csv)
+    are not reused, as the geometry they were simulated for is unknown.
+    A warning names them, and migrate_sparameters_path renames them.
 
     Args:
         component: component or component factory.
@@ -35,17 +56,69 @@ def _get_sparameters_path(
     """
 
     component = component() if callable(component) else component
+    dirpath = _get_sparameters_dirpath(component, dirpath)
+    kwargs_hash = get_kwargs_hash(**kwargs)
+    geometry_hash = component.get_geometry_hash()[:16]
+    filepath = dirpath / f"{geometry_hash}_{kwargs_hash}.csv"
+
+    filepath_legacy = dirpath / f"{component.name}_{kwargs_hash}.csv"
+    if not filepath.exists() and filepath_legacy.exists():
+        logger.warning(
+            f"Sparameters {str(filepath_legacy)!r} are stored under the component "
+            f"name, so they are not found at {str(filepath)!r}. "
+            f"If they were simulated with the current geometry of "
+            f"{component.name!r}, rename them with migrate_sparameters_path."
+        )
+    return filepath
+
+
+def _get_sparameters_path_legacy(
+    component: ComponentOrFactory,
+    dirpath: Path = sparameters_path,
+    **kwargs,
+) -> Path:
+    """Return Sparameters CSV filepath named after the component,
+    as it was before the filepath was named after the geometry hash.
 
-    dirpath = pathlib.Path(dirpath)
-    dirpath = (
-        dirpath / component.function_name
-        if hasattr(component, "function_name")
-        else dirpath
-    )
-    dirpath.mkdir(exist_ok=True, parents=True)
+    Args:
+        component: component or component factory.
+        dirpath: directory path to store sparameters
+        kwargs: simulation settings
+    """
+    component = component() if callable(component) else component
+    dirpath = _get_sparameters_dirpath(component, dirpath)
     return dirpath / f"{component.name}_{get_kwargs_hash(**kwargs)}.csv"
 
 
+def migrate_sparameters_path(
+    component: ComponentOrFactory,
+    dirpath: Path = sparameters_path,
+    **kwargs,
+) -> Optional[Path]:
+    """Renames the Sparameters CSV (and YAML settings) stored under the
+    component name to the geometry hash filepath.
+
+    Returns the new filepath, or None if there are no Sparameters to rename.
+    Only use it when the component has the geometry it was simulated with.
+
+    Args:
+        component: component or component factory, rebuilt with the settings
+            it was simulated with.
+        dirpath: directory path to store sparameters
+        kwargs: simulation settings
+    """
+    component = component() if callable(component) else component
+    filepath_legacy = _get_sparameters_path_legacy(component, dirpath, **kwargs)
+    if not filepath_legacy.exists():
+        return None
+    filepath = _get_sparameters_path(component, dirpath, **kwargs)
+    for suffix in [".yml", ".csv"]:
+        if filepath_legacy.with_suffix(suffix).exists():
+            filepath_legacy.with_suffix(suffix).rename(filepath.with_suffix(suffix))
+    logger.info(f"Rename Sparameters {str(filepath_legacy)!r} to {str(filepath)!r}")
+    return filepath
+
+
 def _get_sparameters_data(**kwargs) -> pd.DataFrame:
     """Returns Sparameters data in a pandas DataFrame.
 
@@ -67,6 +140,11 @@ get_sparameters_path_tidy3d = partial(
 )
 
 
+get_sparameters_path_legacy_lumerical = partial(
+    _get_sparameters_path_legacy, layer_stack=LAYER_STACK, tool="lumerical"
+)
+
+
 get_sparameters_data_meep = partial(_get_sparameters_data, tool="meep")
 get_sparameters_data_lumerical = partial(
     _get_sparameters_data, layer_stack=LAYER_STACK, tool="lumerical"
@@ -80,9 +158,9 @@ def test_get_sparameters_path(test: bool = True) -> None:
     layer_stack2 = deepcopy(LAYER_STACK)
     layer_stack2["core"].thickness = 230 * nm
 
-    name1 = "straight_6637a3d3"
-    name2 = "straight_98818a59"
-    name3 = "straight_91432e2d"
+    name1 = "79694a78c4e3629f_6637a3d3"
+    name2 = "79694a78c4e3629f_98818a59"
+    name3 = "79694a78c4e3629f_91432e2d"
 
     c = gf.components.straight()
 
@@ -100,6 +178,42 @@ def test_get_sparameters_path(test: bool = True) -> None:
         print(f"name3 = {p3.stem!r}")
 
 
+def test_get_sparameters_path_geometry() -> None:
+    """Same geometry shares the path, a new geometry with the same name does not."""
+    import gdsfactory as gf
+
+    c1 = gf.components.straight(length=10)
+    c2 = gf.Component("straight_renamed")
+    ref = c2 << gf.components.straight(length=10)
+    c2.add_ports(ref.ports)
+    assert get_sparameters_path_meep(c1) == get_sparameters_path_meep(c2)
+
+    c3 = gf.Component(c1.name)
+    ref = c3 << gf.components.straight(length=11)
+    c3.add_ports(ref.ports)
+    assert get_sparameters_path_meep(c1) != get_sparameters_path_meep(c3)
+
+
+def test_get_sparameters_path_legacy(tmp_path: Path) -> None:
+    """Sparameters named after the component are not reused until they are
+    renamed with migrate_sparameters_path."""
+    import gdsfactory as gf
+
+    c = gf.components.straight(length=10)
+    filepath_legacy = _get_sparameters_path_legacy(c, dirpath=tmp_path, tool="meep")
+    assert filepath_legacy.name == f"{c.name}_{get_kwargs_hash(tool='meep')}.csv"
+    filepath_legacy.write_text("wavelengths,s11m\n1.55,0.1\n")
+
+    filepath = get_sparameters_path_meep(c, dirpath=tmp_path)
+    assert filepath != filepath_legacy
+    assert not filepath.exists()
+
+    assert migrate_sparameters_path(c, dirpath=tmp_path, tool="meep") == filepath
+    assert filepath.read_text() == "wavelengths,s11m\n1.55,0.1\n"
+    assert not filepath_legacy.exists()
+    assert migrate_sparameters_path(c, dirpath=tmp_path, tool="meep") is None
+
+
 if __name__ == "__main__":
     # import gdsfactory as gf
 
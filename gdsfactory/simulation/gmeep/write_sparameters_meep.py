@@ -26,6 +26,12 @@ from gdsfactory.simulation.gmeep.get_simulation import (
     get_simulation,
     settings_get_simulation,
 )
+from gdsfactory.simulation.port_symmetries import get_port_symmetries
+from gdsfactory.simulation.sparameters_store import (
+    get_port_names,
+    get_sparameters_store,
+    sparameters_from_dataframe,
+)
 from gdsfactory.tech import LAYER_STACK, LayerStack
 from gdsfactory.types import ComponentOrFactory, PathType, PortSymmetries
 
@@ -152,6 +158,7 @@ def write_sparameters_meep(
     xmargin_right: float = 0,
     ymargin_top: float = 0,
     ymargin_bot: float = 0,
+    detect_port_symmetries: bool = False,
     **settings,
 ) -> pd.DataFrame:
     r"""Compute Sparameters and writes them to a CSV filepath.
@@ -173,8 +180,8 @@ def write_sparameters_meep(
 
     This allows you doing less simulations
 
-    TODO: automate this for common component types
-    (geometrical symmetries, reciprocal materials, etc.)
+    detect_port_symmetries=True finds the port_symmetries from the mirror and
+    rotation symmetries of the component and reciprocity (Sij = Sji).
 
     TODO: enable other port naming conventions, such as (in0, in1, out0, out1)
 
@@ -239,6 +246,8 @@ def write_sparameters_meep(
         ymargin: top and bottom distance from component to PML.
         ymargin_top: north distance from component to PML.
         ymargin_bot: south distance from component to PML.
+        detect_port_symmetries: if port_symmetries is None, finds them from
+            the symmetries of the component with its margins and reciprocity.
 
     keyword Args:
         extend_ports_length: to extend ports beyond the PML (um).
@@ -272,14 +281,27 @@ def write_sparameters_meep(
         if setting not in settings_get_simulation:
             raise ValueError(f"{setting} not in {settings_get_simulation}")
 
-    port_symmetries = port_symmetries or {}
-
     xmargin_left = xmargin_left or xmargin
     xmargin_right = xmargin_right or xmargin
 
     ymargin_top = ymargin_top or ymargin
     ymargin_bot = ymargin_bot or ymargin
 
+    component_padding = gf.add_padding_container(
+        component,
+        default=0,
+        top=ymargin_top,
+        bottom=ymargin_bot,
+        left=xmargin_left,
+        right=xmargin_right,
+    )
+
+    if detect_port_symmetries and port_symmetries is None:
+        # the simulation region (with the margins) needs the symmetries too
+        port_symmetries = get_port_symmetries(component_padding)
+        logger.info(f"Detected port_symmetries {port_symmetries}")
+    port_symmetries = port_symmetries or {}
+
     sim_settings = dict(
         resolution=resolution,
         port_symmetries=port_symmetries,
@@ -304,6 +326,13 @@ def write_sparameters_meep(
         **sim_settings,
     )
 
+    # port_symmetries do not change the results
+    store = get_sparameters_store(dirpath)
+    store_settings = dict(
+        component=component, tool="meep", layer_stack=layer_stack, **sim_settings
+    )
+    store_settings.pop("port_symmetries")
+    store_ports = get_port_names(component)
     sim_settings = sim_settings.copy()
     sim_settings["layer_stack"] = layer_stack.to_dict()
     sim_settings["component"] = component.to_dict()
@@ -314,14 +343,7 @@ def write_sparameters_meep(
     # logger.info(f"Write simulation settings to {filepath_sim_settings!r}")
     # return filepath_sim_settings
 
-    component = gf.add_padding_container(
-        component,
-        default=0,
-        top=ymargin_top,
-        bottom=ymargin_bot,
-        left=xmargin_left,
-        right=xmargin_right,
-    )
+    component = component_padding
 
     if not run:
         sim_dict = get_simulation(
@@ -338,6 +360,15 @@ def write_sparameters_meep(
         sim_dict["sim"].plot2D(plot_eps_flag=True)
         return
 
+    sparameters = None if overwrite else store.get_component(**store_settings)
+    if sparameters is not None:
+        logger.info(f"Simulation loaded from {str(store.dirpath)!r}")
+        df = sparameters.to_dataframe()
+        df["freqs"] = 1 / df["wavelengths"]
+        # write_sparameters_meep_mpi and _batch wait for the CSV file
+        if not filepath.exists() and mp.am_master():
+            df.to_csv(filepath, index=False)
+        return df
     if filepath.exists() and not overwrite:
         logger.info(f"Simulation loaded from {filepath!r}")
         return pd.read_csv(filepath)
@@ -379,7 +410,7 @@ def write_sparameters_meep(
 
         sim_dict = get_simulation(
             component=component,
-            port_source_name=f"o{monitor_indices[n]}",
+            port_source_name=f"o{source_indices[n]}",
             resolution=resolution,
             wavelength_start=wavelength_start,
             wavelength_stop=wavelength_stop,
@@ -425,7 +456,7 @@ def write_sparameters_meep(
                 normalize=True,
             )
             sim.run(mp.at_every(1, animate), until_after_sources=termination)
-            animate.to_mp4(30, monitor_indices[n] + ".mp4")
+            animate.to_mp4(30, source_indices[n] + ".mp4")
         else:
             sim.run(until_after_sources=termination)
         # call this function every 50 time spes
@@ -436,13 +467,13 @@ def write_sparameters_meep(
         # Get source monitor results
         component_ref = component.ref()
         source_entering, source_exiting = parse_port_eigenmode_coeff(
-            monitor_indices[n], component_ref.ports, sim_dict
+            source_indices[n], component_ref.ports, sim_dict
         )
         # Get coefficients
         for monitor_index in monitor_indices:
-            j = monitor_indices[n]
+            j = source_indices[n]
             i = monitor_index
-            if monitor_index == monitor_indices[n]:
+            if monitor_index == source_indices[n]:
                 sii = source_exiting / source_entering
                 siia = np.unwrap(np.angle(sii))
                 siim = np.abs(sii)
@@ -462,8 +493,8 @@ def write_sparameters_meep(
                 sijm = np.abs(sij)
 
         if bool(port_symmetries) is True:
-            for key in port_symmetries[f"o{monitor_indices[n]}"].keys():
-                values = port_symmetries[f"o{monitor_indices[n]}"][key]
+            for key in port_symmetries[f"o{source_indices[n]}"].keys():
+                values = port_symmetries[f"o{source_indices[n]}"][key]
                 for value in values:
                     sp[f"{value}m"] = sp[f"{key}m"]
                     sp[f"{value}a"] = sp[f"{key}a"]
@@ -506,6 +537,8 @@ def write_sparameters_meep(
             )
             df["freqs"] = 1 / df["wavelengths"]
             df.to_csv(filepath, index=False)
+            sparameters = sparameters_from_dataframe(df, ports=store_ports)
+            store.put(sparameters, **store_settings)
             logger.info(f"Write simulation results to {filepath!r}")
             filepath_sim_settings.write_text(OmegaConf.to_yaml(sim_settings))
             logger.info(f"Write simulation settings to {filepath_sim_settings!r}")
@@ -534,6 +567,8 @@ def write_sparameters_meep(
         )
         df["freqs"] = 1 / df["wavelengths"]
         df.to_csv(filepath, index=False)
+        sparameters = sparameters_from_dataframe(df, ports=store_ports)
+        store.put(sparameters, **store_settings)
 
         end = time.time()
         sim_settings.update(compute_time_seconds=end - start)
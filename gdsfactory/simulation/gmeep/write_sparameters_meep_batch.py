@@ -3,14 +3,11 @@
 import multiprocessing
 import pathlib
 import shutil
-import time
+import sys
 from pathlib import Path
-from pprint import pprint
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-import numpy as np
 import pydantic
-from tqdm import tqdm
 
 import gdsfactory as gf
 from gdsfactory.component import Component
@@ -21,8 +18,9 @@ from gdsfactory.simulation.get_sparameters_path import (
 )
 from gdsfactory.simulation.gmeep.write_sparameters_meep import remove_simulation_kwargs
 from gdsfactory.simulation.gmeep.write_sparameters_meep_mpi import (
-    write_sparameters_meep_mpi,
+    write_sparameters_meep_mpi_script,
 )
+from gdsfactory.simulation.run_jobs import Job, run_jobs
 from gdsfactory.tech import LAYER_STACK, LayerStack
 
 ncores = multiprocessing.cpu_count()
@@ -39,13 +37,19 @@ def write_sparameters_meep_batch(
     delete_temp_files: bool = True,
     dirpath: Path = sparameters_path,
     layer_stack: LayerStack = LAYER_STACK,
+    timeout: Optional[float] = None,
+    retries: int = 1,
     **kwargs,
 ) -> List[Path]:
     """Write Sparameters for a batch of jobs using MPI and returns results filepaths.
     Given a list of write_sparameters_meep keyword arguments (the "jobs"),
     launches them in different cores using MPI
-    where each simulation runs with "cores_per_run" cores
-    If there are more simulations than cores each batch runs sequentially
+    where each simulation runs with "cores_per_run" cores.
+    A new simulation starts as soon as a running one finishes and frees its cores.
+
+    A simulation fails if MPI exits with an error, times out or does not write
+    its filepath. Failed simulations run again up to `retries` times
+    and then raise a RuntimeError with the logs in temp_dir.
 
 
     Args
@@ -57,6 +61,8 @@ def write_sparameters_meep_batch(
         delete_temp_files: deletes temp_dir when done
         dirpath: directory to store Sparameters
         layer_stack:
+        timeout: maximum time in seconds for each simulation. None waits forever.
+        retries: number of times to run again a failed simulation.
 
     keyword Args:
         resolution: in pixels/um (30: for coarse, 100: for fine)
@@ -98,95 +104,90 @@ def write_sparameters_meep_batch(
 
     Returns:
         filepath list for sparameters CSV (wavelengths, s11a, s12m, ...)
+            in the same order as the jobs, including the ones that already exist,
             where `a` is the angle in radians and `m` the module
 
     """
-    # Parse jobs
+    if cores_per_run > total_cores:
+        raise ValueError(
+            f"cores_per_run = {cores_per_run} > total_cores = {total_cores}"
+        )
+    temp_dir = pathlib.Path(temp_dir)
+    filepaths = []
     jobs_to_run = []
-    for job in jobs:
-        component = job["component"]
+    for i, job in enumerate(jobs):
+        job = {**kwargs, **job}
+        component = job.pop("component")
         component = component() if callable(component) else component
         assert isinstance(component, Component)
-        settings = remove_simulation_kwargs(kwargs)
-        filepath = job.get(
-            "filepath",
-            get_sparameters_path(
-                component=component,
-                dirpath=dirpath,
-                layer_stack=layer_stack,
-                **settings,
-            ),
+        overwrite = job.pop("overwrite", False)
+        filepath = job.pop("filepath", None) or get_sparameters_path(
+            component=component,
+            dirpath=dirpath,
+            layer_stack=layer_stack,
+            **remove_simulation_kwargs(job),
         )
+        filepath = pathlib.Path(filepath)
+        filepaths.append(filepath)
+
         if filepath.exists():
-            job.update(**kwargs)
-            if job.get("overwrite", kwargs.get("overwrite", False)):
-                pathlib.Path.unlink(filepath)
-                logger.info(
-                    f"Simulation {filepath!r} found and overwrite is True. "
-                    "Deleting file and adding it to the queue."
-                )
-                jobs_to_run.append(job)
-            else:
+            if not overwrite:
                 logger.info(
                     f"Simulation {filepath!r} found exists and "
                     "overwrite is False. Removing it from the queue."
                 )
+                continue
+            filepath.unlink()
+            logger.info(
+                f"Simulation {filepath!r} found and overwrite is True. "
+                "Deleting file and adding it to the queue."
+            )
         else:
             logger.info(f"Simulation {filepath!r} not found. Adding it to the queue")
-            jobs_to_run.append(job)
-
-    jobs = jobs_to_run
-
-    batches = int(np.ceil(cores_per_run * len(jobs) / total_cores))
-    jobs_per_batch = int(np.floor(total_cores / cores_per_run))
-    njobs = len(jobs)
-    logger.info(f"Running {njobs} simulations")
-    logger.info(f"total_cores = {total_cores} with cores_per_run = {cores_per_run}")
-    logger.info(f"Running {batches} batches with up to {jobs_per_batch} jobs each.")
-
-    i = 0
-    # For each batch in the pool
-    for j in tqdm(range(batches)):
-        filepaths = []
 
-        # For each job in the batch
-        for k in range(jobs_per_batch):
-            if i >= njobs:
-                continue
-            logger.info(f"Task {k} of batch {j} is job {i}")
-
-            # Obtain current job
-            simulations_settings = jobs[i]
-
-            pprint(simulations_settings)
-
-            filepath = write_sparameters_meep_mpi(
+        temp_file_str = f"write_sparameters_meep_mpi_{i}"
+        script_file = write_sparameters_meep_mpi_script(
+            component=component,
+            filepath=filepath,
+            temp_dir=temp_dir,
+            temp_file_str=temp_file_str,
+            dirpath=dirpath,
+            layer_stack=layer_stack,
+            overwrite=overwrite,
+            **job,
+        )
+        command = [
+            "mpirun",
+            "-np",
+            str(cores_per_run),
+            sys.executable,
+            str(script_file),
+        ]
+        jobs_to_run.append(
+            Job(
+                name=temp_file_str,
+                command=command,
                 cores=cores_per_run,
-                temp_dir=temp_dir,
-                temp_file_str=f"write_sparameters_meep_mpi_{i}",
-                wait_to_finish=False,
-                **simulations_settings,
+                filepath=filepath,
+                timeout=timeout,
             )
-            filepaths.append(filepath)
-
-            # Increment task number
-            i += 1
-
-        # Wait for batch to end
-        done = False
-        num_pool_jobs = len(filepaths)
-        while not done:
-            # Check if all jobs finished
-            jobs_done = 0
-            for filepath in filepaths:
-                if filepath.exists():
-                    jobs_done += 1
-            if jobs_done == num_pool_jobs:
-                done = True
-            else:
-                time.sleep(1)
+        )
+
+    logger.info(
+        f"Running {len(jobs_to_run)} simulations with total_cores = {total_cores} "
+        f"and cores_per_run = {cores_per_run}"
+    )
+    results = run_jobs(
+        jobs_to_run, total_cores=total_cores, retries=retries, log_dir=temp_dir
+    )
+    failed = [result for result in results if not result.ok]
+    if failed:
+        errors = "\n".join(
+            f"{result.job.filepath} ({result.logpath}): {result.error}"
+            for result in failed
+        )
+        raise RuntimeError(f"{len(failed)} simulations failed:\n{errors}")
 
-    temp_dir = pathlib.Path(temp_dir)
     if temp_dir.exists() and delete_temp_files:
         shutil.rmtree(temp_dir)
     return filepaths
@@ -31,6 +31,66 @@ ncores = multiprocessing.cpu_count()
 temp_dir_default = Path(sparameters_path) / "temp"
 
 
+def write_sparameters_meep_mpi_script(
+    component: Component,
+    filepath: Path,
+    temp_dir: Path = temp_dir_default,
+    temp_file_str: str = "write_sparameters_meep_mpi",
+    dirpath: Path = sparameters_path,
+    layer_stack: LayerStack = LAYER_STACK,
+    overwrite: bool = False,
+    **kwargs,
+) -> Path:
+    """Writes the pickled component and the python script that runs
+    write_sparameters_meep on it and returns the script filepath.
+
+    Args:
+        component: gdsfactory Component.
+        filepath: to store pandas Dataframe with Sparameters in CSV format.
+        temp_dir: temporary directory to hold simulation files.
+        temp_file_str: names of temporary files in temp_dir.
+        dirpath: directory to store Sparameters.
+        layer_stack: LayerStack class, pickled together with the component.
+        overwrite: overwrites stored simulation results.
+
+    Keyword Args:
+        write_sparameters_meep settings.
+    """
+    for setting in kwargs.keys():
+        if setting not in settings_write_sparameters_meep:
+            raise ValueError(f"{setting} not in {settings_write_sparameters_meep}")
+
+    # Save the component object to simulation for later retrieval
+    temp_dir.mkdir(exist_ok=True, parents=True)
+    tempfile = temp_dir / temp_file_str
+    component_file = tempfile.with_suffix(".pkl")
+    kwargs.update(filepath=str(filepath), dirpath=str(dirpath), overwrite=overwrite)
+
+    with open(component_file, "wb") as outp:
+        pickle.dump(component, outp, pickle.HIGHEST_PROTOCOL)
+        pickle.dump(layer_stack, outp, pickle.HIGHEST_PROTOCOL)
+
+    # Write execution file
+    script_lines = [
+        "import pickle\n",
+        "from gdsfactory.simulation.gmeep import write_sparameters_meep\n\n",
+        'if __name__ == "__main__":\n\n',
+        f"\twith open(\"{component_file}\", 'rb') as inp:\n",
+        "\t\tcomponent = pickle.load(inp)\n",
+        "\t\tlayer_stack = pickle.load(inp)\n\n",
+        "\twrite_sparameters_meep(component = component,\n",
+        "\t\tlayer_stack = layer_stack,\n",
+    ]
+    for key in kwargs.keys():
+        script_lines.append(f"\t\t{key} = {kwargs[key]!r},\n")
+
+    script_lines.append("\t)")
+    script_file = tempfile.with_suffix(".py")
+    with open(script_file, "w") as script_file_obj:
+        script_file_obj.writelines(script_lines)
+    return script_file
+
+
 @pydantic.validate_arguments
 def write_sparameters_meep_mpi(
     component: ComponentOrFactory,
@@ -140,41 +200,26 @@ def write_sparameters_meep_mpi(
     if filepath.exists() and overwrite:
         filepath.unlink()
 
-    # Save the component object to simulation for later retrieval
-    temp_dir.mkdir(exist_ok=True, parents=True)
-    tempfile = temp_dir / temp_file_str
-    component_file = tempfile.with_suffix(".pkl")
-    kwargs.update(filepath=str(filepath))
-
-    with open(component_file, "wb") as outp:
-        pickle.dump(component, outp, pickle.HIGHEST_PROTOCOL)
-
-    # Write execution file
-    script_lines = [
-        "import pickle\n",
-        "from gdsfactory.simulation.gmeep import write_sparameters_meep\n\n",
-        'if __name__ == "__main__":\n\n',
-        f"\twith open(\"{component_file}\", 'rb') as inp:\n",
-        "\t\tcomponent = pickle.load(inp)\n\n"
-        "\twrite_sparameters_meep(component = component,\n",
-    ]
-    for key in kwargs.keys():
-        script_lines.append(f"\t\t{key} = {kwargs[key]!r},\n")
-
-    script_lines.append("\t)")
-    script_file = tempfile.with_suffix(".py")
-    script_file_obj = open(script_file, "w")
-    script_file_obj.writelines(script_lines)
-    script_file_obj.close()
+    script_file = write_sparameters_meep_mpi_script(
+        component=component,
+        filepath=filepath,
+        temp_dir=temp_dir,
+        temp_file_str=temp_file_str,
+        dirpath=dirpath,
+        layer_stack=layer_stack,
+        overwrite=overwrite,
+        **kwargs,
+    )
 
-    command = f"mpirun -np {cores} python {script_file}"
-    print(command)
+    command = ["mpirun", "-np", str(cores), sys.executable, str(script_file)]
+    command_str = " ".join(shlex.quote(arg) for arg in command)
+    print(command_str)
     print(str(filepath))
-    logger.info(command)
+    logger.info(command_str)
     logger.info(str(filepath))
 
     with subprocess.Popen(
-        shlex.split(command),
+        command,
         stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
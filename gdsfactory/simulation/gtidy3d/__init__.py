@@ -7,7 +7,11 @@ import tidy3d as td
 
 from gdsfactory.config import logger
 from gdsfactory.simulation.gtidy3d import materials, utils
-from gdsfactory.simulation.gtidy3d.get_results import get_results
+from gdsfactory.simulation.gtidy3d.get_results import (
+    Tidy3dBackend,
+    get_results,
+    get_results_batch,
+)
 from gdsfactory.simulation.gtidy3d.get_simulation import (
     get_simulation,
     plot_simulation,
@@ -37,6 +41,8 @@ __all__ = [
     "get_simulation",
     "get_simulation_grating_coupler",
     "get_results",
+    "get_results_batch",
+    "Tidy3dBackend",
     "materials",
     "utils",
     "write_sparameters",
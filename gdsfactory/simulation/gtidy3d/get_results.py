@@ -2,7 +2,8 @@
 
 import concurrent.futures
 import hashlib
-from typing import Awaitable
+from pathlib import Path
+from typing import Any, Awaitable, Dict, List
 
 import tidy3d as td
 from tidy3d import web
@@ -10,6 +11,7 @@ from tidy3d.log import WebError
 
 import gdsfactory as gf
 from gdsfactory.config import PATH, logger
+from gdsfactory.simulation import get_results_batch as batch
 from gdsfactory.types import PathType
 
 _executor = concurrent.futures.ThreadPoolExecutor()
@@ -97,6 +99,78 @@ def get_results(
     return _executor.submit(_get_results, sim, dirpath, overwrite)
 
 
+class Tidy3dBackend(batch.SimulationBackend):
+    """tidy3d web API backend for `get_results_batch`."""
+
+    def get_hash(self, sim: td.Simulation) -> str:
+        return get_sim_hash(sim)
+
+    def get_tasks(self) -> Dict[str, str]:
+        return {d["task_name"][:32]: d["task_id"] for d in web.get_tasks()}
+
+    def submit(self, sim: td.Simulation, task_name: str) -> str:
+        task_id = web.upload(simulation=sim, task_name=task_name)
+        web.start(task_id)
+        return task_id
+
+    def monitor(self, task_id: str) -> None:
+        web.monitor(task_id)
+
+    def load(self, task_id: str, path: Path) -> td.SimulationData:
+        return web.load(task_id=task_id, path=str(path), replace_existing=True)
+
+    def load_file(self, path: Path) -> td.SimulationData:
+        return td.SimulationData.from_file(str(path))
+
+
+def get_results_batch(
+    sims: List[td.Simulation],
+    dirpath: PathType = PATH.results_tidy3d,
+    max_concurrency: int = 10,
+) -> List[td.SimulationData]:
+    """Returns SimulationData for a list of Simulations.
+
+    Lists the server tasks once, runs equal simulations once and keeps up to
+    max_concurrency simulations running in the server.
+    Only submits simulations with results not found locally or remotely.
+
+    Args:
+        sims: list of Simulations.
+        dirpath: to store results locally.
+        max_concurrency: maximum number of simulations running at once.
+
+    .. code::
+        import gdsfactory.simulation.gtidy3d as gt
+
+        components = [gf.components.straight(length=i) for i in range(1, 4)]
+        sims = [gt.get_simulation(component=c) for c in components]
+        sim_datas = gt.get_results_batch(sims)
+
+    """
+    return batch.get_results_batch(
+        sims, Tidy3dBackend(), dirpath, max_concurrency=max_concurrency
+    )
+
+
+def get_results_jobs(
+    jobs: List[batch.SimulationJob],
+    dirpath: PathType = PATH.results_tidy3d,
+    max_concurrency: int = 10,
+) -> List[Any]:
+    """Returns the result of each job from the SimulationData of its Simulations.
+
+    Runs the Simulations of all the jobs in one batch (see get_results_batch).
+
+    Args:
+        jobs: Simulations and result function of each job.
+        dirpath: to store results locally.
+        max_concurrency: maximum number of simulations running at once.
+    """
+    return batch.get_results_jobs(
+        jobs, Tidy3dBackend(), dirpath, max_concurrency=max_concurrency
+    )
+
+
 if __name__ == "__main__":
     import gdsfactory.simulation.gtidy3d as gt
 
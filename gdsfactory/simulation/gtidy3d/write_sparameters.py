@@ -5,20 +5,25 @@ import numpy as np
 import pandas as pd
 import tidy3d as td
 from omegaconf import OmegaConf
-from tqdm import tqdm
 
 import gdsfactory as gf
 from gdsfactory.config import logger, sparameters_path
 from gdsfactory.serialization import clean_value_json
 from gdsfactory.simulation import port_symmetries
+from gdsfactory.simulation.get_results_batch import SimulationJob
 from gdsfactory.simulation.get_sparameters_path import (
     get_sparameters_path_tidy3d as get_sparameters_path,
 )
-from gdsfactory.simulation.gtidy3d.get_results import _executor, get_results
+from gdsfactory.simulation.gtidy3d.get_results import get_results_jobs
 from gdsfactory.simulation.gtidy3d.get_simulation import get_simulation
+from gdsfactory.simulation.port_symmetries import get_port_symmetries
+from gdsfactory.simulation.sparameters_store import (
+    get_port_names,
+    get_sparameters_store,
+    sparameters_from_dataframe,
+)
 from gdsfactory.types import (
     Any,
-    Component,
     ComponentOrFactory,
     Dict,
     List,
@@ -78,69 +83,16 @@ def get_wavelengths(port_index, sim_data: td.SimulationData):
     return td.constants.C_0 / freqs.values
 
 
-def write_sparameters(
+def _get_sparameters_job(
     component: ComponentOrFactory,
     port_symmetries: Optional[PortSymmetries] = None,
     dirpath: PathType = sparameters_path,
     overwrite: bool = False,
+    detect_port_symmetries: bool = False,
     **kwargs,
-) -> pd.DataFrame:
-    """Get full sparameter matrix from a gdsfactory Component.
-    Simulates each time using a different input port (by default, all of them)
-    unless you specify port_symmetries:
-
-    port_symmetries = {"o1":
-            {
-                "s11": ["s22","s33","s44"],
-                "s21": ["s21","s34","s43"],
-                "s31": ["s13","s24","s42"],
-                "s41": ["s14","s23","s32"],
-            }
-        }
-    - Only simulations using the outer key port names will be run
-    - The associated value is another dict whose keys are the S-parameters computed
-        when this source is active
-    - The values of this inner Dict are lists of s-parameters whose values are copied
-
-    Args:
-        component: to simulate.
-        port_symmetries: Dict to specify port symmetries, to save number of simulations
-        dirpath: directory to store sparameters in CSV.
-        overwrite: overwrites stored Sparameter CSV results.
-
-    Keyword Args:
-        port_extension: extend ports beyond the PML.
-        layer_stack: contains layer numbers (int, int) to thickness, zmin
-        thickness_pml: PML thickness (um).
-        xmargin: left/right distance from component to PML.
-        xmargin_left: left distance from component to PML.
-        xmargin_right: right distance from component to PML.
-        ymargin: left/right distance from component to PML.
-        ymargin_top: top distance from component to PML.
-        ymargin_bot: bottom distance from component to PML.
-        zmargin: thickness for cladding above and below core.
-        clad_material: material for cladding.
-        port_source_name: input port name.
-        port_margin: margin on each side of the port.
-        distance_source_to_monitors: in (um) source goes before monitors.
-        resolution: in pixels/um (20: for coarse, 120: for fine)
-        wavelength_start: in (um).
-        wavelength_stop: in (um).
-        wavelength_points: in (um).
-        plot_modes: plot source modes.
-        num_modes: number of modes to plot
-        run_time_ps: make sure it's sufficient for the fields to decay.
-            defaults to 10ps and counts on automatic shutoff to stop earlier if needed.
-        dispersive: False uses constant refractive index materials.
-            True adds wavelength depending materials.
-            Dispersive materials require more computation.
-        material_name_to_tidy3d_index: not dispersive materials have a constant index.
-        material_name_to_tidy3d_name: dispersive materials have a wavelength
-            dependent index. Maps layer_stack names with tidy3d material database names.
-        is_3d: if False, does not consider Z dimension for faster simulations.
-        with_all_monitors: True adds field monitor which increases results file size.
-
-    """
+) -> SimulationJob:
+    """Returns the Simulations of write_sparameters and the function that
+    writes the Sparameters from their SimulationData."""
     component = component() if callable(component) else component
     filepath = get_sparameters_path(
         component=component,
@@ -148,10 +100,33 @@ def write_sparameters(
         **kwargs,
     )
     filepath_sim_settings = filepath.with_suffix(".yml")
+    store = get_sparameters_store(dirpath)
+    store_settings = dict(component=component, tool="tidy3d", **kwargs)
+    sparameters = None if overwrite else store.get_component(**store_settings)
+    if sparameters is not None:
+        logger.info(f"Simulation loaded from {str(store.dirpath)!r}")
+        df = sparameters.to_dataframe()
+        return SimulationJob(sims=[], get_result=lambda sim_datas: df)
     if filepath.exists() and not overwrite:
         logger.info(f"Simulation loaded from {filepath!r}")
-        return pd.read_csv(filepath)
-
+        df = pd.read_csv(filepath)
+        return SimulationJob(sims=[], get_result=lambda sim_datas: df)
+
+    if detect_port_symmetries and port_symmetries is None:
+        # the simulation region (with the margins of get_simulation) needs
+        # the symmetries too
+        xmargin = kwargs.get("xmargin", 0)
+        ymargin = kwargs.get("ymargin", 0)
+        component_padding = gf.add_padding_container(
+            component,
+            default=0,
+            top=ymargin or kwargs.get("ymargin_top", 0),
+            bottom=ymargin or kwargs.get("ymargin_bot", 0),
+            left=xmargin or kwargs.get("xmargin_left", 0),
+            right=xmargin or kwargs.get("xmargin_right", 0),
+        )
+        port_symmetries = get_port_symmetries(component_padding)
+        logger.info(f"Detected port_symmetries {port_symmetries}")
     port_symmetries = port_symmetries or {}
     monitor_indices = []
     source_indices = []
@@ -169,36 +144,21 @@ def write_sparameters(
     num_sims = len(port_symmetries.keys()) or len(source_indices)
     sp = {}
 
-    def get_sparameter(
-        n: int,
-        component: Component,
-        port_symmetries=port_symmetries,
-        monitor_indices=monitor_indices,
-        **kwargs,
-    ) -> np.ndarray:
-        """Return Component sparameter for a particular port Index n
+    def get_sparameter(n: int, sim_data: td.SimulationData) -> None:
+        """Adds Component sparameters for source port index n to sp.
 
         Args:
-            n: port_index
-            component:
-            port_symmetries:
-            monitor_indices:
-            kwargs: simulation settings
-
+            n: source port index.
+            sim_data: simulation results with source port n.
         """
-        sim = get_simulation(
-            component, port_source_name=f"o{monitor_indices[n]}", **kwargs
-        )
-        sim_data = get_results(sim)
-        sim_data = sim_data.result()
         source_entering, source_exiting = parse_port_eigenmode_coeff(
-            monitor_indices[n], component_ref.ports, sim_data
+            source_indices[n], component_ref.ports, sim_data
         )
 
         for monitor_index in monitor_indices:
-            j = monitor_indices[n]
+            j = source_indices[n]
             i = monitor_index
-            if monitor_index == monitor_indices[n]:
+            if monitor_index == source_indices[n]:
                 sii = source_exiting / source_entering
 
                 siia = np.unwrap(np.angle(sii))
@@ -215,56 +175,141 @@ def write_sparameters(
                 sijm = np.abs(sij)
                 sp[f"s{i}{j}a"] = sija
                 sp[f"s{i}{j}m"] = sijm
-                sij = monitor_entering / source_entering
-                sija = np.unwrap(np.angle(sij))
-                sijm = np.abs(sij)
 
         if bool(port_symmetries) is True:
-            for key in port_symmetries[f"o{monitor_indices[n]}"].keys():
-                values = port_symmetries[f"o{monitor_indices[n]}"][key]
+            for key in port_symmetries[f"o{source_indices[n]}"].keys():
+                values = port_symmetries[f"o{source_indices[n]}"][key]
                 for value in values:
                     sp[f"{value}m"] = sp[f"{key}m"]
                     sp[f"{value}a"] = sp[f"{key}a"]
 
         sp["wavelengths"] = get_wavelengths(port_index=monitor_index, sim_data=sim_data)
-        return sp
 
     start = time.time()
-
-    # Compute each Sparameter on a separate thread
-    sparameters = [
-        _executor.submit(
-            get_sparameter, n, component, port_symmetries, monitor_indices, **kwargs
-        )
+    sims = [
+        get_simulation(component, port_source_name=f"o{source_indices[n]}", **kwargs)
         for n in range(num_sims)
     ]
 
-    for sparameter in tqdm(sparameters):
-        sp.update(sparameter.result())
+    def get_sparameters(sim_datas: List[td.SimulationData]) -> pd.DataFrame:
+        for n, sim_data in enumerate(sim_datas):
+            get_sparameter(n, sim_data)
+
+        end = time.time()
+        df = pd.DataFrame(sp)
+        df.to_csv(filepath, index=False)
+        sparameters = sparameters_from_dataframe(df, ports=get_port_names(component))
+        store.put(sparameters, **store_settings)
+        kwargs.update(compute_time_seconds=end - start)
+        kwargs.update(compute_time_minutes=(end - start) / 60)
 
-    end = time.time()
-    df = pd.DataFrame(sp)
-    df.to_csv(filepath, index=False)
-    kwargs.update(compute_time_seconds=end - start)
-    kwargs.update(compute_time_minutes=(end - start) / 60)
+        settings = OmegaConf.to_yaml(clean_value_json(kwargs))
+        filepath_sim_settings.write_text(settings)
+        logger.info(f"Write simulation results to {str(filepath)!r}")
+        logger.info(f"Write simulation settings to {str(filepath_sim_settings)!r}")
+        return df
 
-    filepath_sim_settings.write_text(OmegaConf.to_yaml(clean_value_json(kwargs)))
-    logger.info(f"Write simulation results to {str(filepath)!r}")
-    logger.info(f"Write simulation settings to {str(filepath_sim_settings)!r}")
-    return df
+    return SimulationJob(sims=sims, get_result=get_sparameters)
 
 
-def write_sparameters_batch(jobs: List[Dict[str, Any]], **kwargs) -> List[pd.DataFrame]:
-    """Returns Sparameters for a list of write_sparameters_grating_coupler
+def write_sparameters(
+    component: ComponentOrFactory,
+    port_symmetries: Optional[PortSymmetries] = None,
+    dirpath: PathType = sparameters_path,
+    overwrite: bool = False,
+    detect_port_symmetries: bool = False,
+    max_concurrency: int = 10,
+    **kwargs,
+) -> pd.DataFrame:
+    """Get full sparameter matrix from a gdsfactory Component.
+    Simulates each time using a different input port (by default, all of them)
+    unless you specify port_symmetries:
+
+    port_symmetries = {"o1":
+            {
+                "s11": ["s22","s33","s44"],
+                "s21": ["s21","s34","s43"],
+                "s31": ["s13","s24","s42"],
+                "s41": ["s14","s23","s32"],
+            }
+        }
+    - Only simulations using the outer key port names will be run
+    - The associated value is another dict whose keys are the S-parameters computed
+        when this source is active
+    - The values of this inner Dict are lists of s-parameters whose values are copied
+
+    Args:
+        component: to simulate.
+        port_symmetries: Dict to specify port symmetries, to save number of simulations
+        dirpath: directory to store sparameters in CSV.
+        overwrite: overwrites stored Sparameter CSV results.
+        detect_port_symmetries: if port_symmetries is None, finds them from
+            the symmetries of the component with its margins and reciprocity.
+        max_concurrency: maximum number of simulations running at once.
+
+    Keyword Args:
+        port_extension: extend ports beyond the PML.
+        layer_stack: contains layer numbers (int, int) to thickness, zmin
+        thickness_pml: PML thickness (um).
+        xmargin: left/right distance from component to PML.
+        xmargin_left: left distance from component to PML.
+        xmargin_right: right distance from component to PML.
+        ymargin: left/right distance from component to PML.
+        ymargin_top: top distance from component to PML.
+        ymargin_bot: bottom distance from component to PML.
+        zmargin: thickness for cladding above and below core.
+        clad_material: material for cladding.
+        port_source_name: input port name.
+        port_margin: margin on each side of the port.
+        distance_source_to_monitors: in (um) source goes before monitors.
+        resolution: in pixels/um (20: for coarse, 120: for fine)
+        wavelength_start: in (um).
+        wavelength_stop: in (um).
+        wavelength_points: in (um).
+        plot_modes: plot source modes.
+        num_modes: number of modes to plot
+        run_time_ps: make sure it's sufficient for the fields to decay.
+            defaults to 10ps and counts on automatic shutoff to stop earlier if needed.
+        dispersive: False uses constant refractive index materials.
+            True adds wavelength depending materials.
+            Dispersive materials require more computation.
+        material_name_to_tidy3d_index: not dispersive materials have a constant index.
+        material_name_to_tidy3d_name: dispersive materials have a wavelength
+            dependent index. Maps layer_stack names with tidy3d material database names.
+        is_3d: if False, does not consider Z dimension for faster simulations.
+        with_all_monitors: True adds field monitor which increases results file size.
+
+    """
+    job = _get_sparameters_job(
+        component,
+        port_symmetries=port_symmetries,
+        dirpath=dirpath,
+        overwrite=overwrite,
+        detect_port_symmetries=detect_port_symmetries,
+        **kwargs,
+    )
+    return get_results_jobs([job], max_concurrency=max_concurrency)[0]
+
+
+def write_sparameters_batch(
+    jobs: List[Dict[str, Any]], max_concurrency: int = 10, **kwargs
+) -> List[pd.DataFrame]:
+    """Returns Sparameters for a list of write_sparameters
     kwargs where it runs each simulation in paralell.
 
+    The simulations of all the jobs run in one batch, which lists the server
+    tasks once, runs equal simulations once and keeps up to max_concurrency
+    simulations running. Each job writes its Sparameters as soon as its
+    simulations complete.
+
     Args:
-        jobs: list of kwargs for write_sparameters_grating_coupler
-        kwargs: simulation settings
+        jobs: list of kwargs for write_sparameters.
+        max_concurrency: maximum number of simulations running at once.
+        kwargs: simulation settings.
 
     """
-    sp = [_executor.submit(write_sparameters, **job, **kwargs) for job in jobs]
-    return [spi.result() for spi in sp]
+    sparameters_jobs = [_get_sparameters_job(**{**kwargs, **job}) for job in jobs]
+    return get_results_jobs(sparameters_jobs, max_concurrency=max_concurrency)
 
 
 write_sparameters_1x1 = gf.partial(
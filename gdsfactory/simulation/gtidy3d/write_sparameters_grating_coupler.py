@@ -8,16 +8,91 @@ from omegaconf import OmegaConf
 
 from gdsfactory.config import logger, sparameters_path
 from gdsfactory.serialization import clean_value_json
+from gdsfactory.simulation.get_results_batch import SimulationJob
 from gdsfactory.simulation.get_sparameters_path import (
     get_sparameters_path_tidy3d as get_sparameters_path,
 )
-from gdsfactory.simulation.gtidy3d.get_results import _executor, get_results
+from gdsfactory.simulation.gtidy3d.get_results import get_results_jobs
 from gdsfactory.simulation.gtidy3d.get_simulation_grating_coupler import (
     get_simulation_grating_coupler,
 )
 from gdsfactory.types import Component, ComponentOrFactory, List, PathType
 
 
+def _get_sparameters_job(
+    component: ComponentOrFactory,
+    dirpath: PathType = sparameters_path,
+    overwrite: bool = False,
+    **kwargs,
+) -> SimulationJob:
+    """Returns the Simulation of write_sparameters_grating_coupler and the
+    function that writes the Sparameters from its SimulationData."""
+    component = component() if callable(component) else component
+    assert isinstance(component, Component)
+
+    filepath = get_sparameters_path(
+        component=component,
+        dirpath=dirpath,
+        **kwargs,
+    )
+    filepath_sim_settings = filepath.with_suffix(".yml")
+    if filepath.exists() and not overwrite:
+        logger.info(f"Simulation loaded from {filepath!r}")
+        df = pd.read_csv(filepath)
+        return SimulationJob(sims=[], get_result=lambda sim_datas: df)
+    elif filepath.exists() and overwrite:
+        filepath.unlink()
+
+    start = time.time()
+    sim = get_simulation_grating_coupler(component, **kwargs)
+
+    def get_sparameters(sim_datas: List[td.SimulationData]) -> pd.DataFrame:
+        sim_data = sim_datas[0]
+        direction_inp = "+"
+        direction_out = "-"
+
+        monitor_entering = (
+            sim_data.monitor_data["waveguide"]
+            .amps.sel(direction=direction_inp)
+            .values.flatten()
+        )
+        monitor_exiting = (
+            sim_data.monitor_data["waveguide"]
+            .amps.sel(direction=direction_out)
+            .values.flatten()
+        )
+        r = monitor_entering / monitor_exiting
+        ra = np.unwrap(np.angle(r))
+        rm = np.abs(r)
+
+        t = monitor_exiting
+        ta = np.unwrap(np.angle(t))
+        tm = np.abs(t)
+
+        sp = {}
+        freqs = sim_data.monitor_data["waveguide"].amps.sel(direction="+").f
+        sp["wavelengths"] = td.constants.C_0 / freqs.values
+        sp["s11a"] = sp["s22a"] = ra
+        sp["s11m"] = sp["s22m"] = rm
+
+        sp["s12a"] = sp["s21a"] = ta
+        sp["s12m"] = sp["s21m"] = tm
+
+        end = time.time()
+        df = pd.DataFrame(sp)
+        df.to_csv(filepath, index=False)
+        kwargs.update(compute_time_seconds=end - start)
+        kwargs.update(compute_time_minutes=(end - start) / 60)
+
+        settings = OmegaConf.to_yaml(clean_value_json(kwargs))
+        filepath_sim_settings.write_text(settings)
+        logger.info(f"Write simulation results to {str(filepath)!r}")
+        logger.info(f"Write simulation settings to {str(filepath_sim_settings)!r}")
+        return df
+
+    return SimulationJob(sims=[sim], get_result=get_sparameters)
+
+
 def write_sparameters_grating_coupler(
     component: ComponentOrFactory,
     dirpath: PathType = sparameters_path,
@@ -80,84 +155,30 @@ def write_sparameters_grating_coupler(
         with_all_monitors: stores all monitor fields
 
     """
-    component = component() if callable(component) else component
-    assert isinstance(component, Component)
-
-    filepath = get_sparameters_path(
-        component=component,
-        dirpath=dirpath,
-        **kwargs,
-    )
-    filepath_sim_settings = filepath.with_suffix(".yml")
-    if filepath.exists() and not overwrite:
-        logger.info(f"Simulation loaded from {filepath!r}")
-        return pd.read_csv(filepath)
-    elif filepath.exists() and overwrite:
-        filepath.unlink()
-
-    start = time.time()
-    sim = get_simulation_grating_coupler(component, **kwargs)
-    sim_data = get_results(sim)
-    sim_data = sim_data.result()
-
-    direction_inp = "+"
-    direction_out = "-"
-
-    monitor_entering = (
-        sim_data.monitor_data["waveguide"]
-        .amps.sel(direction=direction_inp)
-        .values.flatten()
-    )
-    monitor_exiting = (
-        sim_data.monitor_data["waveguide"]
-        .amps.sel(direction=direction_out)
-        .values.flatten()
+    job = _get_sparameters_job(
+        component, dirpath=dirpath, overwrite=overwrite, **kwargs
     )
-    r = monitor_entering / monitor_exiting
-    ra = np.unwrap(np.angle(r))
-    rm = np.abs(r)
-
-    t = monitor_exiting
-    ta = np.unwrap(np.angle(t))
-    tm = np.abs(t)
-
-    sp = {}
-    freqs = sim_data.monitor_data["waveguide"].amps.sel(direction="+").f
-    sp["wavelengths"] = td.constants.C_0 / freqs.values
-    sp["s11a"] = sp["s22a"] = ra
-    sp["s11m"] = sp["s22m"] = rm
-
-    sp["s12a"] = sp["s21a"] = ta
-    sp["s12m"] = sp["s21m"] = tm
-
-    end = time.time()
-    df = pd.DataFrame(sp)
-    df.to_csv(filepath, index=False)
-    kwargs.update(compute_time_seconds=end - start)
-    kwargs.update(compute_time_minutes=(end - start) / 60)
-
-    filepath_sim_settings.write_text(OmegaConf.to_yaml(clean_value_json(kwargs)))
-    logger.info(f"Write simulation results to {str(filepath)!r}")
-    logger.info(f"Write simulation settings to {str(filepath_sim_settings)!r}")
-    return df
+    return get_results_jobs([job])[0]
 
 
 def write_sparameters_grating_coupler_batch(
-    jobs: List[Dict[str, Any]], **kwargs
+    jobs: List[Dict[str, Any]], max_concurrency: int = 10, **kwargs
 ) -> List[pd.DataFrame]:
     """Returns Sparameters for a list of write_sparameters_grating_coupler
     settings where it simulation runs in paralell.
 
+    The simulations of all the jobs run in one batch, which lists the server
+    tasks once, runs equal simulations once and keeps up to max_concurrency
+    simulations running.
+
     Args:
         jobs: list of kwargs for write_sparameters_grating_coupler
+        max_concurrency: maximum number of simulations running at once.
         kwargs: simulation settings
 
     """
-    sp = [
-        _executor.submit(write_sparameters_grating_coupler, **job, **kwargs)
-        for job in jobs
-    ]
-    return [spi.result() for spi in sp]
+    sparameters_jobs = [_get_sparameters_job(**{**kwargs, **job}) for job in jobs]
+    return get_results_jobs(sparameters_jobs, max_concurrency=max_concurrency)
 
 
 if __name__ == "__main__":
@@ -13,6 +13,10 @@ from gdsfactory.config import __version__, logger
 from gdsfactory.simulation.get_sparameters_path import (
     get_sparameters_path_lumerical as get_sparameters_path,
 )
+from gdsfactory.simulation.sparameters_store import (
+    get_sparameters_store,
+    sparameters_from_dataframe,
+)
 from gdsfactory.tech import (
     LAYER_STACK,
     SIMULATION_SETTINGS,
@@ -170,6 +174,15 @@ def write_sparameters_lumerical(
     if not ports:
         raise ValueError(f"`{component.name}` does not have any optical ports")
 
+    store = get_sparameters_store(dirpath)
+    store_settings = dict(
+        component=component, tool="lumerical", layer_stack=layer_stack, **settings
+    )
+    sparameters = None if overwrite else store.get_component(**store_settings)
+    if run and sparameters is not None:
+        logger.info(f"Reading Sparameters from {str(store.dirpath)!r}")
+        return sparameters.to_dataframe()
+
     c = gf.components.extension.extend_ports(
         component=component, length=ss.port_extension
     )
@@ -434,6 +447,9 @@ def write_sparameters_lumerical(
 
         end = time.time()
         df.to_csv(filepath_csv, index=False)
+        store_ports = [port.name for port in ports]
+        sparameters = sparameters_from_dataframe(df, ports=store_ports)
+        store.put(sparameters, **store_settings)
         sim_settings.update(compute_time_seconds=end - start)
         sim_settings.update(compute_time_minutes=(end - start) / 60)
         filepath_sim_settings.write_text(omegaconf.OmegaConf.to_yaml(sim_settings))
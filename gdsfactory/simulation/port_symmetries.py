@@ -1,3 +1,26 @@
+"""Port symmetries to save simulations.
+
+A port_symmetries dict maps each source port to simulate to the Sparameters
+that its simulation computes and the list of Sparameters with the same value.
+
+`get_port_symmetries` finds the mirror and rotation symmetries of a component
+geometry and its ports, and uses them with reciprocity (Sij = Sji) to simulate
+as few source ports as possible.
+"""
+import re
+from typing import Dict, List, Set, Tuple
+
+import gdspy
+import numpy as np
+
+from gdsfactory.component import Component
+from gdsfactory.polygon_table import (
+    PolygonTable,
+    hash_polygon_table,
+    split_polygon_table,
+)
+from gdsfactory.types import PortSymmetries
+
 port_symmetries_1x1 = {
     "o1": {
         "s11": ["s22"],
@@ -14,3 +37,233 @@ port_symmetries_crossing = {
         "s41": ["s14", "s23", "s32"],
     }
 }
+
+# rotations by 0, 90, 180 and 270 degrees and mirrors about x, y and diagonals
+_transforms = [
+    np.array(matrix, dtype=float)
+    for matrix in [
+        [[1, 0], [0, 1]],
+        [[0, -1], [1, 0]],
+        [[-1, 0], [0, -1]],
+        [[0, 1], [-1, 0]],
+        [[-1, 0], [0, 1]],
+        [[1, 0], [0, -1]],
+        [[0, 1], [1, 0]],
+        [[0, -1], [-1, 0]],
+    ]
+]
+
+Pair = Tuple[int, int]
+
+
+def get_port_permutations(
+    component: Component, port_type: str = "optical", precision: float = 1e-4
+) -> List[List[int]]:
+    """Returns the port permutations of the component symmetries.
+
+    A symmetry is a rotation by a multiple of 90 degrees or a mirror about the
+    bounding box center that leaves the polygons unchanged and moves each port
+    onto a port with the same width, layer and orientation.
+    Permutation[i] is the index of the port where port i moves.
+
+    Args:
+        component: to find symmetries.
+        port_type: of the ports.
+        precision: points are rounded to this grid (um).
+    """
+    ports = component.get_ports_list(port_type=port_type)
+    ports.sort(key=lambda port: _get_port_index(port.name))
+    table = component.get_polygon_table()
+    bbox = component.get_bounding_box()
+    if bbox is None:
+        return []
+    center = bbox.mean(axis=0)
+    geometry_hash = hash_polygon_table(table, precision)
+
+    midpoints = np.array([port.midpoint for port in ports]).reshape(-1, 2)
+    angles = np.deg2rad([port.orientation or 0 for port in ports])
+    directions = np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+
+    permutations = []
+    for matrix in _transforms:
+        points = (table.points - center) @ matrix.T + center
+        moved = table._replace(points=points)
+        if hash_polygon_table(moved, precision) != geometry_hash and not (
+            _is_same_geometry(table, moved, precision)
+        ):
+            continue
+        moved_midpoints = (midpoints - center) @ matrix.T + center
+        moved_directions = directions @ matrix.T
+        permutation = []
+        for port, midpoint, direction in zip(
+            ports, moved_midpoints, moved_directions
+        ):
+            matches = [
+                j
+                for j, other in enumerate(ports)
+                if np.abs(midpoints[j] - midpoint).max() < precision
+                and np.abs(directions[j] - direction).max() < 1e-6
+                and abs(other.width - port.width) < precision
+                and tuple(other.layer) == tuple(port.layer)
+            ]
+            if len(matches) != 1:
+                break
+            permutation.append(matches[0])
+        else:
+            permutations.append(permutation)
+    return permutations
+
+
+def _is_same_geometry(
+    table1: PolygonTable, table2: PolygonTable, precision: float = 1e-4
+) -> bool:
+    """Returns True if the polygons of each layer cover the same area.
+
+    Slower than comparing hashes, but does not depend on how the area is
+    split into polygons.
+    """
+    polygons1 = split_polygon_table(table1, by_spec=True)
+    polygons2 = split_polygon_table(table2, by_spec=True)
+    if set(polygons1) != set(polygons2):
+        return False
+    for layer, polygons in polygons1.items():
+        xor = gdspy.boolean(polygons, polygons2[layer], "xor", precision=precision)
+        if xor is not None and xor.area() > precision:
+            return False
+    return True
+
+
+def _get_port_index(port_name: str) -> int:
+    indices = re.findall("[0-9]+", port_name)
+    if not indices:
+        raise ValueError(
+            f"port {port_name!r} has no index. port_symmetries name the "
+            "Sparameters after the port indices, so port names need a number "
+            "(o1, o2 ...)"
+        )
+    return int(indices[0])
+
+
+def get_port_symmetries(
+    component: Component,
+    reciprocal: bool = True,
+    port_type: str = "optical",
+    precision: float = 1e-4,
+) -> PortSymmetries:
+    """Returns the port_symmetries of a component from its geometry symmetries.
+
+    Sparameters that a symmetry maps onto each other are equal, and reciprocity
+    also makes Sij = Sji. The source ports are chosen to compute each group of
+    equal Sparameters at least once, with as few simulations as possible.
+
+    The simulation region needs the same symmetries, so pass the component
+    with the simulation margins (`add_padding_container`) when they differ
+    on each side.
+
+    Args:
+        component: to simulate.
+        reciprocal: True assumes Sij = Sji.
+        port_type: of the simulated ports.
+        precision: points are rounded to this grid (um).
+    """
+    ports = component.get_ports_list(port_type=port_type)
+    ports.sort(key=lambda port: _get_port_index(port.name))
+    n = len(ports)
+    indices = [_get_port_index(port.name) for port in ports]
+    permutations = get_port_permutations(component, port_type, precision)
+
+    # groups of (monitor, source) pairs with the same Sparameter
+    groups: List[Set[Pair]] = []
+    grouped: Dict[Pair, int] = {}
+    for pair in [(i, j) for j in range(n) for i in range(n)]:
+        if pair in grouped:
+            continue
+        group = {pair}
+        stack = [pair]
+        while stack:
+            i, j = stack.pop()
+            images = [(p[i], p[j]) for p in permutations]
+            if reciprocal:
+                images.append((j, i))
+            for image in images:
+                if image not in group:
+                    group.add(image)
+                    stack.append(image)
+        for member in group:
+            grouped[member] = len(groups)
+        groups.append(group)
+
+    # pick the sources that compute the most groups not computed yet
+    sources: List[int] = []
+    missing = set(range(len(groups)))
+    while missing:
+        source = max(
+            range(n),
+            key=lambda j: (sum(grouped[(i, j)] in missing for i in range(n)), -j),
+        )
+        sources.append(source)
+        missing -= {grouped[(i, source)] for i in range(n)}
+    sources.sort()
+
+    def name(pair: Pair) -> str:
+        return f"s{indices[pair[0]]}{indices[pair[1]]}"
+
+    port_symmetries: PortSymmetries = {ports[j].name: {} for j in sources}
+    for group in groups:
+        computed = sorted(
+            (pair for pair in group if pair[1] in sources),
+            key=lambda pair: (pair[1], pair[0]),
+        )
+        copied = sorted(
+            (pair for pair in group if pair[1] not in sources),
+            key=lambda pair: (pair[1], pair[0]),
+        )
+        if copied:
+            key = computed[0]
+            port_symmetries[ports[key[1]].name][name(key)] = [
+                name(pair) for pair in copied
+            ]
+    return port_symmetries
+
+
+def test_get_port_symmetries() -> None:
+    import gdsfactory as gf
+
+    assert get_port_symmetries(gf.components.straight()) == port_symmetries_1x1
+    assert list(get_port_symmetries(gf.components.crossing())) == ["o1"]
+    assert list(get_port_symmetries(gf.components.mmi2x2())) == ["o1"]
+    assert list(get_port_symmetries(gf.components.mmi1x2())) == ["o1", "o2"]
+    assert list(get_port_symmetries(gf.components.bend_euler())) == ["o1"]
+
+    symmetries = get_port_symmetries(gf.components.bend_euler(), reciprocal=False)
+    assert symmetries == {"o1": {"s11": ["s22"], "s21": ["s12"]}}
+    taper = gf.components.taper(width2=1)
+    assert list(get_port_symmetries(taper, reciprocal=False)) == ["o1", "o2"]
+    assert get_port_symmetries(taper) == {"o1": {}, "o2": {}}
+
+    # margins that differ on each side break the mirror symmetry
+    straight = gf.add_padding_container(
+        gf.components.straight(), default=0, left=1, top=2, bottom=2
+    )
+    assert list(get_port_symmetries(straight)) == ["o1", "o2"]
+
+
+def test_get_port_symmetries_port_names() -> None:
+    import pytest
+
+    import gdsfactory as gf
+
+    c = gf.Component()
+    c.add_port(name="in", midpoint=(0, 0), width=0.5, orientation=180)
+    c.add_port(name="out", midpoint=(10, 0), width=0.5, orientation=0)
+    c.add_polygon([(0, -0.25), (10, -0.25), (10, 0.25), (0, 0.25)])
+    with pytest.raises(ValueError, match="has no index"):
+        get_port_symmetries(c)
+
+
+if __name__ == "__main__":
+    import gdsfactory as gf
+
+    print(get_port_symmetries(gf.components.crossing()))
+    print(get_port_symmetries(gf.components.mmi2x2()))
+    print(get_port_symmetries(gf.components.mmi1x2()))
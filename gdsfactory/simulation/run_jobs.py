@@ -0,0 +1,191 @@
+"""Run simulation commands as a work queue on a fixed number of cores.
+
+`run_jobs` starts a job as soon as there are enough free cores, so one slow
+simulation does not idle the other cores. A job fails when its process exits
+with a non-zero code, does not write its output file or runs longer than its
+timeout. Failed jobs are retried, and the progress bar shows the ETA.
+
+Each job writes stdout and stderr to a log file, so the logs of the failed
+jobs can be read after the batch ends.
+"""
+import os
+import signal
+import subprocess
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from tqdm import tqdm
+
+from gdsfactory.config import logger
+
+
+class Job(NamedTuple):
+    """Command to run.
+
+    Args:
+        name: unique job name, also used for the log file.
+        command: program and arguments.
+        cores: number of cores that the command uses.
+        filepath: output file that the command writes. None only checks
+            the exit code.
+        timeout: maximum run time in seconds. None runs until the command ends.
+    """
+
+    name: str
+    command: List[str]
+    cores: int = 1
+    filepath: Optional[Path] = None
+    timeout: Optional[float] = None
+
+
+class JobResult(NamedTuple):
+    """Result of the last run of a job.
+
+    Args:
+        job: that ran.
+        returncode: exit code of the last run. None if it timed out.
+        attempts: number of runs.
+        duration: run time of the last run in seconds.
+        error: why the last run failed, empty if it succeeded.
+        logpath: stdout and stderr of the last run.
+    """
+
+    job: Job
+    returncode: Optional[int]
+    attempts: int
+    duration: float
+    error: str
+    logpath: Path
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+
+def _kill(process: subprocess.Popen) -> None:
+    """Kills a process and the processes it started (mpirun workers)."""
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+def _get_error(job: Job, returncode: Optional[int], logpath: Path) -> str:
+    if returncode is None:
+        error = f"timed out after {job.timeout} s"
+    elif returncode != 0:
+        error = f"exited with code {returncode}"
+    elif job.filepath and not Path(job.filepath).exists():
+        error = f"did not write {str(job.filepath)!r}"
+    else:
+        return ""
+    lines = logpath.read_text(errors="replace").splitlines()[-5:]
+    return "\n".join([error] + lines)
+
+
+def run_jobs(
+    jobs: List[Job],
+    total_cores: int = 4,
+    retries: int = 1,
+    log_dir: Path = Path("."),
+    poll_interval: float = 0.1,
+    progress: bool = True,
+) -> List[JobResult]:
+    """Runs jobs with up to total_cores cores busy and returns their results
+    in the same order as the jobs.
+
+    Args:
+        jobs: to run.
+        total_cores: total number of cores to use.
+        retries: number of times to run again a job that fails.
+        log_dir: directory for the job logs (name.log).
+        poll_interval: seconds between checks of the running processes.
+        progress: shows a progress bar with the ETA.
+    """
+    for job in jobs:
+        if job.cores > total_cores:
+            raise ValueError(
+                f"Job {job.name!r} needs {job.cores} cores "
+                f"> total_cores = {total_cores}"
+            )
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    queue: Deque[Tuple[int, int]] = deque((i, 1) for i in range(len(jobs)))
+    running: Dict[int, Tuple[subprocess.Popen, int, float]] = {}
+    results: List[Optional[JobResult]] = [None] * len(jobs)
+    durations: List[float] = []
+    free_cores = total_cores
+    bar = tqdm(total=len(jobs), disable=not progress)
+
+    try:
+        while queue or running:
+            while queue and jobs[queue[0][0]].cores <= free_cores:
+                i, attempt = queue.popleft()
+                job = jobs[i]
+                logpath = log_dir / f"{job.name}.log"
+                with open(logpath, "w") as log:
+                    process = subprocess.Popen(
+                        job.command,
+                        stdin=subprocess.DEVNULL,
+                        stdout=log,
+                        stderr=subprocess.STDOUT,
+                        start_new_session=os.name == "posix",
+                    )
+                logger.info(f"Started job {job.name!r} (attempt {attempt})")
+                running[i] = (process, attempt, time.perf_counter())
+                free_cores -= job.cores
+
+            time.sleep(poll_interval)
+            for i, (process, attempt, start) in list(running.items()):
+                job = jobs[i]
+                duration = time.perf_counter() - start
+                returncode = process.poll()
+                if returncode is None:
+                    if job.timeout is None or duration < job.timeout:
+                        continue
+                    _kill(process)
+
+                del running[i]
+                free_cores += job.cores
+                logpath = log_dir / f"{job.name}.log"
+                error = _get_error(job, returncode, logpath)
+                if error and attempt <= retries:
+                    logger.warning(f"Job {job.name!r} {error}. Retrying.")
+                    queue.append((i, attempt + 1))
+                    continue
+
+                results[i] = JobResult(
+                    job=job,
+                    returncode=returncode,
+                    attempts=attempt,
+                    duration=duration,
+                    error=error,
+                    logpath=logpath,
+                )
+                durations.append(duration)
+                bar.update()
+                failed = sum(1 for result in results if result and not result.ok)
+                bar.set_postfix(running=len(running), failed=failed)
+
+                remaining = len(queue) + len(running)
+                slots = max(total_cores // max(job.cores, 1), 1)
+                eta = sum(durations) / len(durations) * remaining / slots
+                if error:
+                    logger.error(f"Job {job.name!r} failed: {error}")
+                logger.info(
+                    f"Finished job {job.name!r} in {duration:.1f} s, "
+                    f"{len(durations)}/{len(jobs)} done, ETA {eta:.0f} s"
+                )
+    finally:
+        for process, _, _ in running.values():
+            _kill(process)
+        bar.close()
+
+    return results
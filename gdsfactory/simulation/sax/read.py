@@ -1,11 +1,18 @@
+from functools import partial
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 from sax.typing_ import Float, SDict
 from scipy.interpolate import interp1d
 
 import gdsfactory as gf
-from gdsfactory.simulation.get_sparameters_path import get_sparameters_path_lumerical
-from gdsfactory.types import PathType
+from gdsfactory.config import logger
+from gdsfactory.simulation.get_sparameters_path import (
+    get_sparameters_path_legacy_lumerical,
+    get_sparameters_path_lumerical,
+)
+from gdsfactory.types import ComponentOrFactory, PathType
 
 wl_cband = np.linspace(1.500, 1.600, 128)
 
@@ -54,18 +61,39 @@ def sdict_from_csv(
     }
 
 
+def get_filepath_lumerical(component: ComponentOrFactory, **kwargs) -> Path:
+    """Returns the Lumerical Sparameters CSV filepath of a component.
+
+    Falls back to the filepath named after the component, where Lumerical
+    results were stored before the filepath was named after the geometry hash.
+
+    Args:
+        component: component or component factory.
+        kwargs: simulation settings.
+    """
+    filepath = get_sparameters_path_lumerical(component=component, **kwargs)
+    if not filepath.exists():
+        filepath_legacy = get_sparameters_path_legacy_lumerical(
+            component=component, **kwargs
+        )
+        if filepath_legacy.exists():
+            logger.info(f"Read Sparameters from {str(filepath_legacy)!r}")
+            return filepath_legacy
+    return filepath
+
+
 def demo_mmi_lumerical_csv():
     import matplotlib.pyplot as plt
     from plot_model import plot_model
 
-    filepath = get_sparameters_path_lumerical(gf.c.mmi1x2)
+    filepath = get_filepath_lumerical(gf.c.mmi1x2)
     mmi = partial(sdict_from_csv, filepath=filepath, xkey="wavelengths")
     plot_model(mmi)
     plt.show()
 
 
 def sdict_from_component_lumerical(component, **kwargs):
-    filepath = get_sparameters_path_lumerical(component=component, **kwargs)
+    filepath = get_filepath_lumerical(component=component, **kwargs)
     return partial(sdict_from_csv, filepath=filepath)
 
 
@@ -77,8 +105,6 @@ mmi2x2 = gf.partial(sdict_from_component_lumerical, component=gf.components.mmi2
 
 
 if __name__ == "__main__":
-    from functools import partial
-
     import matplotlib.pyplot as plt
     from plot_model import plot_model
 
@@ -89,7 +115,7 @@ if __name__ == "__main__":
     # plt.plot(wl_cband, np.abs(s21) ** 2)
     # plt.show()
 
-    filepath = get_sparameters_path_lumerical(gf.c.mmi1x2)
+    filepath = get_filepath_lumerical(gf.c.mmi1x2)
     mmi = partial(sdict_from_csv, filepath=filepath, xkey="wavelengths")
     plot_model(mmi)
     plt.show()
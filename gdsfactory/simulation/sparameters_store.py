@@ -0,0 +1,362 @@
+"""Store of Sparameters results addressed by their content.
+
+`SparametersStore` keys each result on the component geometry, the layer_stack,
+the simulation settings and the simulation tool, so the same simulation always
+maps to the same result regardless of where it was run.
+
+The store keeps a single index file (one JSON line per result) and saves each
+complex Sparameters matrix as raw little-endian binary, with its shape in the
+index. Loading a result is one file read without any parsing, so thousands of
+results load in a fraction of a second for circuit simulations.
+
+Results are only appended, so several simulation processes can write to the
+same store. Each index line is written with a single append, and readers skip
+(and log) any line that is not valid JSON, for example when lines from two
+processes got interleaved, so one bad line does not break the whole index.
+"""
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+from numpy import ndarray
+
+from gdsfactory.component import Component
+from gdsfactory.config import logger, sparameters_path
+from gdsfactory.name import clean_value
+from gdsfactory.tech import LAYER_STACK, LayerStack
+from gdsfactory.types import ComponentOrFactory, PathType
+
+Record = Dict[str, Any]
+
+
+class Sparameters(NamedTuple):
+    """Sparameters of a component.
+
+    s[:, i, j] is the Sparameter from ports[j] to ports[i] over the wavelengths,
+    the same as the s{i+1}{j+1} columns of the CSV files.
+    """
+
+    wavelengths: ndarray
+    ports: Tuple[str, ...]
+    s: ndarray
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Returns a DataFrame with wavelengths, s11a, s11m, ... columns
+        where `a` is the angle in radians and `m` the module."""
+        n = len(self.ports)
+        columns: Dict[str, ndarray] = {"wavelengths": self.wavelengths}
+        for i in range(n):
+            for j in range(n):
+                sij = self.s[:, i, j]
+                columns[f"s{i + 1}{j + 1}a"] = np.unwrap(np.angle(sij))
+                columns[f"s{i + 1}{j + 1}m"] = np.abs(sij)
+        return pd.DataFrame(columns)
+
+
+def sparameters_from_dataframe(
+    df: pd.DataFrame,
+    xkey: str = "wavelengths",
+    prefix: str = "s",
+    ports: Optional[Sequence[str]] = None,
+) -> Sparameters:
+    """Returns Sparameters from a DataFrame in the CSV format.
+
+    Args:
+        df: with xkey, s11a, s11m, ... columns.
+        xkey: key for wavelengths in df.
+        prefix: for the sparameters column names in df.
+        ports: port names of the s{i}{j} column indices 1, 2, ...
+            Defaults to o1, o2, ...
+    """
+    if xkey not in df:
+        raise ValueError(f"{xkey!r} not in {list(df.keys())}")
+    modules = [key for key in df.keys() if re.fullmatch(f"{prefix}\\d+m", str(key))]
+    nports = int(round(len(modules) ** 0.5))
+    if ports is not None and len(ports) != nports:
+        raise ValueError(f"{len(ports)} ports {list(ports)} for {nports} ports in df")
+    wavelengths = df[xkey].to_numpy(dtype=float)
+    s = np.full((len(wavelengths), nports, nports), np.nan, dtype=complex)
+    for i in range(nports):
+        for j in range(nports):
+            m = f"{prefix}{i + 1}{j + 1}m"
+            a = f"{prefix}{i + 1}{j + 1}a"
+            if m in df and a in df:
+                s[:, i, j] = df[m].to_numpy() * np.exp(1j * df[a].to_numpy())
+    ports = tuple(ports or (f"o{i + 1}" for i in range(nports)))
+    return Sparameters(wavelengths=wavelengths, ports=ports, s=s)
+
+
+def get_port_names(component: Component, port_type: str = "optical") -> List[str]:
+    """Returns the port names sorted by their index, as in the s{i}{j} columns."""
+    ports = component.get_ports_list(port_type=port_type)
+    return sorted(
+        (port.name for port in ports),
+        key=lambda name: int(re.findall("[0-9]+", name)[0]),
+    )
+
+
+def get_sparameters_key(
+    component: Component,
+    tool: str,
+    layer_stack: LayerStack = LAYER_STACK,
+    **settings,
+) -> str:
+    """Returns the store key of a simulation.
+
+    Args:
+        component: simulated.
+        tool: simulation tool (meep, tidy3d, lumerical ...).
+        layer_stack: used in the simulation.
+        settings: simulation settings.
+    """
+    settings.update(
+        tool=tool,
+        layer_stack=layer_stack,
+        geometry_hash=component.get_geometry_hash(),
+    )
+    string = "_".join(f"{key}={clean_value(settings[key])}" for key in sorted(settings))
+    return hashlib.md5(string.encode()).hexdigest()
+
+
+class SparametersStore:
+    """Sparameters results stored in a directory.
+
+    Args:
+        dirpath: directory with index.jsonl and one binary file per result.
+    """
+
+    def __init__(self, dirpath: PathType = Path(sparameters_path) / "store") -> None:
+        self.dirpath = Path(dirpath)
+        self.index_path = self.dirpath / "index.jsonl"
+        self.records: Dict[str, Record] = {}
+        self._index_size = 0
+        self._cache: Dict[str, Sparameters] = {}
+
+    def _update_index(self) -> None:
+        """Reads the index lines appended since the last read."""
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_size)
+            data = f.read()
+        data = data[: data.rfind(b"\n") + 1]
+        self._index_size += len(data)
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                key = record["key"]
+            except (ValueError, TypeError, KeyError):
+                logger.warning(
+                    f"Skipping invalid line in {str(self.index_path)!r}: {line[:80]!r}"
+                )
+                continue
+            self.records[key] = record
+            self._cache.pop(key, None)
+
+    def __len__(self) -> int:
+        self._update_index()
+        return len(self.records)
+
+    def __contains__(self, key: str) -> bool:
+        if key not in self.records:
+            self._update_index()
+        return key in self.records
+
+    def _get_path(self, key: str) -> Path:
+        return self.dirpath / f"{key}.bin"
+
+    def put(
+        self,
+        sparameters: Sparameters,
+        component: ComponentOrFactory,
+        tool: str,
+        layer_stack: LayerStack = LAYER_STACK,
+        **settings,
+    ) -> str:
+        """Stores Sparameters and returns their key.
+
+        Args:
+            sparameters: to store.
+            component: simulated.
+            tool: simulation tool (meep, tidy3d, lumerical ...).
+            layer_stack: used in the simulation.
+            settings: simulation settings.
+        """
+        component = component() if callable(component) else component
+        key = get_sparameters_key(component, tool, layer_stack, **settings)
+        wavelengths = np.asarray(sparameters.wavelengths, dtype="<f8")
+        s = np.asarray(sparameters.s, dtype="<c16")
+        nports = len(sparameters.ports)
+        if s.shape != (len(wavelengths), nports, nports):
+            raise ValueError(
+                f"s shape {s.shape} != (wavelengths, ports, ports) = "
+                f"{(len(wavelengths), nports, nports)}"
+            )
+
+        self.dirpath.mkdir(parents=True, exist_ok=True)
+        path = self._get_path(key)
+        path_tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        path_tmp.write_bytes(wavelengths.tobytes() + s.tobytes())
+        os.replace(path_tmp, path)
+
+        record = dict(
+            key=key,
+            tool=tool,
+            name=component.name,
+            function_name=getattr(component.settings, "function_name", None),
+            ports=list(sparameters.ports),
+            wavelength_points=len(wavelengths),
+            settings={name: clean_value(value) for name, value in settings.items()},
+        )
+        line = (json.dumps(record) + "\n").encode()
+        fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        self.records[key] = record
+        self._cache[key] = Sparameters(
+            wavelengths=wavelengths, ports=tuple(sparameters.ports), s=s
+        )
+        return key
+
+    def get(self, key: str) -> Optional[Sparameters]:
+        """Returns the Sparameters of a key, None if they are not stored."""
+        if key in self._cache:
+            return self._cache[key]
+        if key not in self:
+            return None
+        record = self.records[key]
+        path = self._get_path(key)
+        try:
+            data = path.read_bytes()
+        except OSError as exc:
+            logger.warning(f"Sparameters {key!r} in the index but not stored: {exc}")
+            return None
+        npoints = record["wavelength_points"]
+        nports = len(record["ports"])
+        size = 8 * npoints + 16 * npoints * nports * nports
+        if len(data) != size:
+            logger.warning(f"{str(path)!r} has {len(data)} bytes, expected {size}")
+            return None
+        wavelengths = np.frombuffer(data, dtype="<f8", count=npoints)
+        s = np.frombuffer(data, dtype="<c16", offset=8 * npoints)
+        sparameters = Sparameters(
+            wavelengths=wavelengths,
+            ports=tuple(record["ports"]),
+            s=s.reshape(npoints, nports, nports),
+        )
+        self._cache[key] = sparameters
+        return sparameters
+
+    def get_component(
+        self,
+        component: ComponentOrFactory,
+        tool: str,
+        layer_stack: LayerStack = LAYER_STACK,
+        **settings,
+    ) -> Optional[Sparameters]:
+        """Returns the Sparameters of a simulation, None if not stored."""
+        component = component() if callable(component) else component
+        return self.get(get_sparameters_key(component, tool, layer_stack, **settings))
+
+    def load(self, keys: Optional[Iterable[str]] = None) -> Dict[str, Sparameters]:
+        """Returns the Sparameters of some keys, defaults to all the keys."""
+        self._update_index()
+        keys = list(self.records) if keys is None else keys
+        return {key: self.get(key) for key in keys}
+
+    def query(
+        self,
+        name: Optional[str] = None,
+        function_name: Optional[str] = None,
+        tool: Optional[str] = None,
+    ) -> List[Record]:
+        """Returns the index records that match a component name,
+        a component function_name and a tool. None matches any."""
+        self._update_index()
+        return [
+            record
+            for record in self.records.values()
+            if (name is None or record["name"] == name)
+            and (function_name is None or record["function_name"] == function_name)
+            and (tool is None or record["tool"] == tool)
+        ]
+
+
+sparameters_store = SparametersStore()
+_stores: Dict[Path, SparametersStore] = {
+    sparameters_store.dirpath.resolve(): sparameters_store
+}
+
+
+def get_sparameters_store(dirpath: PathType = sparameters_path) -> SparametersStore:
+    """Returns the SparametersStore of a Sparameters directory.
+
+    Args:
+        dirpath: Sparameters directory. The store is in dirpath/store.
+    """
+    store_path = (Path(dirpath) / "store").resolve()
+    if store_path not in _stores:
+        _stores[store_path] = SparametersStore(store_path)
+    return _stores[store_path]
+
+
+def test_sparameters_store(tmp_path: Path) -> None:
+    import gdsfactory as gf
+
+    store = SparametersStore(tmp_path)
+    c = gf.components.mmi1x2()
+    wavelengths = np.linspace(1.5, 1.6, 5)
+    s = np.arange(5 * 9).reshape(5, 3, 3) * (1 + 1j)
+    sp = Sparameters(wavelengths=wavelengths, ports=("o1", "o2", "o3"), s=s)
+    key = store.put(sp, component=c, tool="meep", resolution=20)
+
+    store = SparametersStore(tmp_path)
+    assert key in store
+    assert np.array_equal(store.get(key).s, s)
+    assert store.get_component(c, tool="meep", resolution=20) is store.get(key)
+    assert store.get_component(c, tool="meep", resolution=30) is None
+    assert [r["key"] for r in store.query(function_name="mmi1x2")] == [key]
+    assert not store.query(function_name="mmi1x2", tool="tidy3d")
+
+    sp2 = sparameters_from_dataframe(sp.to_dataframe())
+    assert sp2.ports == sp.ports
+    assert np.allclose(sp2.s, s)
+    sp3 = sparameters_from_dataframe(sp.to_dataframe(), ports=get_port_names(c))
+    assert sp3.ports == ("o1", "o2", "o3")
+
+    with open(tmp_path / "index.jsonl", "a") as f:
+        f.write('{"key": "garbled\n')
+    key2 = store.put(sp, component=c, tool="meep", resolution=30)
+    (tmp_path / f"{key2}.bin").unlink()
+    store = SparametersStore(tmp_path)
+    assert len(store) == 2
+    assert np.array_equal(store.get(key).s, s)
+    assert store.get(key2) is None
+
+    store = get_sparameters_store(tmp_path)
+    assert store.dirpath == tmp_path / "store"
+    assert get_sparameters_store(tmp_path) is store
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    test_sparameters_store(Path(tempfile.mkdtemp()))
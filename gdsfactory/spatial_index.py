@@ -0,0 +1,153 @@
+"""Spatial index of boxes for region queries.
+
+`BoxIndex` stores each box in the square bins of a uniform grid that the box
+overlaps. A window query only checks the boxes of the bins that the window
+overlaps, so it does not depend on the total number of boxes.
+
+Components build one index for their references and one per layer for their
+polygons, see `Component.get_references_in_bbox` and
+`Component.get_polygons_in_bbox`.
+"""
+from typing import List, Optional
+
+import numpy as np
+from numpy import ndarray
+
+
+class BoxIndex:
+    """Index of boxes in a uniform grid of square bins.
+
+    Args:
+        boxes: array of (xmin, ymin, xmax, ymax).
+        bin_size: bin side. Defaults to the typical box size,
+            with no more than about 4 bins per box.
+        max_bins: boxes that overlap more bins are checked on every query.
+    """
+
+    def __init__(
+        self, boxes: ndarray, bin_size: Optional[float] = None, max_bins: int = 64
+    ) -> None:
+        self.boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        n = len(self.boxes)
+        if n:
+            self.origin = self.boxes[:, :2].min(axis=0)
+            span = self.boxes[:, 2:].max(axis=0) - self.origin
+        else:
+            self.origin = np.zeros(2)
+            span = np.zeros(2)
+
+        if bin_size is None:
+            sizes = self.boxes[:, 2:] - self.boxes[:, :2]
+            bin_size = float(np.median(sizes.max(axis=1))) if n else 1.0
+        bin_size = max(
+            bin_size, np.sqrt(np.prod(span) / (4 * max(n, 1))), max(span) / (4 * n + 1)
+        )
+        self.bin_size = float(bin_size) if bin_size > 0 else 1.0
+
+        bins = self._get_bins(self.boxes)
+        self.shape = tuple(bins[:, 2:].max(axis=0) + 1) if n else (0, 0)
+        nx, ny = self.shape
+        ni = bins[:, 2] - bins[:, 0] + 1
+        nj = bins[:, 3] - bins[:, 1] + 1
+        nbins = ni * nj
+        large = nbins > max_bins
+        self.large = np.flatnonzero(large)
+
+        small = np.flatnonzero(~large)
+        counts = nbins[small]
+        box_ids = np.repeat(small, counts)
+        k = np.arange(len(box_ids)) - np.repeat(np.cumsum(counts) - counts, counts)
+        nj = np.repeat(nj[small], counts)
+        i = np.repeat(bins[small, 0], counts) + k // nj
+        j = np.repeat(bins[small, 1], counts) + k % nj
+        cells = i * ny + j
+        order = np.argsort(cells, kind="stable")
+        self.bin_boxes = box_ids[order]
+        self.bin_starts = np.searchsorted(cells[order], np.arange(nx * ny + 1))
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def _get_bins(self, boxes: ndarray) -> ndarray:
+        points = boxes.reshape(-1, 2) - self.origin
+        return np.floor(points / self.bin_size).astype(int).reshape(-1, 4)
+
+    def query_indices(
+        self, xmin: float, ymin: float, xmax: float, ymax: float
+    ) -> ndarray:
+        """Returns the sorted indices of the boxes that overlap or touch a window."""
+        n = len(self.boxes)
+        if not n:
+            return np.zeros(0, dtype=int)
+        nx, ny = self.shape
+        i0, j0, i1, j1 = self._get_bins(np.array([xmin, ymin, xmax, ymax]))[0]
+        i0, j0 = max(i0, 0), max(j0, 0)
+        i1, j1 = min(i1, nx - 1), min(j1, ny - 1)
+
+        if i0 > i1 or j0 > j1:
+            indices = self.large
+        elif (i1 - i0 + 1) * (j1 - j0 + 1) > n:
+            indices = np.arange(n)
+        else:
+            rows = np.arange(i0, i1 + 1) * ny
+            starts = self.bin_starts[rows + j0]
+            stops = self.bin_starts[rows + j1 + 1]
+            chunks: List[ndarray] = [
+                self.bin_boxes[start:stop] for start, stop in zip(starts, stops)
+            ]
+            indices = np.unique(np.concatenate(chunks + [self.large]))
+
+        boxes = self.boxes[indices]
+        overlap = (
+            (boxes[:, 0] <= xmax)
+            & (boxes[:, 2] >= xmin)
+            & (boxes[:, 1] <= ymax)
+            & (boxes[:, 3] >= ymin)
+        )
+        return indices[overlap]
+
+    def query(self, xmin: float, ymin: float, xmax: float, ymax: float) -> ndarray:
+        """Returns the boxes that overlap or touch a window."""
+        return self.boxes[self.query_indices(xmin, ymin, xmax, ymax)]
+
+    def get_bbox(self) -> ndarray:
+        """Returns (xmin, ymin, xmax, ymax) of all the boxes."""
+        if not len(self.boxes):
+            return np.zeros(4)
+        return np.concatenate(
+            [self.boxes[:, :2].min(axis=0), self.boxes[:, 2:].max(axis=0)]
+        )
+
+
+def get_polygon_boxes(polygons: List[ndarray]) -> ndarray:
+    """Returns the (xmin, ymin, xmax, ymax) of each polygon."""
+    if not len(polygons):
+        return np.zeros((0, 4))
+    points = np.concatenate(polygons)
+    starts = np.cumsum([0] + [len(polygon) for polygon in polygons[:-1]])
+    return np.hstack(
+        [np.minimum.reduceat(points, starts), np.maximum.reduceat(points, starts)]
+    )
+
+
+def test_box_index() -> None:
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(0, 1000, (2000, 2))
+    sizes = rng.uniform(0, 20, (2000, 2))
+    sizes[:5] = 800
+    boxes = np.hstack([xy, xy + sizes])
+    index = BoxIndex(boxes)
+
+    for window in [(100, 100, 150, 120), (-10, -10, 2000, 2000), (5, 5, 5, 5)]:
+        xmin, ymin, xmax, ymax = window
+        expected = np.flatnonzero(
+            (boxes[:, 0] <= xmax)
+            & (boxes[:, 2] >= xmin)
+            & (boxes[:, 1] <= ymax)
+            & (boxes[:, 3] >= ymin)
+        )
+        assert np.array_equal(index.query_indices(*window), expected)
+
+
+if __name__ == "__main__":
+    test_box_index()
@@ -327,6 +327,7 @@ class Tech(BaseModel):
     fiber_input_to_output_spacing: float = 200.0
     layer_label: Layer = LAYER.LABEL
     metal_spacing: float = 10.0
+    snap_to_grid_nm: int = 1  # layout grid, the GDS database unit
 
 
 TECH = Tech()
@@ -1,5 +1,7 @@
+from typing import List
+
 import pytest
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 
 import gdsfactory as gf
 
@@ -21,6 +23,43 @@ def test_validator_error():
         _dummy2(length="error")
 
 
+@gf.cell
+def _dummy_points(points=((0, 0), (1, 1))) -> gf.Component:
+    c = gf.Component()
+    c.add_polygon(points)
+    return c
+
+
+def test_settings_snapshot_arguments():
+    """Changing a mutable argument after the call does not change the settings."""
+    points = [[0, 0], [1, 2], [2, 0]]
+    c = _dummy_points(points=points)
+    points[0][0] = 5
+    points.append([3, 3])
+    assert c.settings.full["points"] == [[0, 0], [1, 2], [2, 0]]
+    assert c.settings.changed["points"] == [[0, 0], [1, 2], [2, 0]]
+
+
+class _Options(BaseModel):
+    sizes: List[int] = [1, 2]
+
+
+@gf.cell
+def _dummy_options(length: int = 3, options: _Options = _Options()) -> gf.Component:
+    return gf.Component()
+
+
+def test_settings_default_not_shared():
+    """Changing the settings of a Component does not change the defaults of
+    the Components built later."""
+    c1 = _dummy_options(length=4)
+    c1.settings.default["options"]["sizes"].append(3)
+    c1.settings.full["options"]["sizes"].append(3)
+    c2 = _dummy_options(length=5)
+    assert c2.settings.default["options"] == {"sizes": [1, 2]}
+    assert c2.settings.full["options"] == {"sizes": [1, 2]}
+
+
 if __name__ == "__main__":
     # test_raise_error_args()
     test_validator_error()
@@ -0,0 +1,115 @@
+import gdsfactory as gf
+from gdsfactory import cache
+from gdsfactory.cache import ComponentCache, DiskCache
+from gdsfactory.cell import get_cache, set_cache, set_disk_cache
+
+
+def test_cache_bounded() -> None:
+    cache_default = get_cache()
+    component_cache = ComponentCache(max_entries=3)
+    set_cache(component_cache)
+
+    try:
+        for length in range(10):
+            gf.components.straight(length=length + 1)
+
+        info = component_cache.cache_info()
+        assert info.entries <= 3, info
+        assert info.evictions > 0, info
+        assert info.misses >= 10, info
+    finally:
+        set_cache(cache_default)
+
+
+def test_cache_pins_children() -> None:
+    cache_default = get_cache()
+    component_cache = ComponentCache(keep_alive=False)
+    set_cache(component_cache)
+
+    try:
+        c = gf.components.mzi()
+        component_cache.resize(max_entries=1)
+        assert c.name in component_cache
+        assert component_cache.evictions > 0
+        for reference in c.references:
+            assert reference.parent.name in component_cache
+            assert component_cache.is_pinned(reference.parent.name)
+    finally:
+        set_cache(cache_default)
+
+
+def test_cache_hit() -> None:
+    c1 = gf.components.straight(length=1.234)
+    hits = get_cache().hits
+    c2 = gf.components.straight(length=1.234)
+    assert c1 is c2
+    assert get_cache().hits == hits + 1
+
+
+def test_disk_cache(tmp_path) -> None:
+    cache_default = get_cache()
+    disk_cache = DiskCache(tmp_path)
+    set_disk_cache(disk_cache)
+
+    try:
+        set_cache(ComponentCache())
+        c1 = gf.components.mzi(delta_length=12.3)
+        assert list(tmp_path.glob("*.pkl"))
+
+        set_cache(ComponentCache())
+        c2 = gf.components.mzi(delta_length=12.3)
+        assert disk_cache.hits >= 1
+        assert c1 is not c2
+        assert c1.name == c2.name
+        assert c1.hash_geometry() == c2.hash_geometry()
+        assert list(c1.ports.keys()) == list(c2.ports.keys())
+        assert c1.settings.full == c2.settings.full
+        assert {r.parent.name for r in c1.references} == {
+            r.parent.name for r in c2.references
+        }
+    finally:
+        set_disk_cache(None)
+        set_cache(cache_default)
+
+
+def test_disk_cache_sources(tmp_path, monkeypatch) -> None:
+    """Hashing the sources does not build the lazy settings and a changed
+    helper module invalidates the stored cells."""
+    c1 = gf.components.mzi(delta_length=45.6)
+    cells = [c1] + list(c1.get_dependencies(recursive=True))
+    pending = [c for c in cells if c._settings_factory is not None]
+    assert pending
+    sources = cache._get_sources(c1)
+    assert "gdsfactory.components.mzi.mzi" in sources
+    assert all(c._settings_factory is not None for c in pending)
+
+    cache_default = get_cache()
+    disk_cache = DiskCache(tmp_path)
+    set_disk_cache(disk_cache)
+    try:
+        set_cache(ComponentCache())
+        c1 = gf.components.mzi(delta_length=45.6)
+        set_cache(ComponentCache())
+        assert disk_cache.load(c1.name) is not None
+
+        monkeypatch.setitem(cache._module_hashes, "gdsfactory.path", "changed")
+        set_cache(ComponentCache())
+        assert disk_cache.load(c1.name) is None
+    finally:
+        set_disk_cache(None)
+        set_cache(cache_default)
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    import pytest
+
+    test_cache_bounded()
+    test_cache_pins_children()
+    test_cache_hit()
+    with tempfile.TemporaryDirectory() as dirpath:
+        test_disk_cache(pathlib.Path(dirpath))
+    with tempfile.TemporaryDirectory() as dirpath, pytest.MonkeyPatch.context() as mp:
+        test_disk_cache_sources(pathlib.Path(dirpath), mp)
@@ -1,3 +1,5 @@
+import gdspy
+import numpy as np
 import pytest
 from pytest_regressions.data_regression import DataRegressionFixture
 
@@ -245,6 +247,69 @@ def test_facing_ports(
     return c
 
 
+@pytest.mark.parametrize("layers_cladding", [None, ((111, 0),)])
+def test_get_bundle_batched(layers_cladding) -> None:
+    """Batched routes have the same geometry, lengths and ports."""
+    xs_top = [-100, -90, -80, 0, 10, 20, 40, 50, 80, 90, 100, 105, 110, 115]
+    xs_bottom = [-700, -500, -80, -60, -40, 10, 30, 50, 70, 90, 110, 300, 400, 500]
+    top_ports = [Port(f"top_{i}", (x, 0), 0.5, 270) for i, x in enumerate(xs_top)]
+    bot_ports = [Port(f"bot_{i}", (x, -400), 0.5, 90) for i, x in enumerate(xs_bottom)]
+
+    components = []
+    for batched in [False, True]:
+        routes = get_bundle(
+            [p.copy() for p in top_ports],
+            [p.copy() for p in bot_ports],
+            layers_cladding=layers_cladding,
+            batched=batched,
+        )
+        c = gf.Component(f"test_get_bundle_batched_{batched}")
+        for route in routes:
+            c.add(route.references)
+        components.append((c, routes))
+
+    (c1, routes1), (c2, routes2) = components
+    # the bend is shared and the straights of each route are merged
+    assert len(c2.get_dependencies()) < len(c1.get_dependencies())
+
+    c1, c2 = c1.flatten(), c2.flatten()
+    assert c1.layers == c2.layers
+    for layer in c1.layers:
+        xor = gdspy.boolean(
+            c1.get_polygons(by_spec=layer), c2.get_polygons(by_spec=layer), "xor"
+        )
+        assert xor is None or xor.area() < 1e-6, layer
+
+    for route1, route2 in zip(routes1, routes2):
+        assert route1.length == route2.length
+        for port1, port2 in zip(route1.ports, route2.ports):
+            assert np.allclose(port1.midpoint, port2.midpoint)
+            assert port1.orientation == port2.orientation
+
+
+def test_get_bundle_batched_cached(tmp_path) -> None:
+    """Identical batched routes share the cell with their straights."""
+    top_ports = [Port(f"top_{i}", (10 * i, 0), 0.5, 270) for i in range(4)]
+    bot_ports = [Port(f"bot_{i}", (20 * i, -100), 0.5, 90) for i in range(4)]
+
+    c = gf.Component("test_get_bundle_batched_cached")
+    straights = []
+    for _ in range(2):
+        routes = get_bundle(
+            [p.copy() for p in top_ports],
+            [p.copy() for p in bot_ports],
+            batched=True,
+        )
+        straights.append([route.references[-1].parent for route in routes])
+        for route in routes:
+            c.add(route.references)
+
+    for straight1, straight2 in zip(*straights):
+        assert straight1 is straight2
+        assert straight1.name.startswith("route_straights")
+    c.write_gds(tmp_path / "bundle.gds", on_duplicate_cell="error")
+
+
 if __name__ == "__main__":
 
     # c = test_get_bundle(None, check=False)
@@ -0,0 +1,21 @@
+import gdsfactory as gf
+
+
+def test_get_netlist_chain() -> None:
+    """Each straight of a chain connects to its neighbours."""
+    c = gf.Component("straight_chain")
+    straight = gf.components.straight(length=10)
+    n = 5
+    for i in range(n):
+        ref = c.add_ref(straight)
+        ref.movex(i * 10)
+
+    netlist = c.get_netlist()
+    assert len(netlist.instances) == n
+    assert len(netlist.connections) == n - 1
+    for src, dst in netlist.connections.items():
+        assert {src.split(",")[1], dst.split(",")[1]} == {"o1", "o2"}
+
+
+if __name__ == "__main__":
+    test_get_netlist_chain()
@@ -0,0 +1,138 @@
+import asyncio
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+from gdsfactory.simulation.get_results_batch import (
+    SimulationBackend,
+    SimulationJob,
+    get_results_async,
+    get_results_batch,
+    get_results_jobs,
+)
+
+
+class LocalBackend(SimulationBackend):
+    """Stand-in server that runs each simulation {"value": x, "delay": s}
+    by sleeping delay seconds and returning 2 * value."""
+
+    def __init__(self, tasks: Dict[str, str] = None) -> None:
+        self.tasks = dict(tasks or {})
+        self.results: Dict[str, int] = {}
+        self.sims: Dict[str, dict] = {}
+        self.get_tasks_calls = 0
+        self.submitted = []
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def get_tasks(self) -> Dict[str, str]:
+        self.get_tasks_calls += 1
+        return dict(self.tasks)
+
+    def submit(self, sim, task_name: str) -> str:
+        with self.lock:
+            task_id = f"task{len(self.tasks)}"
+            self.tasks[task_name] = task_id
+            self.sims[task_id] = sim
+            self.submitted.append(task_name)
+        return task_id
+
+    def monitor(self, task_id: str) -> None:
+        if task_id in self.results:
+            return
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        sim = self.sims[task_id]
+        time.sleep(sim["delay"])
+        with self.lock:
+            self.running -= 1
+            self.results[task_id] = 2 * sim["value"]
+
+    def load(self, task_id: str, path: Path) -> int:
+        path.write_text(json.dumps(self.results[task_id]))
+        return self.results[task_id]
+
+    def load_file(self, path: Path) -> int:
+        return json.loads(path.read_text())
+
+
+def test_backend_incomplete() -> None:
+    """A backend that misses methods fails when it is created."""
+
+    class IncompleteBackend(SimulationBackend):
+        def get_tasks(self) -> Dict[str, str]:
+            return {}
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
+
+
+def test_get_results_batch(tmp_path: Path) -> None:
+    sims = [dict(value=i, delay=0.02 * (i % 4)) for i in range(8)]
+    backend = LocalBackend()
+    results = get_results_batch(sims + sims[:2], backend, tmp_path, max_concurrency=3)
+
+    assert results == [2 * i for i in range(8)] + [0, 2]
+    assert backend.get_tasks_calls == 1
+    assert len(backend.submitted) == 8
+    assert backend.max_running <= 3
+
+    # results found locally are not submitted again
+    backend = LocalBackend()
+    assert get_results_batch(sims, backend, tmp_path) == results[:8]
+    assert not backend.submitted
+    assert backend.get_tasks_calls == 0
+
+
+def test_get_results_server(tmp_path: Path) -> None:
+    sims = [dict(value=1, delay=0), dict(value=2, delay=0)]
+    backend = LocalBackend()
+    sim_hash = backend.get_hash(sims[0])
+    backend.tasks = {sim_hash: "done"}
+    backend.results = {"done": 10}
+    assert get_results_batch(sims, backend, tmp_path) == [10, 4]
+    assert backend.submitted == [backend.get_hash(sims[1])]
+
+
+def test_get_results_async_as_completed(tmp_path: Path) -> None:
+    sims = [dict(value=i, delay=0.1 * (3 - i)) for i in range(3)]
+
+    async def collect():
+        return [
+            index
+            async for index, _ in get_results_async(sims, LocalBackend(), tmp_path)
+        ]
+
+    assert asyncio.run(collect()) == [2, 1, 0]
+
+
+def test_get_results_batch_running_loop(tmp_path: Path) -> None:
+    """Works inside a running event loop, as in jupyter notebooks."""
+    sims = [dict(value=i, delay=0) for i in range(3)]
+
+    async def main():
+        return get_results_batch(sims, LocalBackend(), tmp_path)
+
+    assert asyncio.run(main()) == [0, 2, 4]
+
+
+def test_get_results_jobs(tmp_path: Path) -> None:
+    backend = LocalBackend()
+    sims = [dict(value=i, delay=0.01 * i) for i in range(6)]
+    jobs = [
+        SimulationJob(sims=sims[:3], get_result=sum),
+        SimulationJob(sims=[], get_result=lambda results: "cached"),
+        SimulationJob(sims=sims[2:], get_result=sum),
+    ]
+    results = get_results_jobs(jobs, backend, tmp_path, max_concurrency=2)
+
+    assert results == [0 + 2 + 4, "cached", 4 + 6 + 8 + 10]
+    assert backend.get_tasks_calls == 1
+    assert len(backend.submitted) == 6
+    assert backend.max_running <= 2
@@ -39,6 +39,37 @@ def test_import_ports() -> gf.Component:
     return c1
 
 
+def test_import_gds_cellname_index() -> None:
+    """Importing a subcell with the index only parses its subtree."""
+    c0 = gf.components.mzi_arms()
+    gdspath = c0.write_gds()
+    cellname = c0.references[0].parent.name
+
+    c1 = import_gds(gdspath, cellname=cellname, use_index=True)
+    c2 = import_gds(gdspath, cellname=cellname, use_index=False)
+    assert c1.hash_geometry() == c2.hash_geometry()
+    assert len(c1.get_dependencies(recursive=True)) == len(
+        c2.get_dependencies(recursive=True)
+    )
+
+
+def test_import_gds_cache() -> None:
+    """Importing a file that changed on disk returns the new cells."""
+    from gdsfactory.component import tmp
+
+    gdspath = tmp / "import_gds_cache.gds"
+    c0 = gf.components.straight(length=1)
+    c0.write_gds(gdspath)
+    c1 = import_gds(gdspath)
+    assert import_gds(gdspath) is c1
+
+    c0 = gf.components.straight(length=2)
+    c0.write_gds(gdspath)
+    c2 = import_gds(gdspath)
+    assert c2 is not c1
+    assert c2.hash_geometry() == c0.hash_geometry()
+
+
 # def test_import_gds_add_padding() -> gf.Component:
 #     """Make sure you can import the ports"""
 #     c0 = gf.components.mzi_arms(decorator=gf.add_pins)
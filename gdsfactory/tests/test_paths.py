@@ -170,6 +170,39 @@ def test_copy():
     assert x2
 
 
+def get_max_distance(points: np.ndarray, curve: np.ndarray) -> float:
+    """Returns the max distance from the points of a curve to a polyline."""
+    a, d = points[:-1], np.diff(points, axis=0)
+    t = ((curve[:, None] - a) * d).sum(axis=-1) / (d ** 2).sum(axis=-1)
+    projection = a + np.clip(t, 0, 1)[..., None] * d
+    return np.linalg.norm(curve[:, None] - projection, axis=-1).min(axis=1).max()
+
+
+@pytest.mark.parametrize("radius,angle", [(1, 90), (10, -45), (100, 180)])
+def test_path_npoints_max_error(radius: float, angle: float) -> None:
+    """npoints=None keeps the curves within half a grid step with fewer points."""
+    max_error = gf.path.get_max_error_nm() * 1e-3
+    for function, kwargs in [
+        (gf.path.arc, {}),
+        (gf.path.euler, {}),
+        (gf.path.euler, dict(p=1, use_eff=True)),
+    ]:
+        P = function(radius=radius, angle=angle, npoints=None, **kwargs)
+        fine = function(radius=radius, angle=angle, npoints=14400, **kwargs)
+        assert get_max_distance(P.points, fine.points) <= max_error
+        assert np.allclose(P.points[-1], fine.points[-1])
+        if radius <= 10:
+            assert len(P.points) < len(function(radius, angle, **kwargs).points)
+
+
+def test_path_npoints_grid(monkeypatch) -> None:
+    """A coarser layout grid allows a larger error with fewer points."""
+    npoints = len(gf.path.arc(radius=10, npoints=None).points)
+    monkeypatch.setattr(gf.TECH, "snap_to_grid_nm", 5)
+    assert gf.path.get_max_error_nm() == 2.5
+    assert len(gf.path.arc(radius=10, npoints=None).points) < npoints
+
+
 if __name__ == "__main__":
     c = transition()
     # c = test_path()
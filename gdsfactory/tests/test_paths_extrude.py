@@ -1,4 +1,7 @@
+import numpy as np
+
 import gdsfactory as gf
+from gdsfactory.path import _centerpoint_offset_curves
 from gdsfactory.tech import LAYER
 
 
@@ -22,6 +25,63 @@ def test_path_extrude_multiple_ports() -> gf.Component:
     return c
 
 
+def test_centerpoint_offset_curves() -> None:
+    """Batched offset curves are the same as phidl offset curves."""
+    P = gf.path.euler(radius=10, angle=90)
+    P.append(gf.path.arc(radius=5, angle=-180))
+    distances = [-2.5, 0.25, np.linspace(0.5, 1.5, len(P.points))]
+    curves = _centerpoint_offset_curves(
+        P.points,
+        offset_distances=np.broadcast_arrays(*distances),
+        start_angle=P.start_angle,
+        end_angle=P.end_angle,
+    )
+    for distance, curve in zip(distances, curves):
+        expected = P._centerpoint_offset_curve(
+            P.points, distance, start_angle=P.start_angle, end_angle=P.end_angle
+        )
+        assert np.array_equal(curve, expected)
+
+
+def test_path_extrude_sections() -> None:
+    """Each section of a multi-section cross_section follows the path."""
+    X = gf.cross_section.pn()
+    P = gf.path.euler(radius=10, angle=90)
+    c = gf.path.extrude(P, X)
+    polygons = c.get_polygons(by_spec=True)
+    for section in X.sections:
+        offset, width = section["offset"], section["width"]
+        points1, points2 = [
+            P._centerpoint_offset_curve(
+                P.points, d, start_angle=P.start_angle, end_angle=P.end_angle
+            )
+            for d in [offset + width / 2, offset - width / 2]
+        ]
+        points = np.concatenate([points1, points2[::-1]])
+        layer = section["layer"]
+        assert any(
+            p.shape == points.shape and np.allclose(p, points, atol=1e-6)
+            for p in polygons[layer]
+        ), layer
+
+
+def test_path_extrude_cache() -> None:
+    """Identical extrusions return the same Component."""
+    X1 = gf.cross_section.strip(width=0.5)
+    X2 = gf.cross_section.strip(width=1.0)
+    c1 = gf.path.extrude(gf.path.euler(), gf.path.transition(X1, X2))
+    c2 = gf.path.extrude(gf.path.euler(), gf.path.transition(X1, X2))
+    c3 = gf.path.extrude(gf.path.euler(), gf.path.transition(X1, X1.copy()))
+    c4 = gf.path.extrude(gf.path.euler(), gf.path.transition(X2, X1))
+    assert c1 is c2
+    assert c1 is not c3
+    assert c1 is not c4
+
+    c5 = gf.path.extrude(gf.path.euler(), X1, simplify=1e-3)
+    assert c5 is not gf.path.extrude(gf.path.euler(), X1)
+    assert c5 is gf.path.extrude(gf.path.euler(), X1, simplify=1e-3)
+
+
 if __name__ == "__main__":
     c = test_path_extrude_multiple_ports()
     c.show()
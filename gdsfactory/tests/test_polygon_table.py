@@ -0,0 +1,133 @@
+"""Cached flattened polygons and bounding boxes against the gdspy hierarchy walk.
+
+depth=10**6 flattens all the levels without the cache.
+"""
+import numpy as np
+
+import gdsfactory as gf
+from gdsfactory.component import Component
+
+depth = 10**6
+
+
+def get_component() -> Component:
+    c = gf.Component()
+    for i, angle in enumerate([0, 30, 90, 137.5, 180, 270]):
+        ref = c << gf.components.mmi1x2()
+        ref.rotate(angle)
+        ref.move((i * 50, 3.3 * i))
+        if i % 2:
+            ref.reflect()
+    ref = c << gf.components.ring()
+    ref.magnification = 2.0
+    array = c.add_array(gf.components.ring(), columns=3, rows=2, spacing=(30, 40))
+    array.rotation = 30
+    array.origin = (5, 7)
+
+    top = gf.Component()
+    for angle in [0, 45, 90]:
+        ref = top << c
+        ref.rotate(angle)
+        ref.move((1000, angle))
+    return top
+
+
+def assert_same_polygons(polygons1, polygons2) -> None:
+    if isinstance(polygons1, dict):
+        assert list(polygons1) == list(polygons2)
+        for layer in polygons1:
+            assert_same_polygons(polygons1[layer], polygons2[layer])
+        return
+    assert len(polygons1) == len(polygons2)
+    for polygon1, polygon2 in zip(polygons1, polygons2):
+        assert np.array_equal(polygon1, polygon2)
+
+
+def test_get_polygons() -> None:
+    c = get_component()
+    for by_spec in [False, True, gf.LAYER.WG]:
+        assert_same_polygons(
+            c.get_polygons(by_spec=by_spec), c.get_polygons(by_spec, depth=depth)
+        )
+    ref = c.references[1]
+    assert_same_polygons(ref.get_polygons(True), ref.get_polygons(True, depth=depth))
+
+
+def test_bbox() -> None:
+    c = get_component()
+    points = np.concatenate(c.get_polygons(depth=depth))
+    assert np.allclose(c.bbox, [points.min(axis=0), points.max(axis=0)], atol=1e-3)
+
+
+def test_bbox_invalidation() -> None:
+    """Moving a reference updates the bbox of an unlocked Component."""
+    c = gf.Component()
+    ref = c << gf.components.straight(length=10)
+    assert c.xmax == 10
+    ref.xmin = 20
+    assert c.xmax == 30
+    c.add_polygon([(0, 0), (50, 0), (50, 1)], layer=gf.LAYER.WG)
+    assert c.xmax == 50
+
+
+def test_locked_parent_invalidation() -> None:
+    """Changing an unlocked child updates the geometry of a locked parent,
+    also through locked children."""
+    child = gf.Component()
+    child.add_polygon([(0, 0), (10, 0), (10, 1)], layer=gf.LAYER.WG)
+    middle = gf.Component()
+    middle << child
+    middle.lock()
+    top = gf.Component()
+    top << middle
+    top.lock()
+    assert top.xmax == middle.xmax == 10
+    hash1 = top.get_geometry_hash()
+    table1 = top.get_polygon_table()
+
+    child.add_polygon([(0, 0), (30, 0), (30, 1)], layer=gf.LAYER.WG)
+    assert top.xmax == middle.xmax == 30
+    assert len(top.get_polygons()) == len(middle.get_polygons()) == 2
+    assert top.get_geometry_hash() != hash1
+    assert top.get_polygon_table() is not table1
+
+
+def test_locked_parent_unlocked_child() -> None:
+    """Unlocking and changing a child that was locked when the locked
+    parent was first queried updates the parent."""
+    child = gf.Component()
+    child.add_polygon([(0, 0), (10, 0), (10, 1)], layer=gf.LAYER.WG)
+    child.lock()
+    top = gf.Component()
+    top << child
+    top.lock()
+    assert top.xmax == 10
+    hash1 = top.get_geometry_hash()
+
+    child.unlock()
+    child.add_polygon([(0, 0), (30, 0), (30, 1)], layer=gf.LAYER.WG)
+    assert top.xmax == 30
+    assert len(top.get_polygons()) == 2
+    assert top.get_geometry_hash() != hash1
+
+
+def test_remove_layers_invalidation() -> None:
+    c = gf.components.mzi()
+    polygons = c.get_polygons(by_spec=True)
+    assert gf.LAYER.WG in polygons
+    c.remove_layers([gf.LAYER.WG])
+    assert gf.LAYER.WG not in c.get_polygons(by_spec=True)
+    gf.clear_cache()
+
+
+def test_geometry_hash() -> None:
+    """The hash only depends on the flattened polygons and the ports."""
+    c = get_component()
+    flat = c.flatten()
+    assert flat.get_geometry_hash() == c.get_geometry_hash()
+
+    moved = gf.Component()
+    ref = moved << c
+    assert moved.get_geometry_hash() == c.get_geometry_hash()
+    ref.movex(1e-3)
+    assert moved.get_geometry_hash() != c.get_geometry_hash()
@@ -0,0 +1,79 @@
+import copy
+
+import numpy as np
+import pytest
+
+import gdsfactory as gf
+
+
+@pytest.mark.parametrize("x_reflection", [False, True])
+@pytest.mark.parametrize("rotation", [0, 90, 180, 270, 33])
+def test_reference_ports(rotation: float, x_reflection: bool) -> None:
+    """Reference ports transformed at once match the ports transformed one by one."""
+    c = gf.components.pad_array(columns=8, rows=2)
+    ref = gf.Component("top").add_ref(c)
+    if x_reflection:
+        ref.reflect((1, 0))
+    ref.rotate(rotation)
+    ref.move((10.5, -3))
+
+    for name, port in c.ports.items():
+        midpoint, orientation = ref._transform_port(
+            port.midpoint, port.orientation, ref.origin, ref.rotation, ref.x_reflection
+        )
+        assert np.array_equal(ref.ports[name].midpoint, midpoint)
+        assert ref.ports[name].orientation == orientation
+        assert ref.ports[name].parent is ref
+
+    table = ref.get_port_table()
+    assert table.names == tuple(ref.ports.keys())
+    assert np.array_equal(table.widths, [port.width for port in c.ports.values()])
+
+
+def test_reference_ports_move() -> None:
+    """Reference ports are transformed again only when the reference moves."""
+    c = gf.components.straight()
+    ref = gf.Component("top").add_ref(c)
+    port = ref.ports["o2"]
+    assert ref.ports["o2"] is port
+    assert ref.get_port_table() is ref.get_port_table()
+
+    ref.movex(5)
+    assert ref.ports["o2"] is port
+    assert np.allclose(port.midpoint, (15, 0))
+
+    ref.rotate(90)
+    assert np.allclose(ref.ports["o2"].midpoint, (0, 15))
+    assert ref.ports["o2"].orientation == 90
+
+
+def test_reference_ports_edit() -> None:
+    """ports is a plain dict that is moved back to the reference transform
+    on every access."""
+    c = gf.components.straight()
+    ref = gf.Component("top").add_ref(c)
+    ports = ref.ports
+    assert isinstance(ports, dict)
+    assert copy.deepcopy(ports).keys() == ports.keys()
+    assert list(gf.port.get_ports_facing(ports, "E")) == [ports["o2"]]
+
+    ref.ports["o2"].move((5, 0))
+    assert np.allclose(ref.ports["o2"].midpoint, (10, 0))
+
+    ref.movex(1)
+    assert np.allclose(ref.ports["o2"].midpoint, (11, 0))
+
+
+def test_component_port_table() -> None:
+    """Locked components reuse their port table until ports change."""
+    c = gf.components.straight()
+    assert c.get_port_table() is c.get_port_table()
+
+    c2 = gf.Component()
+    c2.add_port("o1", midpoint=(0, 0), width=0.5, orientation=180)
+    ref = gf.Component("top").add_ref(c2)
+    assert list(ref.ports) == ["o1"]
+    c2.add_port("o2", midpoint=(10, 0), width=0.5, orientation=0)
+    assert list(ref.ports) == ["o1", "o2"]
+    c2.ports.pop("o1")
+    assert list(ref.ports) == ["o2"]
@@ -0,0 +1,97 @@
+"""round_corners on random manhattan routes."""
+import numpy as np
+import pytest
+from pytest_regressions.data_regression import DataRegressionFixture
+
+import gdsfactory as gf
+from gdsfactory.routing.manhattan import RouteWarning, round_corners
+from gdsfactory.types import Route
+
+settings = {
+    "strip": {},
+    "mirror_straight": dict(mirror_straight=True),
+    "auto_widen": dict(cross_section=gf.cross_section.strip_auto_widen),
+    "wire": dict(
+        bend=gf.components.wire_corner, cross_section=gf.cross_section.metal3
+    ),
+}
+
+
+def get_random_points(
+    n: int = 30, seed: int = 0, min_length: float = 25, max_length: float = 400
+) -> np.ndarray:
+    """Returns a random manhattan route with n corners."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.uniform(min_length, max_length, n + 1) * rng.choice([-1, 1], n + 1)
+    steps = np.zeros((n + 1, 2))
+    steps[::2, 0] = lengths[::2]
+    steps[1::2, 1] = lengths[1::2]
+    return np.concatenate([[[0, 0]], np.cumsum(steps, axis=0)])
+
+
+def route_to_dict(route: Route) -> dict:
+    def round_value(value: float) -> float:
+        return float(np.round(value, 3)) + 0.0
+
+    return dict(
+        length=route.length,
+        ports=[
+            [round_value(port.x), round_value(port.y), round_value(port.orientation)]
+            for port in route.ports
+        ],
+        references=[
+            [
+                ref.parent.name,
+                round_value(ref.origin[0]),
+                round_value(ref.origin[1]),
+                round_value(ref.rotation % 360),
+                bool(ref.x_reflection),
+            ]
+            for ref in route.references
+        ],
+    )
+
+
+def check_route(route: Route, points: np.ndarray) -> None:
+    """Checks the route ends, that each reference connects to the next ones
+    and that there is one bend per corner."""
+    ends = [port.midpoint for port in route.ports]
+    assert np.allclose(ends, points[[0, -1]], atol=1e-3)
+
+    midpoints = [
+        tuple(np.round(port.midpoint, 3) + 0.0)
+        for ref in route.references
+        for port in ref.ports.values()
+    ]
+    unique, counts = np.unique(midpoints, axis=0, return_counts=True)
+    unconnected = unique[counts == 1]
+    assert np.allclose(sorted(map(tuple, unconnected)), sorted(map(tuple, ends)))
+    assert np.all(counts <= 2)
+
+    bends = [
+        ref
+        for ref in route.references
+        if len({round(port.orientation) % 180 for port in ref.ports.values()}) == 2
+    ]
+    assert len(bends) == len(points) - 2
+    assert route.length > 0
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("name", settings.keys())
+def test_round_corners(
+    name: str, seed: int, data_regression: DataRegressionFixture
+) -> None:
+    """The regression data was recorded with the loop implementation
+    (benchmarks/round_corners_loop.py) that the vectorized one replaced."""
+    points = get_random_points(seed=seed)
+    route = round_corners(points, **settings[name])
+    check_route(route, points)
+    data_regression.check(route_to_dict(route))
+
+
+def test_round_corners_error() -> None:
+    """Segments shorter than the bends warn and return the error route."""
+    points = get_random_points(seed=0, min_length=1, max_length=15)
+    with pytest.warns(RouteWarning):
+        round_corners(points)
@@ -0,0 +1,78 @@
+"""Work-queue scheduler with python commands as simulations."""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from gdsfactory.simulation.run_jobs import Job, run_jobs
+
+
+def python(code: str):
+    return [sys.executable, "-c", code]
+
+
+def sleep(seconds: float):
+    """Command that logs its start and end times."""
+    return python(
+        f"import time; print(time.time()); time.sleep({seconds}); print(time.time())"
+    )
+
+
+def test_run_jobs_starts_when_cores_free_up(tmp_path: Path) -> None:
+    """A slow job does not wait for a batch, the short jobs share the other core."""
+    jobs = [Job(name="slow", command=sleep(1.5))] + [
+        Job(name=f"fast{i}", command=sleep(0.1)) for i in range(4)
+    ]
+    results = run_jobs(jobs, total_cores=2, log_dir=tmp_path, progress=False)
+    assert [result.job.name for result in results] == [job.name for job in jobs]
+    assert all(result.ok and result.attempts == 1 for result in results)
+
+    times = [list(map(float, result.logpath.read_text().split())) for result in results]
+    (_, slow_end), fast = times[0], times[1:]
+    # each fast job starts after the previous one, on the core left by the slow job
+    for (_, end), (start, _) in zip(fast[:-1], fast[1:]):
+        assert end <= start
+    # and all of them start while the slow job is still running
+    assert all(start < slow_end for start, _ in fast)
+
+
+def test_run_jobs_failures(tmp_path: Path) -> None:
+    filepath = tmp_path / "never_written.csv"
+    jobs = [
+        Job(name="exit", command=python("import sys; print('boom'); sys.exit(3)")),
+        Job(name="timeout", command=python("import time; time.sleep(30)"), timeout=0.3),
+        Job(name="no_file", command=python("pass"), filepath=filepath),
+    ]
+    t0 = time.perf_counter()
+    results = run_jobs(jobs, total_cores=3, retries=1, log_dir=tmp_path, progress=False)
+    assert time.perf_counter() - t0 < 10
+    assert [result.attempts for result in results] == [2, 2, 2]
+    assert [result.returncode for result in results] == [3, None, 0]
+    assert not any(result.ok for result in results)
+    assert "boom" in results[0].error
+    assert "timed out" in results[1].error
+
+
+def test_run_jobs_retry(tmp_path: Path) -> None:
+    """The job fails on the first run and writes its file on the second one."""
+    counter = tmp_path / "counter"
+    filepath = tmp_path / "result.csv"
+    code = (
+        "import pathlib, sys\n"
+        f"counter = pathlib.Path({str(counter)!r})\n"
+        "n = int(counter.read_text()) if counter.exists() else 0\n"
+        "counter.write_text(str(n + 1))\n"
+        "sys.exit(1) if n == 0 else "
+        f"pathlib.Path({str(filepath)!r}).write_text('ok')\n"
+    )
+    job = Job(name="flaky", command=python(code), filepath=filepath)
+    (result,) = run_jobs([job], retries=2, log_dir=tmp_path, progress=False)
+    assert result.ok
+    assert result.attempts == 2
+    assert filepath.read_text() == "ok"
+
+
+def test_run_jobs_too_many_cores(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        run_jobs([Job(name="big", command=python("pass"), cores=8)], total_cores=4)
@@ -0,0 +1,66 @@
+"""Component region queries against a brute force search."""
+import numpy as np
+
+import gdsfactory as gf
+from gdsfactory.component import Component
+
+bbox = ((300, 300), (700, 600))
+
+
+def get_component(n: int = 200, seed: int = 0) -> Component:
+    c = gf.Component()
+    rng = np.random.default_rng(seed)
+    for i in range(n):
+        ref = c << (gf.components.straight() if i % 2 else gf.components.bend_euler())
+        ref.rotate(90 * (i % 4))
+        ref.move(tuple(rng.uniform(0, 1000, 2)))
+    return c
+
+
+def overlaps(box: np.ndarray) -> bool:
+    (xmin, ymin), (xmax, ymax) = bbox
+    (x0, y0), (x1, y1) = box
+    return x0 <= xmax and x1 >= xmin and y0 <= ymax and y1 >= ymin
+
+
+def test_get_references_in_bbox() -> None:
+    c = get_component()
+    expected = [ref for ref in c.references if overlaps(ref.get_bounding_box())]
+    assert c.get_references_in_bbox(bbox) == expected
+
+
+def test_get_polygons_in_bbox() -> None:
+    c = get_component()
+    polygons = c.get_polygons_in_bbox(bbox, layers=[gf.LAYER.WG], by_spec=True)
+    expected = [
+        polygon
+        for polygon in c.get_polygons(by_spec=gf.LAYER.WG)
+        if overlaps([polygon.min(axis=0), polygon.max(axis=0)])
+    ]
+    assert list(polygons) == [gf.LAYER.WG]
+    assert len(polygons[gf.LAYER.WG]) == len(expected)
+    for polygon1, polygon2 in zip(polygons[gf.LAYER.WG], expected):
+        assert np.array_equal(polygon1, polygon2)
+
+
+def test_spatial_index_invalidation() -> None:
+    """The index follows references that move and polygons that are added."""
+    c = get_component()
+    ref = c.references[0]
+    ref.move(origin=ref.center, destination=(500, 500))
+    assert ref in c.get_references_in_bbox(bbox)
+
+    ref.move(origin=ref.center, destination=(-500, -500))
+    assert ref not in c.get_references_in_bbox(bbox)
+
+    n = len(c.get_polygons_in_bbox(bbox))
+    c.add_polygon([(400, 400), (410, 400), (410, 410)], layer=gf.LAYER.M1)
+    assert len(c.get_polygons_in_bbox(bbox)) == n + 1
+    assert len(c.get_polygons_in_bbox(bbox, layers=[gf.LAYER.M1])) == 1
+
+
+def test_get_nearest_port() -> None:
+    c = gf.components.mmi1x2()
+    for port in c.get_ports_list():
+        assert c.get_nearest_port(port.midpoint + 0.1) is port
+    assert c.get_nearest_port((0, 0), port_type="electrical") is None
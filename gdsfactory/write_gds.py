@@ -0,0 +1,436 @@
+"""Stream a Component hierarchy into a GDS file.
+
+Cells are written top cell first, each cell before the cells it references,
+so the writer never needs the list of all cells of the design in memory.
+When different cells share a name, the last one found is written.
+
+With max_workers > 1 the cell records are serialized in a thread or process pool,
+in batches, and written in the same order,
+so the file is byte identical to the one written with a single worker.
+"""
+import datetime
+import io
+import itertools
+import os
+import pathlib
+import struct
+import tempfile
+import warnings
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Set
+
+import gdspy
+
+from gdsfactory.types import PathType
+
+ENDLIB = struct.pack(">2H", 4, 0x0400)
+valid_on_duplicate_cell = {None, "warn", "error", "overwrite"}
+
+
+class WriteStats(NamedTuple):
+    cells: int
+    cell_names_duplicated: Set[str]
+    cell_names_unnamed: Set[str]
+
+
+def get_children(cell: gdspy.Cell) -> List[gdspy.Cell]:
+    """Returns the unique cells referenced by a cell, in reference order."""
+    children = []
+    ids = set()
+    for reference in cell.references:
+        child = reference.ref_cell
+        if isinstance(child, gdspy.Cell) and id(child) not in ids:
+            ids.add(id(child))
+            children.append(child)
+    return children
+
+
+def get_cells_depth_first(cell: gdspy.Cell) -> Iterator[gdspy.Cell]:
+    """Yields every cell of a hierarchy once, after all the cells it references.
+
+    The order only depends on the order of the references,
+    so the same hierarchy always produces the same GDS file.
+    """
+    visited = {id(cell)}
+    stack = [(cell, iter(get_children(cell)))]
+    while stack:
+        parent, children = stack[-1]
+        for child in children:
+            if id(child) not in visited:
+                visited.add(id(child))
+                stack.append((child, iter(get_children(child))))
+                break
+        else:
+            stack.pop()
+            yield parent
+
+
+def get_cells_top_first(cell: gdspy.Cell) -> Iterator[gdspy.Cell]:
+    """Yields every cell of a hierarchy once, before the cells it references.
+
+    The order only depends on the order of the references,
+    so the same hierarchy always produces the same GDS file.
+    """
+    visited = {id(cell)}
+    stack = [cell]
+    while stack:
+        parent = stack.pop()
+        yield parent
+        children = [c for c in get_children(parent) if id(c) not in visited]
+        visited.update(id(c) for c in children)
+        stack.extend(reversed(children))
+
+
+def get_cells_duplicated(cell: gdspy.Cell) -> Dict[str, gdspy.Cell]:
+    """Returns the cell to keep for each name shared by different cells
+    in the hierarchy of a cell.
+
+    The last cell found top first is kept, and the top cell keeps its own name.
+    """
+    cell_names = set()
+    cells_duplicated = {}
+    for c in get_cells_top_first(cell):
+        if c.name in cell_names:
+            cells_duplicated[c.name] = c
+        cell_names.add(c.name)
+    if cell.name in cells_duplicated:
+        cells_duplicated[cell.name] = cell
+    return cells_duplicated
+
+
+def get_polygonset_shallow(polygonset: gdspy.PolygonSet) -> gdspy.PolygonSet:
+    """Returns a copy of a polygon set without references to its owner Component."""
+    polygonset_shallow = gdspy.PolygonSet.__new__(gdspy.PolygonSet)
+    polygonset_shallow.polygons = polygonset.polygons
+    polygonset_shallow.layers = polygonset.layers
+    polygonset_shallow.datatypes = polygonset.datatypes
+    polygonset_shallow.properties = getattr(polygonset, "properties", {})
+    return polygonset_shallow
+
+
+def get_cell_shallow(cell: gdspy.Cell) -> gdspy.Cell:
+    """Returns a copy of a cell where references point to cell names.
+
+    Cheap to pickle, as it does not carry the referenced cells with it.
+    """
+    cell_shallow = gdspy.Cell(cell.name, exclude_from_current=True)
+    cell_shallow.polygons = [get_polygonset_shallow(p) for p in cell.polygons]
+    cell_shallow.paths = cell.paths
+    cell_shallow.labels = cell.labels
+
+    for reference in cell.references:
+        ref_cell = reference.ref_cell
+        name = ref_cell.name if isinstance(ref_cell, gdspy.Cell) else ref_cell
+        if isinstance(reference, gdspy.CellArray):
+            reference_shallow = gdspy.CellArray(
+                ref_cell=name,
+                columns=reference.columns,
+                rows=reference.rows,
+                spacing=reference.spacing,
+                origin=reference.origin,
+                rotation=reference.rotation,
+                magnification=reference.magnification,
+                x_reflection=reference.x_reflection,
+            )
+        else:
+            reference_shallow = gdspy.CellReference(
+                ref_cell=name,
+                origin=reference.origin,
+                rotation=reference.rotation,
+                magnification=reference.magnification,
+                x_reflection=reference.x_reflection,
+            )
+        reference_shallow.properties = getattr(reference, "properties", {})
+        cell_shallow.references.append(reference_shallow)
+    return cell_shallow
+
+
+def cell_to_gds(
+    cell: gdspy.Cell, multiplier: float, timestamp: Optional[datetime.datetime]
+) -> bytes:
+    """Returns the GDS records of a cell."""
+    buffer = io.BytesIO()
+    cell.to_gds(buffer, multiplier, timestamp)
+    return buffer.getvalue()
+
+
+def get_header(
+    unit: float = 1e-6,
+    precision: float = 1e-9,
+    timestamp: Optional[datetime.datetime] = None,
+) -> bytes:
+    """Returns the GDS library header records (HEADER, BGNLIB, LIBNAME, UNITS)."""
+    lib = gdspy.GdsLibrary(unit=unit, precision=precision)
+    buffer = io.BytesIO()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        lib.write_gds(buffer, cells=[], timestamp=timestamp)
+    library = buffer.getvalue()
+    assert library.endswith(ENDLIB), "GDS library does not end with ENDLIB"
+    return library[: -len(ENDLIB)]
+
+
+def get_cell_names_duplicated(cell: gdspy.Cell) -> Set[str]:
+    """Returns the names shared by different cells in the hierarchy of a cell."""
+    return set(get_cells_duplicated(cell))
+
+
+def write_cells_stream(
+    outfile: BinaryIO,
+    cell: gdspy.Cell,
+    unit: float = 1e-6,
+    precision: float = 1e-9,
+    timestamp: Optional[datetime.datetime] = None,
+    on_duplicate_cell: Optional[str] = "warn",
+    max_workers: int = 1,
+    processes: bool = False,
+    batch_size: int = 256,
+) -> WriteStats:
+    """Writes a GDS library with a cell and all its dependencies into a binary file.
+
+    Returns number of cells written, duplicated and unnamed cell names.
+
+    Args:
+        outfile: binary file open for writing.
+        cell: top cell.
+        unit: unit size for objects in library. 1um by default.
+        precision: for object dimensions in the library (m). 1nm by default.
+        timestamp: for the library and cell records. If None uses current time.
+        on_duplicate_cell: "warn", "overwrite" and "error" write only the last cell
+            with each name. None writes all of them.
+        max_workers: number of workers to serialize cells. 1 serializes them in
+            the current thread.
+        processes: use a process pool instead of a thread pool.
+        batch_size: number of cells serialized in parallel before writing them.
+    """
+    multiplier = unit / precision
+    cells = 0
+    cell_names = set()
+    cell_names_duplicated = set()
+    cell_names_unnamed = set()
+    cells_duplicated = (
+        get_cells_duplicated(cell) if on_duplicate_cell is not None else {}
+    )
+
+    def get_cells_to_write() -> Iterator[gdspy.Cell]:
+        for c in get_cells_top_first(cell):
+            if c.name in cell_names:
+                cell_names_duplicated.add(c.name)
+            cell_names.add(c.name)
+            if cells_duplicated.get(c.name, c) is not c:
+                continue
+            if c.name.startswith("Unnamed"):
+                cell_names_unnamed.add(c.name)
+            yield c
+
+    outfile.write(get_header(unit=unit, precision=precision, timestamp=timestamp))
+
+    if max_workers <= 1:
+        for c in get_cells_to_write():
+            c.to_gds(outfile, multiplier, timestamp)
+            cells += 1
+    else:
+        pool: Executor = (
+            ProcessPoolExecutor(max_workers=max_workers)
+            if processes
+            else ThreadPoolExecutor(max_workers=max_workers)
+        )
+        cells_to_write = get_cells_to_write()
+        with pool:
+            while True:
+                batch = list(itertools.islice(cells_to_write, batch_size))
+                if not batch:
+                    break
+                if processes:
+                    batch = [get_cell_shallow(c) for c in batch]
+                n = len(batch)
+                chunksize = max(n // (4 * max_workers), 1)
+                for records in pool.map(
+                    cell_to_gds,
+                    batch,
+                    itertools.repeat(multiplier, n),
+                    itertools.repeat(timestamp, n),
+                    chunksize=chunksize,
+                ):
+                    outfile.write(records)
+                cells += n
+    outfile.write(ENDLIB)
+    return WriteStats(
+        cells=cells,
+        cell_names_duplicated=cell_names_duplicated,
+        cell_names_unnamed=cell_names_unnamed,
+    )
+
+
+def write_gds(
+    component: gdspy.Cell,
+    gdspath: PathType,
+    unit: float = 1e-6,
+    precision: float = 1e-9,
+    timestamp: Optional[datetime.datetime] = None,
+    on_duplicate_cell: Optional[str] = "warn",
+    max_workers: int = 1,
+    processes: bool = False,
+) -> pathlib.Path:
+    """Streams a component and its dependencies into a GDS file.
+
+    Writes into a temporary file that replaces gdspath only when the file
+    is complete.
+
+    Args:
+        component: to write.
+        gdspath: GDS file path to write to.
+        unit: unit size for objects in library. 1um by default.
+        precision: for object dimensions in the library (m). 1nm by default.
+        timestamp: If None uses current time.
+        on_duplicate_cell: specify how to resolve duplicate-named cells. Choose one of the following:
+            "warn" (default): keep the last cell with each name and warn.
+            "error": throw a ValueError when attempting to write a gds with duplicate cells
+            "overwrite": keep the last cell with each name, without warning
+            None: do not try to resolve (at your own risk!)
+        max_workers: number of workers to serialize cells.
+        processes: use a process pool instead of a thread pool.
+    """
+    if on_duplicate_cell not in valid_on_duplicate_cell:
+        raise ValueError(
+            f"on_duplicate_cell: {on_duplicate_cell!r} not in (None, warn, error, overwrite)"
+        )
+    if on_duplicate_cell == "error":
+        cell_names_duplicated = get_cell_names_duplicated(component)
+        if cell_names_duplicated:
+            cell_names = "\n".join(sorted(cell_names_duplicated))
+            raise ValueError(
+                f"Duplicated cell names in {component.name!r}:\n{cell_names}"
+            )
+
+    gdspath = pathlib.Path(gdspath)
+    # unique per process and thread, so concurrent writers never share it
+    with tempfile.NamedTemporaryFile(
+        dir=gdspath.parent, prefix=f".{gdspath.name}.", suffix=".tmp", delete=False
+    ) as outfile:
+        gdspath_tmp = pathlib.Path(outfile.name)
+
+    try:
+        with open(gdspath_tmp, "wb") as outfile:
+            stats = write_cells_stream(
+                outfile=outfile,
+                cell=component,
+                unit=unit,
+                precision=precision,
+                timestamp=timestamp,
+                on_duplicate_cell=on_duplicate_cell,
+                max_workers=max_workers,
+                processes=processes,
+            )
+        os.replace(gdspath_tmp, gdspath)
+    finally:
+        if gdspath_tmp.exists():
+            gdspath_tmp.unlink()
+
+    if stats.cell_names_duplicated and on_duplicate_cell == "warn":
+        cell_names = "\n".join(sorted(stats.cell_names_duplicated))
+        warnings.warn(f"Duplicated cell names in {component.name!r}:\n{cell_names}")
+    if stats.cell_names_unnamed:
+        warnings.warn(
+            f"Component {component.name!r} contains "
+            f"{len(stats.cell_names_unnamed)} Unnamed cells"
+        )
+    return gdspath
+
+
+def test_write_gds_stream() -> None:
+    import gdsfactory as gf
+
+    c = gf.components.mzi()
+    gdspath = c.write_gds()
+
+    # points are snapped to the GDS precision, so compare with gdspy writer
+    gdspath_gdspy = gdspath.with_name("mzi_gdspy.gds")
+    lib = gdspy.GdsLibrary()
+    lib.write_gds(gdspath_gdspy, cells=[c] + list(c.get_dependencies(recursive=True)))
+    c1 = gf.import_gds(gdspath_gdspy)
+    c2 = gf.import_gds(gdspath)
+    assert c1.hash_geometry() == c2.hash_geometry()
+
+    cells = list(get_cells_depth_first(c))
+    assert cells[-1] is c
+    assert len(cells) == len({id(cell) for cell in cells})
+
+    cells = list(get_cells_top_first(c))
+    assert cells[0] is c
+    assert len(cells) == len({id(cell) for cell in cells})
+    assert gdspy.GdsLibrary(infile=str(gdspath)).top_level()[0].name == c.name
+
+
+def test_write_gds_parallel_deterministic() -> None:
+    import gdsfactory as gf
+    from gdsfactory.component import _timestamp2019, tmp
+
+    c = gf.components.mzi()
+    gdspath1 = write_gds(c, tmp / "mzi_1.gds", timestamp=_timestamp2019)
+    gdspath2 = write_gds(c, tmp / "mzi_2.gds", timestamp=_timestamp2019, max_workers=4)
+    gdspath3 = write_gds(
+        c, tmp / "mzi_3.gds", timestamp=_timestamp2019, max_workers=2, processes=True
+    )
+    assert gdspath1.read_bytes() == gdspath2.read_bytes()
+    assert gdspath1.read_bytes() == gdspath3.read_bytes()
+    for gdspath in [gdspath1, gdspath2, gdspath3]:
+        gdspath.unlink()
+
+
+def test_write_gds_threads() -> None:
+    import gdsfactory as gf
+    from gdsfactory.component import _timestamp2019, tmp
+
+    c = gf.components.mzi()
+    gdspath = tmp / "mzi_threads.gds"
+    gdspath_single = write_gds(c, tmp / "mzi_single.gds", timestamp=_timestamp2019)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [
+            pool.submit(write_gds, c, gdspath, timestamp=_timestamp2019)
+            for _ in range(8)
+        ]
+    for future in futures:
+        future.result()
+    assert gdspath.read_bytes() == gdspath_single.read_bytes()
+    assert not list(tmp.glob(".mzi_threads.gds.*.tmp"))
+    gdspath.unlink()
+    gdspath_single.unlink()
+
+
+def test_write_gds_duplicated_cells() -> None:
+    import pytest
+
+    import gdsfactory as gf
+    from gdsfactory.component import tmp
+
+    c = gf.Component("top_with_duplicates")
+    c << gf.Component("same_name")
+    c2 = gf.Component("same_name")
+    c2.add_polygon([(0, 0), (1, 0), (1, 1)])
+    ref = c << c2
+    ref.movex(5)
+
+    gdspath = tmp / "top_with_duplicates.gds"
+    with pytest.raises(ValueError):
+        c.write_gds(gdspath, on_duplicate_cell="error")
+    assert not gdspath.exists()
+    assert not list(tmp.glob(".top_with_duplicates.gds.*.tmp"))
+
+    # the last duplicate wins
+    c.write_gds(gdspath, on_duplicate_cell="overwrite")
+    lib = gdspy.GdsLibrary(infile=str(gdspath))
+    assert list(lib.cells) == ["top_with_duplicates", "same_name"]
+    assert len(lib.cells["same_name"].polygons) == 1
+    oaspath = c.write_oas(gdspath.with_suffix(".oas"), on_duplicate_cell="overwrite")
+    c3 = gf.import_oas(oaspath)
+    assert [len(ref.parent.polygons) for ref in c3.references] == [1, 1]
+    gdspath.unlink()
+    oaspath.unlink()
+
+
+if __name__ == "__main__":
+    test_write_gds_stream()
+    test_write_gds_parallel_deterministic()
+    test_write_gds_threads()
+    test_write_gds_duplicated_cells()
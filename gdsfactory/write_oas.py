@@ -0,0 +1,329 @@
+"""Write a Component into an OASIS file.
+
+OASIS files are much smaller than GDS for large arrays (gratings, fill, text)
+as regular repetitions of shapes and cell arrays are written as repetitions
+and records can be compressed in CBLOCKs.
+
+The hierarchy is kept, ports are written as text labels on the port layer
+(with width, orientation and port_type properties) and the component settings
+are stored as a YAML property of the top cell, so `import_oas` can recover them.
+
+The klayout layout is built from the cells of the Component, without going
+through a GDS file. OASIS texts have no rotation or anchor, so labels lose them.
+"""
+import pathlib
+import warnings
+from typing import Any, Dict, Optional, Tuple
+
+import gdspy
+import numpy as np
+from omegaconf import OmegaConf
+
+from gdsfactory.port import Port
+from gdsfactory.types import PathType
+from gdsfactory.write_gds import (
+    get_cell_names_duplicated,
+    get_cells_depth_first,
+    get_cells_duplicated,
+    valid_on_duplicate_cell,
+)
+
+METADATA_PROPERTY = "gdsfactory_metadata"
+PORT_PROPERTIES = ("port_width", "port_orientation", "port_type")
+
+
+def get_properties_id(layout, element) -> int:
+    """Returns the klayout properties id of the GDS properties of an element."""
+    properties = getattr(element, "properties", None)
+    return layout.properties_id(dict(properties)) if properties else 0
+
+
+def get_trans(reference: gdspy.CellReference, multiplier: float):
+    """Returns the klayout transformation of a reference in database units.
+
+    Args:
+        reference: gdspy CellReference or CellArray.
+        multiplier: database units per user unit.
+    """
+    import klayout.db as pya
+
+    x, y = (int(round(float(v) * multiplier)) for v in reference.origin)
+    rotation = float(reference.rotation or 0)
+    magnification = float(reference.magnification or 1)
+    x_reflection = bool(reference.x_reflection)
+    if magnification == 1 and rotation % 90 == 0:
+        return pya.Trans(int(rotation // 90) % 4, x_reflection, x, y)
+    return pya.ICplxTrans(magnification, rotation, x_reflection, x, y)
+
+
+def get_array_vectors(array: gdspy.CellArray, multiplier: float) -> Tuple[Any, Any]:
+    """Returns the klayout column and row vectors of a CellArray.
+
+    The spacing is rotated and reflected with the array, like a GDS AREF,
+    but not magnified.
+    """
+    import klayout.db as pya
+
+    angle = np.deg2rad(float(array.rotation or 0))
+    dx, dy = (float(v) * multiplier for v in array.spacing)
+    dy = -dy if array.x_reflection else dy
+    ca, sa = np.cos(angle), np.sin(angle)
+    a = pya.Vector(int(round(dx * ca)), int(round(dx * sa)))
+    b = pya.Vector(int(round(-dy * sa)), int(round(dy * ca)))
+    return a, b
+
+
+def add_cell(layout, cell: gdspy.Cell, cell_indexes: Dict[Any, int], multiplier: float):
+    """Adds the polygons, paths, labels and references of a gdspy cell
+    to its klayout cell and returns it.
+
+    Paths are written as polygons.
+
+    Args:
+        layout: klayout.db.Layout.
+        cell: gdspy cell, after the klayout cells it references are created.
+        cell_indexes: klayout cell index of the cells (by id) or cell names.
+        multiplier: database units per user unit.
+    """
+    import klayout.db as pya
+
+    kcell = layout.cell(cell_indexes[id(cell)])
+    layer_indexes: Dict[Tuple[int, int], int] = {}
+
+    def get_shapes(layer: int, datatype: int):
+        key = (int(layer), int(datatype))
+        if key not in layer_indexes:
+            layer_indexes[key] = layout.layer(*key)
+        return kcell.shapes(layer_indexes[key])
+
+    def insert_polygons(polygons, layers, datatypes, properties_id: int) -> None:
+        for points, layer, datatype in zip(polygons, layers, datatypes):
+            points = np.round(np.asarray(points) * multiplier).astype(int).tolist()
+            polygon = pya.Polygon([pya.Point(x, y) for x, y in points])
+            get_shapes(layer, datatype).insert(polygon, properties_id)
+
+    for polygonset in cell.polygons:
+        insert_polygons(
+            polygonset.polygons,
+            polygonset.layers,
+            polygonset.datatypes,
+            get_properties_id(layout, polygonset),
+        )
+
+    for path in cell.paths:
+        for (layer, datatype), polygons in path.get_polygons(by_spec=True).items():
+            insert_polygons(
+                polygons,
+                [layer] * len(polygons),
+                [datatype] * len(polygons),
+                get_properties_id(layout, path),
+            )
+
+    for label in cell.labels:
+        x, y = (int(round(float(v) * multiplier)) for v in label.position)
+        text = pya.Text(label.text, pya.Trans(x, y))
+        get_shapes(label.layer, label.texttype).insert(
+            text, get_properties_id(layout, label)
+        )
+
+    for reference in cell.references:
+        ref_cell = reference.ref_cell
+        cell_index = cell_indexes.get(
+            id(ref_cell) if isinstance(ref_cell, gdspy.Cell) else ref_cell
+        )
+        if cell_index is None:
+            cell_index = cell_indexes[ref_cell.name]
+        trans = get_trans(reference, multiplier)
+        if isinstance(reference, gdspy.CellArray):
+            a, b = get_array_vectors(reference, multiplier)
+            instance = pya.CellInstArray(
+                cell_index, trans, a, b, reference.columns, reference.rows
+            )
+        else:
+            instance = pya.CellInstArray(cell_index, trans)
+        kcell.insert(instance, get_properties_id(layout, reference))
+    return kcell
+
+
+def get_layout(
+    component: gdspy.Cell,
+    unit: float = 1e-6,
+    precision: float = 1e-9,
+    on_duplicate_cell: Optional[str] = "warn",
+):
+    """Returns a klayout.db.Layout with a component and its dependencies.
+
+    Cells are added depth first, each cell right after all the cells it
+    references. Like write_gds, the last cell with each name is kept.
+
+    Args:
+        component: top cell.
+        unit: unit size for objects in library. 1um by default.
+        precision: for object dimensions in the library (m). 1nm by default.
+        on_duplicate_cell: how to resolve duplicate-named cells (see write_gds).
+    """
+    import klayout.db as pya
+
+    if on_duplicate_cell not in valid_on_duplicate_cell:
+        raise ValueError(
+            f"on_duplicate_cell: {on_duplicate_cell!r} not in (None, warn, error, overwrite)"
+        )
+    if on_duplicate_cell == "error":
+        cell_names_duplicated = get_cell_names_duplicated(component)
+        if cell_names_duplicated:
+            cell_names = "\n".join(sorted(cell_names_duplicated))
+            raise ValueError(
+                f"Duplicated cell names in {component.name!r}:\n{cell_names}"
+            )
+
+    layout = pya.Layout()
+    layout.dbu = precision / 1e-6
+    multiplier = unit / precision
+
+    cells_duplicated = (
+        get_cells_duplicated(component) if on_duplicate_cell is not None else {}
+    )
+    # cells by id, and by name to resolve the references to duplicated cells,
+    # created before they are filled as the kept cell can come after its users
+    cell_indexes: Dict[Any, int] = {}
+    cells = []
+    cell_names = set()
+    cell_names_duplicated = set()
+    cell_names_unnamed = set()
+    for cell in get_cells_depth_first(component):
+        if cell.name in cell_names:
+            cell_names_duplicated.add(cell.name)
+        cell_names.add(cell.name)
+        if cells_duplicated.get(cell.name, cell) is not cell:
+            continue
+        if cell.name.startswith("Unnamed"):
+            cell_names_unnamed.add(cell.name)
+        cell_index = layout.create_cell(cell.name).cell_index()
+        cell_indexes[id(cell)] = cell_index
+        cell_indexes.setdefault(cell.name, cell_index)
+        cells.append(cell)
+
+    for cell in cells:
+        add_cell(layout, cell, cell_indexes, multiplier)
+
+    if cell_names_duplicated and on_duplicate_cell == "warn":
+        cell_names = "\n".join(sorted(cell_names_duplicated))
+        warnings.warn(f"Duplicated cell names in {component.name!r}:\n{cell_names}")
+    if cell_names_unnamed:
+        warnings.warn(
+            f"Component {component.name!r} contains "
+            f"{len(cell_names_unnamed)} Unnamed cells"
+        )
+    return layout
+
+
+def add_port_labels(layout, cell, ports: Dict[str, Port]) -> None:
+    """Adds ports as text labels with properties to a klayout cell.
+
+    Args:
+        layout: klayout.db.Layout.
+        cell: klayout.db.Cell.
+        ports: dict of ports.
+    """
+    import klayout.db as pya
+
+    for port in ports.values():
+        if port.layer is None:
+            continue
+        properties_id = layout.properties_id(
+            {
+                "port_width": float(port.width),
+                "port_orientation": None
+                if port.orientation is None
+                else float(port.orientation),
+                "port_type": str(port.port_type),
+            }
+        )
+        layer_index = layout.layer(int(port.layer[0]), int(port.layer[1]))
+        x, y = port.midpoint
+        text = pya.Text(
+            str(port.name),
+            pya.Trans(pya.Vector(round(x / layout.dbu), round(y / layout.dbu))),
+        )
+        cell.shapes(layer_index).insert(text, properties_id)
+
+
+def write_oas(
+    component,
+    oaspath: PathType,
+    unit: float = 1e-6,
+    precision: float = 1e-9,
+    compression_level: int = 10,
+    cblocks: bool = True,
+    strict: bool = True,
+    with_ports: bool = True,
+    with_metadata: bool = True,
+    on_duplicate_cell: Optional[str] = "warn",
+) -> pathlib.Path:
+    """Writes a component and its dependencies into an OASIS file.
+
+    Args:
+        component: to write.
+        oaspath: OASIS file path to write to.
+        unit: unit size for objects in library. 1um by default.
+        precision: for object dimensions in the library (m). 1nm by default.
+        compression_level: 0 writes shapes one by one, higher levels spend more
+            time looking for shape repetitions (10 is a good compromise).
+        cblocks: compress records with CBLOCK.
+        strict: write strict mode OASIS (offset tables in the END record).
+        with_ports: write ports as text labels of the top cell.
+        with_metadata: write component settings as a property of the top cell.
+        on_duplicate_cell: how to resolve duplicate-named cells (see write_gds).
+    """
+    import klayout.db as pya
+
+    oaspath = pathlib.Path(oaspath)
+    layout = get_layout(
+        component, unit=unit, precision=precision, on_duplicate_cell=on_duplicate_cell
+    )
+
+    top = layout.cell(component.name)
+    if with_ports:
+        add_port_labels(layout, top, component.ports)
+    if with_metadata:
+        top.set_property(METADATA_PROPERTY, OmegaConf.to_yaml(component.to_dict()))
+
+    options = pya.SaveLayoutOptions()
+    options.format = "OASIS"
+    options.oasis_compression_level = compression_level
+    options.oasis_write_cblocks = cblocks
+    options.oasis_strict_mode = strict
+    layout.write(str(oaspath), options)
+    return oaspath
+
+
+def test_write_oas_references() -> None:
+    """Rotated, magnified, reflected references and arrays keep their placement."""
+    import gdsfactory as gf
+    from gdsfactory.read.import_oas import import_oas
+
+    c = gf.Component("test_write_oas_references")
+    ring = gf.components.ring()
+    ref = c << gf.components.mmi1x2()
+    ref.rotate(30)
+    ref.move((3.3, 7))
+    ref.reflect()
+    ref = c << ring
+    ref.magnification = 2.0
+    ref.movex(100)
+    array = c.add_array(ring, columns=3, rows=2, spacing=(30, 40))
+    array.rotation = 30
+    array.origin = (5, 7)
+    array.x_reflection = True
+    c.add(gdspy.FlexPath([(0, 0), (10, 5), (20, 0)], 1, layer=3, datatype=1))
+    c.add_label("hello", position=(1, 2), layer=(10, 0))
+
+    c2 = import_oas(c.write_oas())
+    assert np.allclose(c2.bbox, c.bbox, atol=1e-3)
+    area = c.area(by_spec=True)
+    area2 = c2.area(by_spec=True)
+    for layer in [(1, 0), (3, 1)]:
+        assert abs(area[layer] - area2[layer]) < 1e-3 * area[layer]
+    assert [(label.text, tuple(label.position)) for label in c2.labels] == [
+        ("hello", (1, 2))
+    ]